@@ -0,0 +1,103 @@
+"""
+This script measures the import time of the modules loaded at the start of the app, the pages and the validators.
+Every module is imported in a fresh interpreter, so that the measured time includes all of its dependencies.
+It also reports which heavy dependencies are pulled in by each import, which should only happen on first use.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 3] [--output import_time.csv]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules imported by run_app.py at startup
+STARTUP_MODULES = [
+    "validationtesting.gui.views.utils",
+    "validationtesting.utils.lazy_import",
+    "validationtesting.utils.savetoyaml",
+]
+
+PAGE_MODULES = [
+    "validationtesting.gui.views.initial_page",
+    "validationtesting.gui.views.component_selection_page",
+    "validationtesting.gui.views.general_page",
+    "validationtesting.gui.views.solar_pv_page",
+    "validationtesting.gui.views.solar_data_page",
+    "validationtesting.gui.views.wind_page",
+    "validationtesting.gui.views.wind_data_page",
+    "validationtesting.gui.views.generator_page",
+    "validationtesting.gui.views.battery_page",
+    "validationtesting.gui.views.conversion_page",
+    "validationtesting.gui.views.upload_model_output_page",
+    "validationtesting.gui.views.upload_conversion_losses_page",
+    "validationtesting.gui.views.run_page",
+    "validationtesting.gui.views.results_page",
+]
+
+VALIDATION_MODULES = [
+    "validationtesting.validation.benchmark",
+    "validationtesting.validation.error_calculation",
+    "validationtesting.validation.battery_validation",
+    "validationtesting.validation.generator_validation",
+    "validationtesting.validation.conversion_losses_validation",
+    "validationtesting.validation.energy_balance_validation",
+    "validationtesting.validation.cost_validation",
+    "validationtesting.validation.cost_sensitivity",
+]
+
+# Dependencies which should only be imported when they are needed
+HEAVY_DEPENDENCIES = ["matplotlib", "blast", "requests", "folium", "geopy"]
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__({module!r})
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": loaded, "error": error}}))
+"""
+
+def measure_import(module: str) -> dict:
+    """Import a module in a fresh interpreter and return the import time and the loaded heavy dependencies."""
+    code = MEASURE.format(module=module, heavy=HEAVY_DEPENDENCIES)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the import time of the app modules.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of measurements per module, the fastest is reported.")
+    parser.add_argument("--output", type=Path, default=None, help="Optional CSV file to save the results.")
+    args = parser.parse_args()
+
+    rows = []
+    for group, modules in [("Startup", STARTUP_MODULES), ("Page", PAGE_MODULES), ("Validation", VALIDATION_MODULES)]:
+        for module in modules:
+            measurements = [measure_import(module) for _ in range(args.repeat)]
+            rows.append({
+                "Group": group,
+                "Module": module,
+                "Import Time [s]": min(measurement["seconds"] for measurement in measurements),
+                "Heavy Dependencies": ", ".join(measurements[0]["heavy"]),
+                "Error": measurements[0]["error"] or "",
+            })
+
+    results = pd.DataFrame(rows)
+    with pd.option_context("display.max_rows", None, "display.max_colwidth", 60, "display.width", 200):
+        print(results.to_string(index=False))
+    startup = results.loc[results["Group"] == "Startup", "Import Time [s]"].max()
+    print(f"\nSlowest startup import: {startup:.3f} s")
+    if args.output is not None:
+        results.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+This script checks that all available backends of the kernels give the same results as the Python reference kernels
+and measures their run time. The battery and rainflow kernels are run for 20 years in 15 minute steps by default.
+The script exits with an error if a backend deviates from the reference.
+
+Usage:
+    python benchmarks/kernels.py [--years 20] [--steps-per-hour 4] [--units 5] [--repeat 3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from validationtesting.validation.kernels import KERNELS, default_backend
+from validationtesting.validation.cycles import turning_points
+
+def battery_inputs(num_steps: int, rng: np.random.Generator) -> tuple:
+    """Random battery power with an inactive period and two installations."""
+    battery_power = rng.uniform(-1000, 1000, num_steps)
+    charging_efficiency = rng.uniform(0.85, 0.98, num_steps)
+    discharging_efficiency = rng.uniform(0.85, 0.98, num_steps)
+    active = np.ones(num_steps, dtype=bool)
+    active[num_steps // 3:num_steps // 3 + 1000] = False
+    installed_energy = np.zeros(num_steps)
+    installed_energy[[0, num_steps // 2]] = 5000.0
+    return battery_power, charging_efficiency, discharging_efficiency, active, installed_energy
+
+def battery_unit_inputs(num_steps: int, num_units: int, rng: np.random.Generator) -> tuple:
+    """Random battery power split by headroom between units with different efficiencies, one unit is installed later."""
+    battery_power = rng.uniform(-1000, 1000, num_steps)
+    capacity = np.repeat(rng.uniform(2000, 6000, num_units)[None, :], num_steps, axis=0)
+    capacity[:num_steps // 3, -1] = 0.0
+    installed_energy = np.zeros((num_steps, num_units))
+    installed_energy[0, :-1] = 0.5 * capacity[0, :-1]
+    installed_energy[num_steps // 3, -1] = 0.5 * capacity[-1, -1]
+    return (battery_power, capacity, rng.uniform(0.85, 0.98, num_units), rng.uniform(0.85, 0.98, num_units),
+            np.full(num_units, 0.2), np.full(num_units, 1.0), installed_energy, True)
+
+def generator_inputs(num_steps: int, num_units: int, rng: np.random.Generator) -> tuple:
+    """Random generator energy with some unavailable units."""
+    max_power = rng.uniform(500, 2000, (num_steps, num_units)) * (rng.random((num_steps, num_units)) > 0.1)
+    total_energy = rng.uniform(0, 1.2, num_steps) * max_power.sum(axis=1)
+    return total_energy, max_power
+
+def rainflow_inputs(num_steps: int, steps_per_day: int, rng: np.random.Generator) -> tuple:
+    """Turning points of a daily SoC cycle with noise, clipped at the SoC limits so that there are plateaus and equal ranges."""
+    steps = np.arange(num_steps)
+    soc = np.clip(0.5 + 0.35 * np.sin(2 * np.pi * steps / steps_per_day) + rng.normal(0, 0.05, num_steps), 0.2, 1.0)
+    return (soc[turning_points(soc)],)
+
+def measure(kernel, inputs: tuple, repeat: int) -> tuple:
+    """Run a kernel and return the result and the fastest run time."""
+    kernel(*inputs)  # Compile or warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = kernel(*inputs)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check and measure the kernels of the validators.")
+    parser.add_argument("--years", type=int, default=20, help="Number of years of the battery run.")
+    parser.add_argument("--steps-per-hour", type=int, default=4, help="Number of time steps per hour.")
+    parser.add_argument("--units", type=int, default=5, help="Number of generator and battery units.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of measurements per backend, the fastest is reported.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    num_steps = args.years * 8760 * args.steps_per_hour
+    inputs = {
+        "battery_energy_stored": battery_inputs(num_steps, rng),
+        "battery_unit_energy_stored": battery_unit_inputs(num_steps, args.units, rng),
+        "dispatch_generators": generator_inputs(num_steps, args.units, rng),
+        "rainflow_cycles": rainflow_inputs(num_steps, 24 * args.steps_per_hour, rng),
+    }
+
+    rows = []
+    for name, backends in KERNELS.items():
+        reference, reference_time = measure(backends["python"], inputs[name], 1)
+        reference = np.hstack(reference) if isinstance(reference, tuple) else reference
+        for backend, kernel in backends.items():
+            result, elapsed = (reference, reference_time) if backend == "python" else measure(kernel, inputs[name], args.repeat)
+            result = np.hstack(result) if isinstance(result, tuple) else result
+            same_shape = result.shape == reference.shape
+            rows.append({
+                "Kernel": name,
+                "Backend": backend,
+                "Default": backend == default_backend(name),
+                "Time Steps": num_steps,
+                "Run Time [s]": elapsed,
+                "Speedup": reference_time / elapsed,
+                "Max Deviation": float(np.max(np.abs(result - reference))) if same_shape else np.inf,
+                "Equivalent": same_shape and bool(np.allclose(result, reference, rtol=1e-9, atol=1e-6)),
+            })
+
+    results = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200):
+        print(results.to_string(index=False))
+    if not results["Equivalent"].all():
+        sys.exit("Some backends deviate from the reference kernels.")
+
+if __name__ == "__main__":
+    main()
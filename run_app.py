@@ -7,28 +7,17 @@ between these pages based on the user's selections and the state of the session.
 import streamlit as st
 
 from validationtesting.gui.views.utils import render_footer
-from validationtesting.gui.views.initial_page import initial_page
-from validationtesting.gui.views.general_page import general
-from validationtesting.gui.views.component_selection_page import component_selection
-from validationtesting.gui.views.upload_model_output_page import upload_model_output
-from validationtesting.gui.views.solar_pv_page import solar_pv
-from validationtesting.gui.views.solar_data_page import irradiation_data
-from validationtesting.gui.views.battery_page import battery
-from validationtesting.gui.views.wind_page import wind
-from validationtesting.gui.views.wind_data_page import wind_data
-from validationtesting.gui.views.generator_page import generator
-from validationtesting.gui.views.conversion_page import conversion
-from validationtesting.gui.views.upload_conversion_losses_page import upload_conversion_losses
-from validationtesting.gui.views.run_page import run_model
-from validationtesting.gui.views.results_page import results
+from validationtesting.utils.lazy_import import lazy_callable
 from validationtesting.utils.savetoyaml import save_to_yaml
 
+# The page modules are imported when their page is first opened
+VIEWS = "validationtesting.gui.views"
 
 if 'initialized' not in st.session_state:
     st.session_state.initialized = False
 
 initial_page = st.Page(
-    page=initial_page,
+    page=lazy_callable(f"{VIEWS}.initial_page", "initial_page"),
     title="Initial Page",
     icon="👋",
     default=True
@@ -42,14 +31,14 @@ if st.session_state.initialized:
     if st.session_state.new_project_completed:
 
         component_selection_page = st.Page(
-            page=component_selection,
+            page=lazy_callable(f"{VIEWS}.component_selection_page", "component_selection"),
             title="Component Selection",
             icon="🔌",
         )
         active_pages["General"].append(component_selection_page)
 
         general_page = st.Page(
-            page=general,
+            page=lazy_callable(f"{VIEWS}.general_page", "general"),
             title="General",
             icon="🔧",
         )
@@ -57,7 +46,7 @@ if st.session_state.initialized:
 
         if st.session_state.solar_pv:
             solar_pv_page = st.Page(
-                page=solar_pv,
+                page=lazy_callable(f"{VIEWS}.solar_pv_page", "solar_pv"),
                 title="Solar PV Specifications",
                 icon="☀️",
             )
@@ -66,16 +55,13 @@ if st.session_state.initialized:
 
             if st.session_state.technical_validation:
                 irradiation_data_page = st.Page(
-                    page=irradiation_data,
+                    page=lazy_callable(f"{VIEWS}.solar_data_page", "irradiation_data"),
                     title="Irradiation Data",
                     icon="📊",
                 )
 
-                def upload_solar_model_output():
-                    upload_model_output('solar_pv')
-
                 upload_solar_model_output_page = st.Page(
-                    page=upload_solar_model_output,
+                    page=lazy_callable(f"{VIEWS}.upload_model_output_page", "upload_model_output", 'solar_pv', name="upload_solar_model_output"),
                     title="Upload Solar Model Output",
                     icon="📤",
                 )
@@ -85,7 +71,7 @@ if st.session_state.initialized:
 
         if st.session_state.wind:
             wind_page = st.Page(
-                page=wind,
+                page=lazy_callable(f"{VIEWS}.wind_page", "wind"),
                 title="Wind Energy",
                 icon="🌀",
             )
@@ -95,16 +81,13 @@ if st.session_state.initialized:
             if st.session_state.technical_validation:
 
                 wind_data_page = st.Page(
-                    page=wind_data,
+                    page=lazy_callable(f"{VIEWS}.wind_data_page", "wind_data"),
                     title="Wind Data",
                     icon="📊",
                 )
 
-                def upload_wind_model_output():
-                    upload_model_output('wind')
-
                 upload_wind_model_output_page = st.Page(
-                    page=upload_wind_model_output,
+                    page=lazy_callable(f"{VIEWS}.upload_model_output_page", "upload_model_output", 'wind', name="upload_wind_model_output"),
                     title="Upload Wind Model Output",
                     icon="📤",
                 )
@@ -113,7 +96,7 @@ if st.session_state.initialized:
 
         if st.session_state.generator:
             generator_page = st.Page(
-                page=generator,
+                page=lazy_callable(f"{VIEWS}.generator_page", "generator"),
                 title="Generator",
                 icon="⚙️",
             )
@@ -122,11 +105,8 @@ if st.session_state.initialized:
 
             if st.session_state.technical_validation:
 
-                def upload_generator_model_output():
-                    upload_model_output('generator')
-
                 upload_generator_model_output_page = st.Page(
-                    page=upload_generator_model_output,
+                    page=lazy_callable(f"{VIEWS}.upload_model_output_page", "upload_model_output", 'generator', name="upload_generator_model_output"),
                     title="Upload Generator Model Output",
                     icon="📤",
                 )
@@ -135,7 +115,7 @@ if st.session_state.initialized:
 
         if st.session_state.battery:
             battery_page = st.Page(
-                page=battery,
+                page=lazy_callable(f"{VIEWS}.battery_page", "battery"),
                 title="Battery",
                 icon="🔋",
             )
@@ -144,11 +124,8 @@ if st.session_state.initialized:
 
             if st.session_state.technical_validation:
 
-                def upload_battery_model_output():
-                    upload_model_output('battery')
-
                 upload_battery_model_output_page = st.Page(
-                    page=upload_battery_model_output,
+                    page=lazy_callable(f"{VIEWS}.upload_model_output_page", "upload_model_output", 'battery', name="upload_battery_model_output"),
                     title="Upload Battery Model Output",
                     icon="📤",
                 )
@@ -157,13 +134,13 @@ if st.session_state.initialized:
 
         if st.session_state.conversion:
             conversion_page = st.Page(
-                page=conversion,
+                page=lazy_callable(f"{VIEWS}.conversion_page", "conversion"),
                 title="Conversion",
                 icon="🔄",
             )
 
             upload_conversion_losses_page = st.Page(
-                    page=upload_conversion_losses,
+                    page=lazy_callable(f"{VIEWS}.upload_conversion_losses_page", "upload_conversion_losses"),
                     title="Upload Model Conversion Losses Model",
                     icon="📤",
                 )
@@ -171,11 +148,8 @@ if st.session_state.initialized:
             active_pages["Conversion"] = [conversion_page, upload_conversion_losses_page]
 
         if st.session_state.energy_balance:
-            def upload_consumption():
-                upload_model_output('consumption')
-
             upload_consumption_page = st.Page(
-                page=upload_consumption,
+                page=lazy_callable(f"{VIEWS}.upload_model_output_page", "upload_model_output", 'consumption', name="upload_consumption"),
                 title="Upload Consumption Data",
                 icon="📤",
             )
@@ -183,13 +157,13 @@ if st.session_state.initialized:
             active_pages["Consumption"] = [upload_consumption_page]
 
         run_page = st.Page(
-            page=run_model,
+            page=lazy_callable(f"{VIEWS}.run_page", "run_model"),
             title="Run Page",
             icon="🏃",
         )
 
         results_page = st.Page(
-            page=results,
+            page=lazy_callable(f"{VIEWS}.results_page", "results"),
             title="Results Page",
             icon="📈",
         )
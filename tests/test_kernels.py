@@ -0,0 +1,102 @@
+"""
+Check that the NumPy and, if installed, Numba backends of the kernels give the same results as the Python reference kernels.
+"""
+
+import numpy as np
+import pytest
+
+from validationtesting.validation import kernels
+from validationtesting.validation.kernels import (
+    KERNELS, battery_energy_stored, battery_unit_energy_stored, dispatch_generators, rainflow_cycles,
+)
+
+def backends(name: str) -> list:
+    return [backend for backend in KERNELS[name] if backend != "python"]
+
+def assert_same(result, reference) -> None:
+    result = result if isinstance(result, tuple) else (result,)
+    reference = reference if isinstance(reference, tuple) else (reference,)
+    assert len(result) == len(reference)
+    for values, reference_values in zip(result, reference):
+        np.testing.assert_allclose(values, reference_values, rtol=1e-9, atol=1e-6)
+
+@pytest.mark.parametrize("backend", backends("battery_energy_stored"))
+def test_battery_energy_stored(backend):
+    rng = np.random.default_rng(0)
+    num_steps = 2000
+    active = rng.random(num_steps) > 0.1
+    installed_energy = np.zeros(num_steps)
+    installed_energy[[0, num_steps // 2]] = 5000.0
+    inputs = (rng.uniform(-1000, 1000, num_steps), rng.uniform(0.85, 0.98, num_steps), rng.uniform(0.85, 0.98, num_steps),
+              active, installed_energy)
+    assert_same(battery_energy_stored(*inputs, backend=backend), battery_energy_stored(*inputs, backend="python"))
+
+def battery_unit_inputs(rng: np.random.Generator, num_steps: int, num_units: int) -> tuple:
+    """Random battery power with one unit installed later, one unit with zero and one with negative capacity for a while."""
+    capacity = np.repeat(rng.uniform(2000, 6000, num_units)[None, :], num_steps, axis=0)
+    capacity[:num_steps // 3, -1] = 0.0
+    capacity[num_steps // 2:num_steps // 2 + 100, 0] = -1000.0
+    installed_energy = np.zeros((num_steps, num_units))
+    installed_energy[0, :-1] = 0.5 * capacity[0, :-1]
+    installed_energy[num_steps // 3, -1] = 0.5 * capacity[-1, -1]
+    return (rng.uniform(-1000, 1000, num_steps), capacity, rng.uniform(0.85, 0.98, num_units), rng.uniform(0.85, 0.98, num_units),
+            np.full(num_units, 0.2), np.full(num_units, 1.0), installed_energy)
+
+@pytest.mark.parametrize("split_headroom", [False, True])
+@pytest.mark.parametrize("backend", backends("battery_unit_energy_stored"))
+def test_battery_unit_energy_stored(backend, split_headroom):
+    inputs = battery_unit_inputs(np.random.default_rng(1), 2000, 4)
+    assert_same(
+        battery_unit_energy_stored(*inputs, split_headroom=split_headroom, backend=backend),
+        battery_unit_energy_stored(*inputs, split_headroom=split_headroom, backend="python"),
+    )
+
+@pytest.mark.parametrize("split_headroom", [False, True])
+@pytest.mark.parametrize("backend", backends("battery_unit_energy_stored"))
+def test_battery_unit_energy_stored_without_capacity(backend, split_headroom):
+    inputs = list(battery_unit_inputs(np.random.default_rng(2), 500, 3))
+    inputs[1] = np.zeros_like(inputs[1])
+    inputs[1][:, 0] = -100.0
+    assert_same(
+        battery_unit_energy_stored(*inputs, split_headroom=split_headroom, backend=backend),
+        battery_unit_energy_stored(*inputs, split_headroom=split_headroom, backend="python"),
+    )
+
+@pytest.mark.parametrize("backend", backends("dispatch_generators"))
+def test_dispatch_generators(backend):
+    rng = np.random.default_rng(3)
+    num_steps, num_units = 2000, 4
+    max_power = rng.uniform(500, 2000, (num_steps, num_units)) * (rng.random((num_steps, num_units)) > 0.1)
+    total_energy = rng.uniform(0, 1.2, num_steps) * max_power.sum(axis=1)
+    total_energy[::7] = -rng.uniform(0, 500, len(total_energy[::7]))
+    assert_same(dispatch_generators(total_energy, max_power, backend=backend), dispatch_generators(total_energy, max_power, backend="python"))
+
+def turning_point_series(rng: np.random.Generator, num_points: int) -> np.ndarray:
+    """Alternating peaks and valleys, rounded so that there are equal ranges."""
+    steps = np.round(rng.uniform(0.1, 1.0, num_points), 1) * np.where(np.arange(num_points) % 2 == 0, 1.0, -1.0)
+    return np.cumsum(steps)
+
+@pytest.mark.parametrize("backend", backends("rainflow_cycles"))
+def test_rainflow_cycles(backend):
+    reversals = turning_point_series(np.random.default_rng(4), 5000)
+    assert_same(rainflow_cycles(reversals, backend=backend), rainflow_cycles(reversals, backend="python"))
+
+def test_numpy_rainflow_cycles_uses_four_point_passes_and_residue(monkeypatch):
+    reversals = turning_point_series(np.random.default_rng(5), 5000)
+    residue_lengths = []
+    reference = kernels.reference_rainflow_cycles
+
+    def count_residue(residue):
+        residue_lengths.append(len(residue))
+        return reference(residue)
+
+    monkeypatch.setattr(kernels, "reference_rainflow_cycles", count_residue)
+    result = kernels.numpy_rainflow_cycles(reversals)
+    # The four-point passes closed cycles before the three-point method counted the shorter residue
+    assert len(residue_lengths) == 1 and 0 < residue_lengths[0] < len(reversals)
+    assert_same(result, reference(reversals))
+
+@pytest.mark.parametrize("backend", backends("rainflow_cycles"))
+def test_rainflow_cycles_short_series(backend):
+    for reversals in ([], [0.5], [0.2, 0.8], [0.2, 0.8, 0.4]):
+        assert_same(rainflow_cycles(reversals, backend=backend), rainflow_cycles(reversals, backend="python"))
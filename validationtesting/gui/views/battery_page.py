@@ -6,6 +6,7 @@ The user can specify the specifications for the batteries.
 import streamlit as st
 from validationtesting.gui.views.utils import initialize_session_state, combine_date_and_time
 import datetime as dt
+import importlib.util
 import numpy as np
 
 # Function to initialize session state variables (opens dialog box)
@@ -375,6 +376,18 @@ def battery() -> None:
                 'Degradation accounting:',
                 accounting_options,
                 index = accounting_options.index(st.session_state.battery_degradation_accounting))
+
+        if not st.session_state.battery_cyclic_degradation:
+            from validationtesting.validation.battery_validation import DISPATCH_SPLITS
+            st.session_state.battery_dispatch_split = st.selectbox(
+                'Battery power split between the units:',
+                DISPATCH_SPLITS,
+                index = DISPATCH_SPLITS.index(st.session_state.get("battery_dispatch_split", DISPATCH_SPLITS[0])),
+                help="Aggregate validates all units as one battery. Capacity and Headroom track the state of charge of each unit, "
+                     "the battery power is split in proportion to the unit capacity or to the energy a unit can still take or give.")
+            if st.session_state.battery_dispatch_split == "Headroom" and importlib.util.find_spec("numba") is None:
+                st.warning("Numba is not installed, the Headroom split is calculated step by step in Python and is much slower "
+                           "for long projects. Install the requirements to compile it.")
             
     # Display the input fields for each battery type
     st.write("Enter Battery parameters:")
@@ -28,7 +28,17 @@ def component_selection() -> None:
         st.session_state.technical_validation = st.toggle("⚙️Technical Validation", value=st.session_state.technical_validation)
         if st.session_state.technical_validation:
             st.session_state.conversion = st.toggle("🔄Conversion", value=st.session_state.conversion)
+            st.session_state.deviation_threshold = st.number_input(
+                "Deviation Threshold [%]", min_value=0.0, value=float(st.session_state.deviation_threshold),
+                help="Hours where the model output deviates from the benchmark by more than this share are reported as deviations.")
+            st.session_state.soc_tolerance = st.number_input(
+                "State of Charge Tolerance [%]", min_value=0.0, value=float(st.session_state.soc_tolerance),
+                help="Tolerance of the minimum and maximum state of charge before an hour is reported as a violation.")
         else:
             st.session_state.conversion = False
         st.session_state.economic_validation = st.toggle("💵Economic Validation", value=st.session_state.economic_validation) 
-        st.session_state.energy_balance = st.toggle("⚖️Energy Balance", value=st.session_state.energy_balance)
\ No newline at end of file
+        st.session_state.energy_balance = st.toggle("⚖️Energy Balance", value=st.session_state.energy_balance)
+        if st.session_state.energy_balance:
+            st.session_state.energy_balance_tolerance = st.number_input(
+                "Energy Balance Tolerance [Wh]", min_value=0.0, value=float(st.session_state.energy_balance_tolerance),
+                help="Hours with an absolute residual of the energy balance above this value are reported as violations.")
\ No newline at end of file
@@ -1,5 +1,47 @@
 import streamlit as st
+import pandas as pd
+from config.path_manager import PathManager
 from validationtesting.gui.views.utils import initialize_session_state, generate_flow_chart
+from validationtesting.validation.conversion_losses_validation import get_conversion_stages
+
+CONVERTER_NAMES = {
+    "solar_pv": "Inverter Solar PV",
+    "wind": "Converter Wind Turbine",
+    "generator": "Rectifier Generator",
+    "battery": "Inverter Battery",
+}
+
+def efficiency_curve_editor(converter: str) -> None:
+    """
+    Display the rated power and an editable part-load efficiency curve of a converter and save the curve as CSV file.
+    """
+    st.write(f"**{CONVERTER_NAMES[converter]}**")
+    st.session_state[f"{converter}_conversion_rated_power"] = st.number_input(
+        f"Rated Power of the {CONVERTER_NAMES[converter]} [W]",
+        value=max(st.session_state[f"{converter}_conversion_rated_power"], 1.0),
+        min_value=1.0,
+        key=f"{converter}_conversion_rated_power_input",
+        help="The load of the converter is normalized with the rated power.")
+
+    project_name = st.session_state.get("project_name")
+    curve_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"conversion_efficiency_curve_{converter}.csv"
+    try:
+        df = pd.read_csv(curve_path)
+    except FileNotFoundError:
+        df = pd.DataFrame({
+            'Load [%]': [10.0, 50.0, 100.0],
+            'Efficiency (%)': [90.0, 96.0, 95.0]
+        })
+
+    edited_table = st.data_editor(
+        df,
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"{converter}_efficiency_curve_editor"
+    )
+    if st.button("Save Efficiency Curve", key=f"save_{converter}_efficiency_curve"):
+        edited_table.sort_values(by='Load [%]').to_csv(curve_path, index=False)
+        st.success("Efficiency curve saved.")
 
 
 
@@ -95,4 +137,13 @@ def conversion() -> None:
                 step=0.01,
                 help="Enter the efficiency of the inverter from DC to AC for battery.")
 
+    st.subheader("Part-Load Efficiency")
+    st.session_state.conversion_part_load_efficiency = st.checkbox(
+        "Use part-load efficiency curves",
+        value=st.session_state.conversion_part_load_efficiency,
+        help="Instead of a constant efficiency, the efficiency of each converter is interpolated from its efficiency curve on the normalized load.")
+    if st.session_state.conversion_part_load_efficiency:
+        for converter in dict.fromkeys(stage["converter"] for stage in get_conversion_stages()):
+            efficiency_curve_editor(converter)
+
     generate_flow_chart()
@@ -6,38 +6,50 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 from config.path_manager import PathManager
-import matplotlib.pyplot as plt
 import sys
 import calendar
+from functools import lru_cache
 
 from validationtesting.gui.views.utils import initialize_session_state
+from validationtesting.validation.rollups import read_rollup, read_rollup_statistics
+from validationtesting.validation.tiles import get_tile_series, get_tile_range, read_window
+from validationtesting.validation.events import read_events, count_violation_hours
+from validationtesting.validation.cycles import get_cycles_path, read_cycles
+from validationtesting.validation.run_history import list_runs, diff_runs
 
 import pandas as pd
 
-# Apply FiveThirtyEight style
-plt.style.use('fivethirtyeight')
-textwidthfraction = 0.7
-fontsize = 12 / textwidthfraction
-fontsize2 = 10 / textwidthfraction
-plt.rcParams.update({
-    "text.usetex": True,      
-    "font.family": "serif",
-    "font.size": fontsize,
-    "axes.titlesize": fontsize,
-    "axes.labelsize": fontsize,
-    "legend.fontsize": fontsize,
-    "xtick.labelsize": fontsize2,
-    "ytick.labelsize": fontsize2
-})
-
-@st.dialog("All Timestamps, where the difference between Model and Benchmark exceeds 10 percent")
-def flag_details(df, component) -> None:
-    """
-    Display the timestamps where the difference between the model and benchmark exceeds a certain threshold.
-    """
-    flagged_df = df[df['Difference Exceeds 2%']]
-    flagged_df = flagged_df.reset_index()[['Time', f'Model {component} Energy Total [Wh]', f'Benchmark {component} Energy Total [Wh]']]
-    st.write(flagged_df)
+@lru_cache(maxsize=None)
+def get_pyplot():
+    """
+    Import matplotlib and apply the plot style on first use.
+    matplotlib is only needed when plots are generated, so it is not imported with the page.
+    """
+    import matplotlib.pyplot as plt
+
+    # Apply FiveThirtyEight style
+    plt.style.use('fivethirtyeight')
+    textwidthfraction = 0.7
+    fontsize = 12 / textwidthfraction
+    fontsize2 = 10 / textwidthfraction
+    plt.rcParams.update({
+        "text.usetex": True,      
+        "font.family": "serif",
+        "font.size": fontsize,
+        "axes.titlesize": fontsize,
+        "axes.labelsize": fontsize,
+        "legend.fontsize": fontsize,
+        "xtick.labelsize": fontsize2,
+        "ytick.labelsize": fontsize2
+    })
+    return plt
+
+@st.dialog("All periods, where the difference between Model and Benchmark exceeds the deviation threshold")
+def flag_details(events) -> None:
+    """
+    Display the periods where the difference between the model and benchmark exceeds the deviation threshold.
+    """
+    st.write(events)
 
 @st.dialog("MAE Details")
 def mae_details(df) -> None:
@@ -46,14 +58,12 @@ def mae_details(df) -> None:
     """
     st.write(df)
 
-@st.dialog("All Timestamps, where the power constraints are violated")
-def power_constraints_details(df) -> None:
+@st.dialog("All periods, where the power constraints are violated")
+def power_constraints_details(events) -> None:
     """
-    Display the timestamps where the power constraints are violated.
+    Display the periods where the power constraints are violated.
     """
-    flagged_df = df[df[f"Power Constraints Total"] == False]
-
-    st.write(flagged_df)
+    st.write(events)
 
 @st.dialog("Fuel Consumption Details")
 def fuel_consumption_details(fuel_consumption_model, fuel_consumption_benchmark) -> None:
@@ -63,21 +73,19 @@ def fuel_consumption_details(fuel_consumption_model, fuel_consumption_benchmark)
     st.write(f"Model Fuel Consumption: {fuel_consumption_model}")
     st.write(f"Benchmark Fuel Consumption: {fuel_consumption_benchmark}")
 
-@st.dialog("All Timestamps, where the charge power constraints are violated")
-def charge_power_constraints_details(df) -> None:
+@st.dialog("All periods, where the charge power constraints are violated")
+def charge_power_constraints_details(events) -> None:
     """
-    Display the timestamps where the charge power constraints are violated.
+    Display the periods where the charge power constraints are violated.
     """
-    flagged_df = df[df[f"Charge Power Constraints Total"] == False]
-    st.write(flagged_df)
+    st.write(events)
 
-@st.dialog("All Timestamps, where the state of charge constraints are violated")
-def soc_constraints_details(df) -> None:
+@st.dialog("All periods, where the state of charge constraints are violated")
+def soc_constraints_details(events) -> None:
     """
-    Display the timestamps where the state of charge constraints are violated.
+    Display the periods where the state of charge constraints are violated.
     """
-    flagged_df = df[df[f"SoC Constraints Total"] == False]
-    st.write(flagged_df)
+    st.write(events)
 
 def add_lcoe_metric(component: str) -> None:
     """
@@ -92,36 +100,14 @@ def add_lcoe_metric(component: str) -> None:
     # Load data
     df = pd.read_csv(data_path, index_col='Time', parse_dates=True)
 
-def add_difference_flag(component: str) -> pd.DataFrame:
+def add_difference_flag(component: str) -> None:
     """
-    Display the number of timestamps where the difference between the model and benchmark exceeds a certain threshold.
+    Display the number of hours where the difference between the model and benchmark exceeds the deviation threshold.
     """
-    # Load project name from session state
-    project_name = st.session_state.get("project_name")
-
-    # Define file paths
-    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"combined_model_benchmark.csv"
-
-    # Load data
-    df = pd.read_csv(data_path, index_col='Time', parse_dates=True)
-
-    # Define the model and benchmark columns
-    model_col = f'Model {component} Energy Total [Wh]'
-    benchmark_col = f'Benchmark {component} Energy Total [Wh]'
-
-    if model_col not in df.columns or benchmark_col not in df.columns:
-        raise ValueError(f"Required columns for {component} are not in the dataset.")
-
-    # Calculate the percentage difference and add a new column
-    df['Difference Exceeds 2%'] = abs(df[model_col] - df[benchmark_col]) > (0.02 * df[benchmark_col])
-
-    # Save the updated DataFrame back to the file
-    updated_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"combined_model_benchmark_with_flag.csv"
-    df.to_csv(updated_data_path)
-    flag_count = df['Difference Exceeds 2%'].sum()
-    st.metric(label="Deviation exceeds 2%", value=flag_count)
+    events = read_events("combined_model_benchmark", f"{component} Deviation")
+    st.metric(label=f"Deviation exceeds {st.session_state.deviation_threshold:g}%", value=f"{count_violation_hours(events):g} h")
     if st.button(f"View details", key = f"{component}_flag_count"):
-        flag_details(df, component)
+        flag_details(events)
     return
 
 def mae_metric(component: str) -> None:
@@ -143,16 +129,10 @@ def power_constraints_metric() -> None:
     """
     Display the number of timestamps where the power constraints are violated.
     """
-    # Load project name from session state
-    project_name = st.session_state.get("project_name")
-
-    # Define file paths
-    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"generator_validation.csv"
-    df = pd.read_csv(data_path)
-    count = (df["Power Constraints Total"] == False).sum()
-    st.metric(label="Power out of boundary:", value=count)
+    events = read_events("generator_validation", "Power")
+    st.metric(label="Power out of boundary:", value=f"{count_violation_hours(events):g} h")
     if st.button(f"View details", key=f"generator_power_constraints_details"):
-        power_constraints_details(df)
+        power_constraints_details(events)
     return
 
 def fuel_consumption_metric() -> None:
@@ -177,56 +157,69 @@ def charge_power_constraints_metric() -> None:
     """
     Display the number of timestamps where the charge power constraints are violated.
     """
-    # Load project name from session state
-    project_name = st.session_state.get("project_name")
-
-    # Define file paths
-    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"battery_validation.csv"
-    df = pd.read_csv(data_path)
-    count = 0
-    count = (df["Charge Power Constraints Total"] == False).sum()
-    st.metric(label="Charge power out of boundary:", value=count)
+    events = read_events("battery_validation", "Charge Power")
+    st.metric(label="Charge power out of boundary:", value=f"{count_violation_hours(events):g} h")
     if st.button(f"View details", key=f"charge_power_constraints_details"):
-        charge_power_constraints_details(df)
+        charge_power_constraints_details(events)
     return
 
 def soc_constraints_metric() -> None:
     """
     Display the number of timestamps where the state of charge constraints are violated.
     """
-    # Load project name from session state
-    project_name = st.session_state.get("project_name")
-
-    # Define file paths
-    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"battery_validation.csv"
-    df = pd.read_csv(data_path)
-    count = (df["SoC Constraints Total"] == False).sum()
-    st.metric(label="State of Charge out of boundary:", value=count)
+    events = read_events("battery_validation", "State of Charge")
+    st.metric(label="State of Charge out of boundary:", value=f"{count_violation_hours(events):g} h")
     if st.button(f"View details", key=f"soc_constraints_details"):
-        soc_constraints_details(df)
+        soc_constraints_details(events)
     return
+
+def battery_cycles() -> None:
+    """
+    Display the equivalent full cycles per year and the histograms of the depth of discharge and the C-rate of the battery.
+    """
+    if not get_cycles_path("battery_validation", "statistics").exists():
+        st.info("Run the battery validation again to count the battery cycles.")
+        return
+    statistics = read_cycles("battery_validation", "statistics")
+    battery = st.selectbox("Battery:", statistics["Battery"].unique(), key="battery_cycles_battery")
+    statistics = statistics[statistics["Battery"] == battery].set_index("Year").drop(columns="Battery")
+    st.metric(label="Equivalent full cycles:", value=f"{statistics['Equivalent Full Cycles'].sum():.1f}")
+    st.dataframe(statistics)
+
+    year = st.selectbox("Year:", statistics.index, key="battery_cycles_year")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("Cycles per depth of discharge [%]")
+        dod = read_cycles("battery_validation", "dod_histogram", battery).set_index("Year").drop(columns="Battery")
+        st.bar_chart(dod.loc[year])
+    with col2:
+        st.write("Hours per C-rate [1/h]")
+        c_rate = read_cycles("battery_validation", "c_rate_histogram", battery).set_index("Year").drop(columns="Battery")
+        st.bar_chart(c_rate.loc[year])
+
 def plot_model_vs_benchmark(component: str) -> None:
     """
     Generate plot to compare the model and benchmark output for a given component.
     """
+    plt = get_pyplot()
     # Load project name from session state
     project_name = st.session_state.get("project_name")
 
-    # Define file paths
-    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"combined_model_benchmark.csv"
     plot_folder = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "plots"
 
-    # Load data
-    df = pd.read_csv(data_path, index_col='Time', parse_dates=True)
-
-    # Calculate hourly statistics for the entire year (Daily Pattern)
+    # The hourly statistics are read from the rollups written during the validation
     if component == "battery":
-        hourly_stats_model = df.groupby(df.index.hour)['Model battery SoC Total [%]'].agg(['mean', 'min', 'max'])
-        hourly_stats_benchmark = df.groupby(df.index.hour)['Benchmark battery SoC Total [%]'].agg(['mean', 'min', 'max'])
-
+        rollup_name = "battery_validation"
+        model_column = 'Model battery SoC Total [%]'
+        benchmark_column = 'Benchmark battery SoC Total [%]'
     else:
-        hourly_stats_model = df.groupby(df.index.hour)[f'Model {component} Energy Total [Wh]'].agg(['mean', 'min', 'max'])
-        hourly_stats_benchmark = df.groupby(df.index.hour)[f'Benchmark {component} Energy Total [Wh]'].agg(['mean', 'min', 'max'])
+        rollup_name = "combined_model_benchmark"
+        model_column = f'Model {component} Energy Total [Wh]'
+        benchmark_column = f'Benchmark {component} Energy Total [Wh]'
+
+    # Hourly statistics for the entire year (Daily Pattern)
+    hourly_stats_model = read_rollup_statistics(rollup_name, "hourly", model_column).rename(columns=str.lower)
+    hourly_stats_benchmark = read_rollup_statistics(rollup_name, "hourly", benchmark_column).rename(columns=str.lower)
 
     # Plot daily pattern
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -247,12 +240,15 @@ def plot_model_vs_benchmark(component: str) -> None:
     plt.savefig(daily_plot_path, bbox_inches='tight', facecolor="white", edgecolor="white")
     plt.close()
 
-    # Calculate monthly hourly statistics
+    # Monthly hourly statistics
+    monthly_stats_model = read_rollup_statistics(rollup_name, "month_hour", model_column).rename(columns=str.lower)
+    monthly_stats_benchmark = read_rollup_statistics(rollup_name, "month_hour", benchmark_column).rename(columns=str.lower)
     for month in range(1, 13):
         month_name = calendar.month_name[month]
-        monthly_data = df[df.index.month == month]
-        hourly_stats_model = monthly_data.groupby(monthly_data.index.hour)[f'Model {component} Energy Total [Wh]'].agg(['mean', 'min', 'max'])
-        hourly_stats_benchmark = monthly_data.groupby(monthly_data.index.hour)[f'Benchmark {component} Energy Total [Wh]'].agg(['mean', 'min', 'max'])
+        if month not in monthly_stats_model.index.get_level_values("Month"):
+            continue
+        hourly_stats_model = monthly_stats_model.xs(month, level="Month")
+        hourly_stats_benchmark = monthly_stats_benchmark.xs(month, level="Month")
 
         # Plot monthly pattern
         fig, ax = plt.subplots(figsize=(12, 6))
@@ -279,6 +275,7 @@ def plot_mae(component: str) -> None:
     """
     Generate plot to compare the model and benchmark output for a given component using Mean Absolute Error (MAE).
     """
+    plt = get_pyplot()
     # Load project name from session state
     project_name = st.session_state.get("project_name")
     granularities = ["yearly", "monthly", "hourly"]
@@ -335,21 +332,17 @@ def energy_balance_plot() -> None:
     import os
     import pandas as pd
     import numpy as np
-    import matplotlib.pyplot as plt
     from pathlib import Path
+    plt = get_pyplot()
 
-    # Load the data
+    # Load the hourly means from the rollup of the energy balance
     project_name = st.session_state.get("project_name")
-    result_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"energy_balance.csv"
-    data = pd.read_csv(result_path)
-
-    # Parse the Time column into datetime and extract the hour
-    data['Time'] = pd.to_datetime(data['Time'])
-    data['Hour'] = data['Time'].dt.hour
-    data.drop(columns=['Total Energy [Wh]'], inplace=True)
+    rollup = read_rollup("energy_balance", "hourly")
+    rollup = rollup[rollup["Series"] != 'Total Energy [Wh]']
+    data = rollup.pivot(index='Hour', columns='Series', values='Mean')[rollup["Series"].unique()]
 
     # Extract columns related to energy for renaming and averaging
-    energy_columns = data.columns[1:-1]
+    energy_columns = data.columns
 
     # Define a mapping of column names to categories and rename them
     rename_map = {
@@ -380,8 +373,8 @@ def energy_balance_plot() -> None:
     if "Consumption" in data.columns:
         data['Consumption'] *= -1
 
-    # Group by hour and calculate the average for each energy type
-    hourly_avg = data.groupby('Hour')[list(rename_map.values())].mean()
+    # Average of each energy type per hour
+    hourly_avg = data[list(rename_map.values())]
 
     # Separate positive and negative contributions
     positive_data = hourly_avg.clip(lower=0)
@@ -438,6 +431,104 @@ def energy_balance_plot() -> None:
     plt.savefig(plot_path, bbox_inches='tight', facecolor="white", edgecolor="white")
     plt.close()
 
+def selected_window(event, parameter: str) -> tuple | None:
+    """
+    Get the time window of an interval selection on the x axis of a chart, None if nothing is selected.
+    Vega returns temporal bounds as milliseconds since the epoch, the chart uses a UTC scale so they are the plotted times.
+    """
+    bounds = ((event or {}).get("selection") or {}).get(parameter, {}).get("Time")
+    if not bounds or len(bounds) != 2:
+        return None
+    start, end = (pd.to_datetime(bound, unit="ms") if isinstance(bound, (int, float)) else pd.to_datetime(bound) for bound in bounds)
+    return (start, end) if start < end else None
+
+def time_series_explorer(name: str, default_series: list = None) -> None:
+    """
+    Display an interactive chart of the hourly results, only the visible window is read from the downsampled tiles.
+    Selecting a range on the chart zooms into it and reads the range at the matching resolution, the slider selects
+    the window without the chart. All series are shown by default if no default series are given.
+    """
+    import altair as alt
+
+    try:
+        available_series = get_tile_series(name)
+    except FileNotFoundError:
+        st.info("Run the validation again to explore the hourly results.")
+        return
+
+    chart_key, zoom_key, selection_key = f"{name}_explorer_chart", f"{name}_explorer_zoom", f"{name}_explorer_selection"
+    default_series = available_series if default_series is None else default_series
+    series = st.multiselect("Series", available_series, default=[column for column in default_series if column in available_series], key=f"{name}_explorer_series")
+    first_time, last_time = get_tile_range(name)
+
+    # A new range selected on the chart becomes the zoom window, moving the slider or resetting the zoom clears it
+    selection = selected_window(st.session_state.get(chart_key), "zoom")
+    if selection is not None and selection != st.session_state.get(selection_key):
+        st.session_state[zoom_key] = (max(selection[0], first_time), min(selection[1], last_time))
+    st.session_state[selection_key] = selection
+
+    def clear_zoom() -> None:
+        st.session_state[zoom_key] = None
+
+    window = st.slider("Time window", min_value=first_time.to_pydatetime(), max_value=last_time.to_pydatetime(),
+                       value=(first_time.to_pydatetime(), last_time.to_pydatetime()), format="YYYY-MM-DD HH:mm",
+                       key=f"{name}_explorer_window", on_change=clear_zoom)
+    zoom = st.session_state.get(zoom_key)
+    if zoom is not None:
+        window = zoom
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.caption(f"Zoomed to {zoom[0]:%Y-%m-%d %H:%M} - {zoom[1]:%Y-%m-%d %H:%M}, select a range on the chart to zoom further.")
+        with col2:
+            st.button("Reset zoom", key=f"{name}_explorer_reset_zoom", on_click=clear_zoom)
+    else:
+        st.caption("Select a range on the chart to zoom in and load finer detail.")
+    if not series:
+        return
+
+    line, envelope = read_window(name, series, *window)
+    # The times are plotted on a UTC scale, so that the selected bounds are the times of the results in any browser time zone
+    line["Time"] = pd.to_datetime(line["Time"]).dt.tz_localize("UTC")
+    envelope["Time"] = pd.to_datetime(envelope["Time"]).dt.tz_localize("UTC")
+    x = alt.X("Time:T", title=None, scale=alt.Scale(type="utc"))
+    color = alt.Color("Series:N", legend=alt.Legend(orient="bottom", columns=1))
+    chart = alt.Chart(line).mark_line(strokeWidth=1).encode(x=x, y=alt.Y("Value:Q", title=None), color=color).add_params(
+        alt.selection_interval(name="zoom", encodings=["x"]))
+    if not envelope.empty:
+        band = alt.Chart(envelope).mark_area(opacity=0.2).encode(x=x, y="Min:Q", y2="Max:Q", color=color)
+        chart = band + chart
+    st.altair_chart(chart, use_container_width=True, on_select="rerun", key=chart_key)
+
+def run_history() -> None:
+    """Display the runs of the project and the differences between two runs."""
+    project_name = st.session_state.get("project_name")
+    runs = list_runs(project_name)
+    if len(runs) < 2:
+        st.info("Each technical validation run is saved, at least two runs are needed for a comparison.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        run_a = st.selectbox("Run A", runs["Run"], index=1, key="run_history_a")
+    with col2:
+        run_b = st.selectbox("Run B", runs["Run"], index=0, key="run_history_b")
+    differences = diff_runs(project_name, run_a, run_b)
+
+    parameters_tab, files_tab, metrics_tab, rollups_tab = st.tabs(["Parameters", "Files", "Metrics", "Rollups"])
+    with parameters_tab:
+        st.dataframe(differences["parameters"], hide_index=True, use_container_width=True)
+    with files_tab:
+        st.dataframe(pd.concat([
+            differences["inputs"].assign(Folder="inputs"), differences["results"].assign(Folder="results")
+        ], ignore_index=True), hide_index=True, use_container_width=True)
+    with metrics_tab:
+        metrics = differences["metrics"]
+        st.dataframe(metrics[metrics["value Delta"] != 0], hide_index=True, use_container_width=True)
+    with rollups_tab:
+        rollups = differences["rollups"]
+        level = st.selectbox("Level", ["yearly", "monthly", "hourly", "month_hour", "daily"], key="run_history_level")
+        st.dataframe(rollups[rollups["level"] == level], hide_index=True, use_container_width=True)
+
 def solar_pv_generate_plots() -> None:
     """
     Generate plots for the solar PV component.
@@ -512,7 +603,25 @@ def results() -> None:
             charge_power_constraints_metric()
         with col2:
             soc_constraints_metric()
+        st.subheader("Cycles")
+        battery_cycles()
     
+    # Explore the hourly results
+    st.subheader("Explorer")
+    if results_component == "Energy Balance":
+        time_series_explorer("energy_balance")
+    elif results_component in ["Solar PV", "Wind"]:
+        component = "solar_pv" if results_component == "Solar PV" else "wind"
+        time_series_explorer("combined_model_benchmark", [f"Model {component} Energy Total [Wh]", f"Benchmark {component} Energy Total [Wh]"])
+    elif results_component == "Generator":
+        time_series_explorer("generator_validation", ["Model generator Energy Total [Wh]", "Benchmark Fuel Consumption generator Total [l]"])
+    elif results_component == "Battery":
+        time_series_explorer("battery_validation", ["Model battery SoC Total [%]", "Benchmark battery SoC Total [%]"])
+
+    # Compare the runs of the project
+    st.subheader("Run History")
+    run_history()
+
     # Show Plots
     if results_component in ["Solar PV", "Wind", "Energy Balance"]:
         st.subheader("Plots")
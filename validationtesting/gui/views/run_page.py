@@ -4,6 +4,7 @@ The user can run the validation testing for the selected components.
 """
 
 import streamlit as st
+import pandas as pd
 from io import StringIO
 import logging
 
@@ -11,15 +12,57 @@ from pathlib import Path
 from datetime import datetime
 
 from validationtesting.validation.parameters import ProjectParameters
-from validationtesting.validation.benchmark import Benchmark
-from validationtesting.validation.error_calculation import ERROR
-from validationtesting.validation.battery_validation import battery_validation_testing
-from validationtesting.validation.generator_validation import generator_validation_testing
-from validationtesting.validation.conversion_losses_validation import conversion_losses_validation
-from validationtesting.validation.cost_validation import cost_validation
-from validationtesting.validation.energy_balance_validation import energy_balance_validation
+from validationtesting.gui.views.utils import float_list_input
+from validationtesting.utils.lazy_import import load_attribute
+from validationtesting.validation.out_of_core import EXECUTION_ENGINES
+from validationtesting.validation.pipeline import TECHNICAL_STAGES, plan_stages, complete_stage
 from config.path_manager import PathManager
 
+# Validation stages are imported when they are first run, so that opening the page does not load all validators
+VALIDATION_STAGES = {
+    "benchmark": ("validationtesting.validation.benchmark", "Benchmark"),
+    "error_calculation": ("validationtesting.validation.error_calculation", "ERROR"),
+    "battery": ("validationtesting.validation.battery_validation", "battery_validation_testing"),
+    "generator": ("validationtesting.validation.generator_validation", "generator_validation_testing"),
+    "conversion": ("validationtesting.validation.conversion_losses_validation", "conversion_losses_validation"),
+    "energy_balance": ("validationtesting.validation.energy_balance_validation", "energy_balance_validation"),
+    "cost": ("validationtesting.validation.cost_validation", "cost_validation"),
+    "cost_sensitivity": ("validationtesting.validation.cost_sensitivity", "cost_sensitivity_validation"),
+    "results_store": ("validationtesting.validation.results_store", "record_run"),
+    "run_history": ("validationtesting.validation.run_history", "save_run"),
+}
+
+def load_stage(stage: str):
+    """Import a validation stage on first use."""
+    return load_attribute(*VALIDATION_STAGES[stage])
+
+def stage_progress_steps(stage: str) -> int:
+    """Number of progress steps of a stage, the benchmark has one step per resource and the error calculation none."""
+    if stage == "benchmark":
+        return int(bool(st.session_state.solar_pv)) + int(bool(st.session_state.wind))
+    if stage == "error_calculation":
+        return 0
+    return 1
+
+def run_stages(stages: list) -> list:
+    """Run the given stages without progress bar, stages whose inputs did not change are reused."""
+    plan = plan_stages(stages, force=st.session_state.get("recompute_all_stages", False))
+    for stage_plan in plan:
+        if not stage_plan.reused:
+            stage_plan.stage.load()()
+            complete_stage(stage_plan)
+    return plan
+
+def show_stage_status(plan: list) -> None:
+    """Show which stages were recomputed and which were reused from the last run."""
+    reused = [stage_plan.stage.label for stage_plan in plan if stage_plan.reused]
+    if reused:
+        st.info(f"Reused unchanged results of: {', '.join(reused)}")
+    st.dataframe(pd.DataFrame({
+        "Stage": [stage_plan.stage.label for stage_plan in plan],
+        "Status": ["Reused" if stage_plan.reused else "Recomputed" for stage_plan in plan],
+    }), hide_index=True)
+
 def setup_logging(log_file_path: Path) -> StringIO:
     """
     Function to set up logging to both a file and StringIO stream.
@@ -90,6 +133,16 @@ def run_model() -> None:
                 
         """)
 
+        st.session_state.execution_engine = st.selectbox(
+            "Execution Engine",
+            EXECUTION_ENGINES,
+            index=EXECUTION_ENGINES.index(st.session_state.get("execution_engine", EXECUTION_ENGINES[0])),
+            help="The out-of-core engine stores the hourly tables in yearly partitions and only holds one year in memory, "
+                 "use it for very long or very wide projects.")
+
+        st.checkbox("Recompute all stages", key="recompute_all_stages",
+                    help="By default only the stages whose parameters, input files or upstream results changed are recomputed.")
+
         # Run technical validation button
         if st.button("Start Technical Validation"):
             with st.spinner('Calculating benchmarks and checking for boundary exceedances...'):
@@ -114,39 +167,27 @@ def run_model() -> None:
 
                 # Create a log file path
                 start_time = datetime.now()
-                # Run technical validation for all components
-                if st.session_state.solar_pv or st.session_state.wind:
-                    Benchmark(component_text, progress_bar, progress_step, progress)
-                    if st.session_state.solar_pv:
-                        progress += progress_step
-                    if st.session_state.wind:
-                        progress += progress_step
-                    ERROR()
-                if st.session_state.battery:
-                    component_text.text("Battery")
-                    battery_validation_testing()
-                    progress += progress_step
-                    progress_bar.progress(progress)
-                if st.session_state.generator:
-                    component_text.text("Generator")
-                    generator_validation_testing()
-                    progress += progress_step
-                    progress_bar.progress(progress)
-                if st.session_state.conversion:
-                    component_text.text("Conversion Losses")
-                    conversion_losses_validation()
-                    progress += progress_step
-                    progress_bar.progress(progress)
-                
-                if st.session_state.energy_balance:
-                    component_text.text("Energy Balance")
-                    energy_balance_validation()
-                    progress += progress_step
-                    progress_bar.progress(progress)
+                # Run the technical validation stages whose inputs changed since their last run
+                plan = plan_stages(TECHNICAL_STAGES, force=st.session_state.get("recompute_all_stages", False))
+                for stage_plan in plan:
+                    stage = stage_plan.stage
+                    if not stage_plan.reused:
+                        component_text.text(stage.label)
+                        if stage.name == "benchmark":
+                            stage.load()(component_text, progress_bar, progress_step, progress)
+                        else:
+                            stage.load()()
+                        complete_stage(stage_plan)
+                    progress += progress_step * stage_progress_steps(stage.name)
+                    progress_bar.progress(min(progress, 1.0))
                 progress_bar.progress(1)
                 end_time = datetime.now()
                 calculation_time = end_time - start_time
-                st.success(f"Technical Validation Complete, Calculation Time = {calculation_time.total_seconds()} seconds")
+                # Write the results to the database of all projects for cross-project queries
+                load_stage("results_store")(project_name, st.session_state, calculation_time=calculation_time.total_seconds())
+                run_id = load_stage("run_history")(project_name)
+                st.success(f"Technical Validation Complete (Run {run_id}), Calculation Time = {calculation_time.total_seconds()} seconds")
+                show_stage_status(plan)
 
     # Economic validation
     if st.session_state.economic_validation:
@@ -161,7 +202,32 @@ def run_model() -> None:
             with st.spinner('Calculating benchmarks...'):
                 # Create a log file path
                 start_time = datetime.now()
-                cost_validation()
+                plan = run_stages(["cost"])
+                end_time = datetime.now()
+                calculation_time = end_time - start_time
+                st.success(f"Economic Validation Complete, Calculation Time = {calculation_time.total_seconds()} seconds")
+                show_stage_status(plan)
+
+        # Sensitivity analysis of the discounted cost
+        st.write("Sensitivity Analysis:")
+        with st.expander("Sensitivity Grids", expanded=False):
+            st.session_state.sensitivity_discount_rates = float_list_input(
+                "Discount Rates [%]",
+                st.session_state.sensitivity_discount_rates,
+                help="All combinations of the discount rates and multipliers are evaluated.")
+            st.session_state.sensitivity_investment_cost_multipliers = float_list_input(
+                "Investment Cost Multipliers",
+                st.session_state.sensitivity_investment_cost_multipliers)
+            if st.session_state.generator:
+                st.session_state.sensitivity_fuel_price_multipliers = float_list_input(
+                    "Fuel Price Multipliers",
+                    st.session_state.sensitivity_fuel_price_multipliers)
+
+        if st.button("Start Sensitivity Analysis"):
+            with st.spinner('Calculating sensitivities...'):
+                start_time = datetime.now()
+                plan = run_stages(["cost_sensitivity"])
                 end_time = datetime.now()
                 calculation_time = end_time - start_time
-                st.success(f"Economic Validation Complete, Calculation Time = {calculation_time.total_seconds()} seconds")
\ No newline at end of file
+                st.success(f"Sensitivity Analysis Complete, Calculation Time = {calculation_time.total_seconds()} seconds")
+                show_stage_status(plan)
@@ -6,6 +6,7 @@ import streamlit as st
 import pandas as pd
 from config.path_manager import PathManager
 from validationtesting.gui.views.utils import initialize_session_state, csv_upload_interface, time_format_selectors, load_csv_data, load_timeseries_csv
+from validationtesting.validation.conversion_losses_validation import get_conversion_stages
 import numpy as np
     
 def save_data(resource_data: pd.DataFrame, project_name: str) -> None:
@@ -41,69 +42,22 @@ def upload_conversion_losses() -> None:
                 time_data = load_timeseries_csv(uploaded_file, delimiter, decimal, time_format)
             with st.expander(f"Data", expanded=False):
                 data_dict = {}
-                if st.session_state.solar_pv and st.session_state.solar_pv_connection_type == "Connected with a seperate Inverter to the Microgrid":
+                for stage in get_conversion_stages():
+                    system = stage["name"]
                     col1, col2 = st.columns(2)
                     with col1:
-                        solar_pv_losses = load_csv_data(uploaded_file, delimiter, decimal, f'Solar PV Conversion Losses [Wh]')
+                        system_losses = load_csv_data(uploaded_file, delimiter, decimal, f'{system} Conversion Losses [Wh]')
                     with col2:
                         energy_unit = st.selectbox(
                             f"Select the unit of the output:",
-                            ['Wh', 'kWh', 'MWh']
-                        ) 
-                    if energy_unit == 'kWh':
-                        solar_pv_losses = solar_pv_losses * 1e3
-                    elif energy_unit == 'MWh':
-                        solar_pv_losses = solar_pv_losses * 1e6
-                    data_dict[f'solar_pv Conversion Losses [Wh]'] = solar_pv_losses.values.flatten() if solar_pv_losses is not None else None
-                
-                if st.session_state.wind and st.session_state.wind_connection_type == "Connected with a AC-AC Converter to the Microgrid":
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        wind_losses = load_csv_data(uploaded_file, delimiter, decimal, f'Wind Conversion Losses [Wh]')
-                    with col2:
-                        energy_unit = st.selectbox(
-                            f"Select the unit of the output:",
-                            ['Wh', 'kWh', 'MWh']
-                        ) 
-                    if energy_unit == 'kWh':
-                        wind_losses = wind_losses * 1e3
-                    elif energy_unit == 'MWh':
-                        wind_losses = wind_losses * 1e6
-                    data_dict[f'wind Conversion Losses [Wh]'] = wind_losses.values.flatten() if wind_losses is not None else None
-                
-                if st.session_state.generator and st.session_state.current_type == "Direct Current":
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        generator_losses = load_csv_data(uploaded_file, delimiter, decimal, f'Generator Conversion Losses [Wh]')
-                    with col2:
-                        energy_unit = st.selectbox(
-                            f"Select the unit of the output:",
-                            ['Wh', 'kWh', 'MWh']
-                        )
-                    if energy_unit == 'kWh':
-                        generator_losses = generator_losses * 1e3
-                    elif energy_unit == 'MWh':
-                        generator_losses = generator_losses * 1e6
-                    data_dict[f'generator Conversion Losses [Wh]'] = generator_losses.values.flatten() if generator_losses is not None else None
-                
-                if st.session_state.battery and st.session_state.current_type == "Alternating Current":
-                    if st.session_state.solar_pv and st.session_state.solar_pv_connection_type == "Connected with the same Inverter as the Battery to the Microgrid":
-                        system = "DC System"
-                    else:
-                        system = "battery"
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        battery_losses = load_csv_data(uploaded_file, delimiter, decimal, f'{system} Conversion Losses [Wh]')
-                    with col2:
-                        energy_unit = st.selectbox(
-                            f"Select the unit of the output:",
-                            ['Wh', 'kWh', 'MWh']
+                            ['Wh', 'kWh', 'MWh'],
+                            key=f"{system}_conversion_losses_unit"
                         )
                     if energy_unit == 'kWh':
-                        battery_losses = battery_losses * 1e3
+                        system_losses = system_losses * 1e3
                     elif energy_unit == 'MWh':
-                        battery_losses = battery_losses * 1e6
-                    data_dict[f'{system} Conversion Losses [Wh]'] = battery_losses.values.flatten() if battery_losses is not None else None
+                        system_losses = system_losses * 1e6
+                    data_dict[f'{system} Conversion Losses [Wh]'] = system_losses.values.flatten() if system_losses is not None else None
 
 
                 # Combine all data into a DataFrame if time data and data dictionary are available
@@ -7,12 +7,36 @@ import pandas as pd
 from config.path_manager import PathManager
 from validationtesting.gui.views.utils import initialize_session_state, csv_upload_interface, time_format_selectors, load_csv_data, load_timeseries_csv
 import numpy as np
+import tempfile
+from pathlib import Path
     
 def save_data(resource_data: pd.DataFrame, project_name: str, resource_name: str) -> None:
     """Save the resource data to a CSV file."""    
     project_folder_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_{resource_name}.csv"
     resource_data.to_csv(project_folder_path, index=False)
 
+def import_model_export(resource) -> None:
+    """Import the model output of all components from the native export of an energy system model."""
+    from validationtesting.importers.registry import PLUGINS, load_importer, import_file
+
+    with st.expander("Import from an energy model export", expanded=False):
+        plugins = {entry.label: entry for entry in PLUGINS.values() if entry.name != "csv"}
+        entry = plugins[st.selectbox("Select the model:", list(plugins), key=f"import_{resource}_model")]
+        uploaded_file = st.file_uploader("Choose an export file", type=[extension.lstrip(".") for extension in entry.extensions], key=f"import_{resource}_uploader")
+        if uploaded_file and st.button("Import Data", key=f"import_{resource}_button"):
+            project_name = st.session_state.get("project_name")
+            inputs_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs"
+            with tempfile.TemporaryDirectory(dir=inputs_path) as temporary_folder:
+                export_path = Path(temporary_folder) / uploaded_file.name
+                export_path.write_bytes(uploaded_file.getbuffer())
+                components = import_file(project_name, export_path, load_importer(entry.name))
+            for component in components:
+                if f'{component}_data_uploaded' in st.session_state:
+                    st.session_state[f'{component}_data_uploaded'] = True
+            if resource not in components:
+                st.warning(f"The export has no {resource} output, imported: {', '.join(components) or 'nothing'}")
+            else:
+                st.rerun()
 
 def upload_model_output(resource) -> None:
     """Streamlit page for uploading the model's output data."""
@@ -37,6 +61,7 @@ def upload_model_output(resource) -> None:
 
     # Upload interface
     else:
+        import_model_export(resource)
         uploaded_file, delimiter, decimal = csv_upload_interface(f"energy_production_{resource}")
         if uploaded_file:
             # Select Time column
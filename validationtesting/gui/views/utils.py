@@ -5,6 +5,7 @@ It also includes functions to initialize session state variables, create an inte
 """
 
 import base64
+import hashlib
 import streamlit as st
 import pytz
 import re
@@ -17,6 +18,7 @@ from pathlib import Path
 from PIL import Image
 
 from config.path_manager import PathManager
+from validationtesting.utils.time_utils import to_utc
 
 
 
@@ -222,26 +224,75 @@ def convert_dates_to_utc(dates: list[dt.datetime], timezone_str: str) -> list[dt
     """
     Convert a list of dates to UTC using the provided timezone.
     """
-    # Load the timezone
-    local_tz = pytz.timezone(timezone_str)
-
-    # Convert each date to UTC
-    dates_utc = []
-    for date in dates:
-        if isinstance(date, dt.datetime):
-            # Localize the date to the selected timezone and convert to UTC
-            localized_date = local_tz.localize(date)
-            utc_date = localized_date.astimezone(pytz.UTC).replace(tzinfo=None)
-            dates_utc.append(utc_date)
-        else:
-            dates_utc.append(None)  # Handle cases where date is not provided
+    # Convert all dates at once, cases where a date is not provided stay None
+    valid = [isinstance(date, dt.datetime) for date in dates]
+    dates_utc = iter(to_utc([date for date, is_valid in zip(dates, valid) if is_valid], timezone_str).to_pydatetime())
+    return [next(dates_utc) if is_valid else None for is_valid in valid]
 
-    return dates_utc
+def float_list_input(label: str, values: list, help: str = None) -> list:
+    """
+    Create a text input for a comma separated list of numbers.
+    Returns the previous values if the input cannot be parsed.
+    """
+    text = st.text_input(label, value=", ".join(str(value) for value in values), help=help)
+    try:
+        parsed_values = [float(value) for value in text.split(",") if value.strip()]
+    except ValueError:
+        st.error(f"Could not parse '{text}'. Please enter numbers separated by commas.")
+        return values
+    if not parsed_values:
+        st.error("Please enter at least one value.")
+        return values
+    return parsed_values
 
 def combine_date_and_time(date_value: dt.date) -> dt.datetime:
     """Combine date and time into a datetime object."""
     return dt.datetime.combine(date_value, dt.time(0, 0))
 
+# Number of parsed uploads kept in the session state
+UPLOAD_CACHE_SIZE = 4
+
+def parse_csv(file, delimiter: str, decimal: str) -> pd.DataFrame:
+    """Parse a CSV file with the pyarrow engine if it supports the options, otherwise with the default engine."""
+    try:
+        file.seek(0)
+        return pd.read_csv(file, delimiter=delimiter, decimal=decimal, engine="pyarrow")
+    except (ImportError, ValueError):
+        file.seek(0)
+        return pd.read_csv(file, delimiter=delimiter, decimal=decimal)
+
+def read_uploaded_csv(uploaded_file, delimiter: str, decimal: str, numeric: bool = False) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV file only once for each content, delimiter and decimal separator.
+    The parsed data is cached in the session state keyed by the hash of the file content,
+    so that the column pickers, the unit conversion and the save on every rerun reuse the same data.
+    The numeric version of the data is converted once on first use. The cached data must not be modified in place.
+    """
+    content_hashes = st.session_state.setdefault("uploaded_csv_hashes", {})
+    file_id = getattr(uploaded_file, "file_id", None)
+    content_hash = content_hashes.get(file_id) if file_id is not None else None
+    if content_hash is None:
+        content_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        if file_id is not None:
+            content_hashes[file_id] = content_hash
+
+    cache = st.session_state.setdefault("uploaded_csv_cache", {})
+    key = (content_hash, delimiter, decimal)
+    if key not in cache:
+        while len(cache) >= UPLOAD_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[key] = {"data": parse_csv(uploaded_file, delimiter, decimal), "numeric": None}
+    entry = cache[key]
+    if not numeric:
+        return entry["data"]
+    if entry["numeric"] is None:
+        numeric_data = entry["data"].apply(pd.to_numeric, errors='coerce')
+        # Timestamps detected by the pyarrow engine are not numeric values, like timestamp strings of the default engine
+        for column in entry["data"].select_dtypes(include=["datetime", "datetimetz"]).columns:
+            numeric_data[column] = float("nan")
+        entry["numeric"] = numeric_data
+    return entry["numeric"]
+
 def load_csv_data(uploaded_file, delimiter: str, decimal: str, parameter: str) -> pd.DataFrame:
     """
     Load CSV data with given delimiter and decimal options.
@@ -256,13 +307,13 @@ def load_csv_data(uploaded_file, delimiter: str, decimal: str, parameter: str) -
         Optional[pd.DataFrame]: The loaded DataFrame or None if an error occurred.
     """
     try:
-        uploaded_file.seek(0)
-        data = pd.read_csv(uploaded_file, delimiter=delimiter, decimal=decimal)
-        data = data.apply(pd.to_numeric, errors='coerce')
+        data = read_uploaded_csv(uploaded_file, delimiter, decimal, numeric=True)
         
         if len(data.columns) > 1:
             selected_column = st.selectbox(f"Select the column representing {parameter}", data.columns)
             data = data[[selected_column]]
+        else:
+            data = data.copy()
         
         data.index = range(1, len(data) + 1)
         data.index.name = 'Periods'
@@ -295,8 +346,7 @@ def load_timeseries_csv(uploaded_file, delimiter: str, decimal: str, time_format
         Optional[pd.DataFrame]: The loaded DataFrame with time or None if an error occurred.
     """
     try:
-        uploaded_file.seek(0)
-        data = pd.read_csv(uploaded_file, delimiter=delimiter, decimal=decimal)
+        data = read_uploaded_csv(uploaded_file, delimiter, decimal)
         
         if data.empty:
             st.warning("No data found in the CSV file. Please check the file.")
@@ -307,12 +357,10 @@ def load_timeseries_csv(uploaded_file, delimiter: str, decimal: str, time_format
         
         # Convert the time column to datetime using the provided format and time zone
         try:
-            data[time_column] = pd.to_datetime(data[time_column], format=time_format, errors='coerce')
+            time = pd.to_datetime(data[time_column], format=time_format, errors='coerce')
         except ValueError as e:
             st.error(f"Error in parsing time column: {e}")
             return None
-        
-        time = data[time_column]
 
         if time.empty:
             st.warning("No valid time series data found. Please check the CSV file.")
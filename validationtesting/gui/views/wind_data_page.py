@@ -8,13 +8,14 @@ import pandas as pd
 from config.path_manager import PathManager
 from validationtesting.gui.views.utils import initialize_session_state, csv_upload_interface, time_format_selectors, load_csv_data, load_timeseries_csv
 import datetime as dt
-import requests
+from validationtesting.utils.time_utils import get_timezone, normalize_year
 
 def download_pvgis_wind_data(lat, lon, timezone) -> pd.DataFrame:
     """Download wind data from PVGIS API."""
     URL = 'https://re.jrc.ec.europa.eu/api/tmy?lat=' + str(lat) + '&lon=' + str(lon) + '&outputformat=json'
 
-    # Make the request
+    # Make the request, requests is only imported when data is downloaded
+    import requests
     response = requests.get(URL)
 
     # Check the response status
@@ -35,8 +36,8 @@ def download_pvgis_wind_data(lat, lon, timezone) -> pd.DataFrame:
     # Convert 'UTC Time' column to 'MM-DD HH:MM' format
     tmy_df['UTC Time'] = pd.to_datetime(tmy_df['UTC Time'], format='%Y%m%d:%H%M')
     # Force all dates to 2023 to remove leap year issues
-    tmy_df['UTC Time'] = tmy_df['UTC Time'].apply(lambda x: x.replace(year=2023))
-    tmy_df['UTC Time'] = tmy_df['UTC Time'].dt.tz_localize('UTC').dt.tz_convert(timezone).dt.strftime('%m-%d %H:%M')
+    tmy_df['UTC Time'] = normalize_year(tmy_df['UTC Time'], 2023)
+    tmy_df['UTC Time'] = tmy_df['UTC Time'].dt.tz_localize('UTC').dt.tz_convert(get_timezone(timezone)).dt.strftime('%m-%d %H:%M')
     tmy_df.rename(columns={'UTC Time': 'Time'}, inplace=True)
 
     return tmy_df
@@ -0,0 +1,37 @@
+"""
+This module is used to import model output from CSV files with a custom layout into the model output files of a project.
+The columns of each component are given by name, the file is read in chunks.
+"""
+
+import re
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+from validationtesting.importers.registry import ColumnRule, ImporterPlugin
+
+class CustomCSVImporter(ImporterPlugin):
+    """
+    Importer of CSV files with a custom layout.
+    columns gives the columns of each component, either the energy column or a mapping of the quantities energy,
+    curtailment and fuel to their columns, e.g. {"generator": {"energy": "Genset", "fuel": "Diesel"}}.
+    The unit applies to the energy and curtailment columns, it is taken from the headers if not given. Fuel is in litres.
+    """
+    name = "csv"
+    label = "Custom CSV"
+
+    def __init__(self, columns: dict, time_column: str = "Time", time_format: str = None, delimiter: str = ",",
+                 decimal: str = ".", unit: str = None) -> None:
+        self.time_column = time_column
+        self.time_format = time_format
+        self.delimiter = delimiter
+        self.decimal = decimal
+        self.rules = tuple(
+            ColumnRule(component, f"^{re.escape(column)}$", quantity, "l" if quantity == "fuel" else unit)
+            for component, quantities in columns.items()
+            for quantity, column in (quantities.items() if isinstance(quantities, dict) else [("energy", quantities)])
+        )
+
+    def read_chunks(self, path: Path, chunk_size: int, start_time=None) -> Iterator[pd.DataFrame]:
+        for chunk in pd.read_csv(path, delimiter=self.delimiter, decimal=self.decimal, chunksize=chunk_size):
+            chunk.insert(0, "Time", pd.to_datetime(chunk.pop(self.time_column), format=self.time_format))
+            yield chunk
@@ -0,0 +1,49 @@
+"""
+This module is used to import the time series export of HOMER into the model output files of a project.
+HOMER exports one CSV file with a Time column and one column per output, the unit is the last word of each header,
+e.g. "Generic flat plate PV Power Output kW". The powers are converted to the energy of each time step. HOMER simulates
+a generic year, so the time stamps are moved to the start of the project unless align_to_start is turned off.
+"""
+
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+from validationtesting.importers.registry import ColumnRule, ImporterPlugin
+
+HOMER_RULES = (
+    ColumnRule("solar_pv", r"PV.*Power Output"),
+    ColumnRule("wind", r"(Wind|Turbine|^G\d+|^XL\d+).*Power Output"),
+    ColumnRule("generator", r"(Genset|Generator|Diesel).*Power Output"),
+    ColumnRule("generator", r"(Genset|Generator|Diesel).*Fuel Consumption", quantity="fuel"),
+    ColumnRule("battery", r"Discharge Power"),
+    ColumnRule("battery", r"(?<!Dis)Charge Power", sign=-1.0),
+    ColumnRule("consumption", r"^(AC|DC) Primary Load(?! Served)"),
+)
+
+class HomerImporter(ImporterPlugin):
+    """
+    Importer of the HOMER time series exports.
+    The excess electrical production of HOMER is assigned as curtailment to curtailment_component if given.
+    """
+    name = "homer"
+    label = "HOMER Time Series"
+
+    def __init__(self, time_format: str = None, delimiter: str = ",", decimal: str = ".", curtailment_component: str = None,
+                 align_to_start: bool = True) -> None:
+        self.time_format = time_format
+        self.delimiter = delimiter
+        self.decimal = decimal
+        self.align_to_start = align_to_start
+        self.rules = HOMER_RULES
+        if curtailment_component is not None:
+            self.rules += (ColumnRule(curtailment_component, r"^Excess Electrical Production", quantity="curtailment"),)
+
+    def read_chunks(self, path: Path, chunk_size: int, start_time=None) -> Iterator[pd.DataFrame]:
+        offset = None
+        for chunk in pd.read_csv(path, delimiter=self.delimiter, decimal=self.decimal, chunksize=chunk_size):
+            chunk.columns = chunk.columns.str.strip()
+            chunk["Time"] = pd.to_datetime(chunk["Time"], format=self.time_format)
+            if offset is None:
+                offset = pd.Timestamp(start_time) - chunk["Time"].iloc[0] if self.align_to_start and start_time is not None else pd.Timedelta(0)
+            chunk["Time"] = chunk["Time"] + offset
+            yield chunk
@@ -0,0 +1,135 @@
+"""
+This module is used to import the energy balance results of MicroGridsPy into the model output files of a project.
+MicroGridsPy writes one workbook per scenario with one "Year N" sheet per year of the project. The workbook is opened
+once, with calamine if it is installed and otherwise with the read-only mode of openpyxl, and each year sheet is imported
+as one chunk by the importer registry. The hourly time axis is built with one date range; MicroGridsPy models 8760 hours
+per year, so the 29th of February is skipped. The workbooks of several scenarios are imported in parallel, each into its
+own project.
+
+Usage:
+    python -m validationtesting.importers.microgridspy WORKBOOK [WORKBOOK ...] --project PROJECT [--start "2022-01-01 00:00"]
+"""
+
+import argparse
+import importlib.util
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+from validationtesting.importers.registry import ColumnRule, ImporterPlugin, import_file, project_start_time
+
+YEAR_SHEET = re.compile(r"^Year\s*(\d+)$")
+SCENARIO_NAME = re.compile(r"Scenario\s*(\d+)")
+
+MICROGRIDSPY_RULES = (
+    ColumnRule("solar_pv", r"^(Solar|PV).*Production"),
+    ColumnRule("wind", r"^Wind.*Production"),
+    ColumnRule("generator", r"^(?!.*Fuel).*(Generator|Genset|Diesel).*Production"),
+    ColumnRule("generator", r"Fuel Consumption", quantity="fuel", unit="l"),
+    ColumnRule("battery", r"^Battery Outflow"),
+    ColumnRule("battery", r"^Battery Inflow", sign=-1.0),
+    ColumnRule("consumption", r"^Electric Demand"),
+)
+
+def excel_engine() -> str:
+    """Get the fastest installed engine to read the workbooks."""
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+def year_sheets(workbook: pd.ExcelFile) -> list:
+    """Get the year sheets of a workbook in the order of the years."""
+    sheets = sorted(
+        (sheet for sheet in workbook.sheet_names if YEAR_SHEET.match(str(sheet))),
+        key=lambda sheet: int(YEAR_SHEET.match(sheet).group(1)),
+    )
+    if not sheets:
+        raise ValueError(f"{workbook.io} has no year sheets.")
+    return sheets
+
+def read_energy_balance(workbook_path: Path) -> pd.DataFrame:
+    """Read all year sheets of a MicroGridsPy energy balance workbook in one pass, in the order of the years."""
+    with pd.ExcelFile(workbook_path, engine=excel_engine()) as workbook:
+        sheets = year_sheets(workbook)
+        data = pd.read_excel(workbook, sheet_name=sheets)
+    return pd.concat([data[sheet] for sheet in sheets], ignore_index=True)
+
+def hourly_time_axis(start_time, periods: int) -> pd.DatetimeIndex:
+    """Get an hourly time axis with the given number of hours that skips the 29th of February."""
+    start_time = pd.Timestamp(start_time)
+    # Each leap day removes 24 hours, so one extra day per four years (and one for a partial period) is enough
+    extra_hours = 24 * (periods // (4 * 8760) + 2)
+    time_axis = pd.date_range(start_time, periods=periods + extra_hours, freq="h")
+    time_axis = time_axis[~((time_axis.month == 2) & (time_axis.day == 29))]
+    return pd.DatetimeIndex(time_axis[:periods], name="Time")
+
+class MicroGridsPyImporter(ImporterPlugin):
+    """
+    Importer of the MicroGridsPy energy balance workbooks, each year sheet is one chunk.
+    The curtailment of MicroGridsPy is not split by technology, it is assigned to curtailment_component if given.
+    """
+    name = "microgridspy"
+    label = "MicroGridsPy"
+
+    def __init__(self, curtailment_component: str = None) -> None:
+        self.rules = MICROGRIDSPY_RULES
+        if curtailment_component is not None:
+            self.rules += (ColumnRule(curtailment_component, r"^Curtailment", quantity="curtailment"),)
+
+    def read_chunks(self, path: Path, chunk_size: int, start_time=None) -> Iterator[pd.DataFrame]:
+        if start_time is None:
+            raise ValueError("MicroGridsPy workbooks have no time stamps, the start time of the project is required.")
+        hours = 0
+        with pd.ExcelFile(path, engine=excel_engine()) as workbook:
+            for sheet in year_sheets(workbook):
+                chunk = pd.read_excel(workbook, sheet_name=sheet)
+                # The time axis is built up to the end of the sheet, so it continues across the years
+                chunk.insert(0, "Time", hourly_time_axis(start_time, hours + len(chunk))[hours:])
+                hours += len(chunk)
+                yield chunk
+
+def import_workbook(workbook_path: Path, project_name: str, start_time=None, curtailment_component: str = None) -> list:
+    """
+    Import a MicroGridsPy energy balance workbook into the model output files of a project.
+    If no start time is given, the start date of the project is used. Returns the imported components.
+    """
+    return import_file(project_name, workbook_path, MicroGridsPyImporter(curtailment_component), start_time=start_time)
+
+def scenario_project_name(project_name: str, workbook_path: Path) -> str:
+    """Name of the project of a scenario workbook, e.g. PROJECT_scenario_2 for "Energy Balance - Scenario 2.xlsx"."""
+    scenario = SCENARIO_NAME.search(Path(workbook_path).stem)
+    return f"{project_name}_scenario_{scenario.group(1)}" if scenario else f"{project_name}_{Path(workbook_path).stem}"
+
+def import_scenarios(workbook_paths: list, project_name: str, start_time=None, curtailment_component: str = None, workers: int = None) -> dict:
+    """
+    Import the workbooks of several scenarios in parallel, each into its own project.
+    A single workbook is imported into the given project. Returns the imported components by project.
+    """
+    if len(workbook_paths) == 1:
+        return {project_name: import_workbook(workbook_paths[0], project_name, start_time, curtailment_component)}
+    project_names = [scenario_project_name(project_name, workbook_path) for workbook_path in workbook_paths]
+    if start_time is None:
+        start_time = project_start_time(project_name)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            scenario_project: executor.submit(import_workbook, workbook_path, scenario_project, start_time, curtailment_component)
+            for scenario_project, workbook_path in zip(project_names, workbook_paths)
+        }
+        return {scenario_project: future.result() for scenario_project, future in futures.items()}
+
+def main(arguments: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Import MicroGridsPy energy balance workbooks into the model output files of a project.")
+    parser.add_argument("workbooks", nargs="+", type=Path, help="Energy balance workbooks, one per scenario.")
+    parser.add_argument("--project", required=True, help="Name of the project, scenarios are imported into PROJECT_scenario_N.")
+    parser.add_argument("--start", default=None, help="Time of the first hour, the start date of the project by default.")
+    parser.add_argument("--curtailment", default=None, help="Component the curtailment of MicroGridsPy is assigned to.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of workbooks imported at the same time.")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    imported = import_scenarios(args.workbooks, args.project, args.start, args.curtailment, args.workers)
+    for project_name, components in imported.items():
+        print(f"{project_name}: {', '.join(components) or 'no components found'}")
+
+if __name__ == "__main__":
+    main()
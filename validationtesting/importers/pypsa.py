@@ -0,0 +1,99 @@
+"""
+This module is used to import a solved PyPSA network exported to netCDF into the model output files of a project.
+The dispatch of the generators, storage units, stores and loads is read in slices of snapshots, so only one slice is
+in memory at a time. Generators and storage are mapped to the components by their carrier, all loads are consumption.
+The curtailment of solar PV and wind is the available power of a generator minus its dispatch. PyPSA powers are in MW.
+"""
+
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from validationtesting.importers.registry import ColumnRule, ImporterPlugin
+
+CARRIER_COMPONENTS = {
+    "solar": "solar_pv",
+    "solar rooftop": "solar_pv",
+    "solar-hsat": "solar_pv",
+    "pv": "solar_pv",
+    "onwind": "wind",
+    "offwind": "wind",
+    "offwind-ac": "wind",
+    "offwind-dc": "wind",
+    "wind": "wind",
+    "diesel": "generator",
+    "oil": "generator",
+    "gas": "generator",
+    "ocgt": "generator",
+    "ccgt": "generator",
+    "battery": "battery",
+}
+
+# Components of PyPSA with a dispatch time series, positive is the power fed into the bus and for loads the consumption
+DISPATCH = {"generators": "generators_t_p", "storage_units": "storage_units_t_p", "stores": "stores_t_p", "loads": "loads_t_p"}
+
+CURTAILED_COMPONENTS = ("solar_pv", "wind")
+
+PYPSA_RULES = tuple(
+    ColumnRule(component, rf"^{component}\|(?!.*\|curtailment)", unit="MW")
+    for component in ("solar_pv", "wind", "generator", "battery", "consumption")
+) + tuple(
+    ColumnRule(component, rf"^{component}\|.*\|curtailment$", quantity="curtailment", unit="MW")
+    for component in CURTAILED_COMPONENTS
+)
+
+class PyPSAImporter(ImporterPlugin):
+    """
+    Importer of solved PyPSA networks in netCDF format.
+    carriers maps further carriers to the components, e.g. {"PV utility": "solar_pv"}.
+    """
+    name = "pypsa"
+    label = "PyPSA Network"
+    rules = PYPSA_RULES
+
+    def __init__(self, carriers: dict = None) -> None:
+        self.carriers = {**CARRIER_COMPONENTS, **{carrier.lower(): component for carrier, component in (carriers or {}).items()}}
+
+    def dispatch_components(self, network, list_name: str, names: np.ndarray) -> list:
+        """Get the component of each PyPSA component in the dispatch, None if its carrier is not mapped."""
+        if list_name == "loads":
+            return ["consumption"] * len(names)
+        carriers = network[f"{list_name}_carrier"].to_series()
+        return [self.carriers.get(str(carriers.get(name, "")).lower()) for name in names]
+
+    def available_power(self, network, names: list, snapshots: slice) -> pd.DataFrame:
+        """Get the available power of the generators, p_max_pu times the optimised nominal power."""
+        p_nom = network["generators_p_nom_opt"] if "generators_p_nom_opt" in network else network["generators_p_nom"]
+        p_max_pu = np.ones((snapshots.stop - snapshots.start, len(names)))
+        if "generators_p_max_pu" in network:
+            p_max_pu *= network["generators_p_max_pu"].to_series().reindex(names).fillna(1.0).to_numpy(dtype=float)
+        if "generators_t_p_max_pu" in network:
+            varying = network["generators_t_p_max_pu"].isel(snapshots=snapshots).to_pandas()
+            for index, name in enumerate(names):
+                if name in varying.columns:
+                    p_max_pu[:, index] = varying[name].to_numpy(dtype=float)
+        return pd.DataFrame(p_max_pu * p_nom.to_series().reindex(names).to_numpy(dtype=float), columns=names)
+
+    def read_chunks(self, path: Path, chunk_size: int, start_time=None) -> Iterator[pd.DataFrame]:
+        import xarray as xr
+
+        with xr.open_dataset(path) as network:
+            time = pd.DatetimeIndex(network["snapshots"].to_index())
+            for start in range(0, len(time), chunk_size):
+                snapshots = slice(start, min(start + chunk_size, len(time)))
+                columns = {"Time": time[snapshots]}
+                for list_name, variable in DISPATCH.items():
+                    if variable not in network:
+                        continue
+                    dispatch = network[variable].isel(snapshots=snapshots).to_pandas()
+                    components = dict(zip(dispatch.columns, self.dispatch_components(network, list_name, dispatch.columns.to_numpy())))
+                    for name, component in components.items():
+                        if component is not None:
+                            columns[f"{component}|{name}"] = dispatch[name].to_numpy(dtype=float)
+                    if list_name == "generators":
+                        curtailed = [name for name, component in components.items() if component in CURTAILED_COMPONENTS]
+                        available = self.available_power(network, curtailed, snapshots)
+                        for name in curtailed:
+                            curtailment = available[name].to_numpy() - dispatch[name].to_numpy(dtype=float)
+                            columns[f"{components[name]}|{name}|curtailment"] = np.clip(curtailment, 0.0, None)
+                yield pd.DataFrame(columns)
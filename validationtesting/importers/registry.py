@@ -0,0 +1,216 @@
+"""
+This module is used to import the output of energy system models into the model output files of a project.
+Each importer plugin reads the native format of one tool in chunks and declares column rules, which map the columns of
+the tool to the energy, curtailment and fuel consumption of the components and convert their units. The chunks are
+mapped and appended to the model output files, so large exports are never loaded at once. The plugins are registered
+by name with their module and only imported when they are used, other tools are added with register_importer.
+
+Usage:
+    python -m validationtesting.importers.registry FILE --project PROJECT [--format homer] [--option key=value ...]
+"""
+
+import argparse
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.utils.lazy_import import load_attribute
+
+logger = logging.getLogger(__name__)
+
+# Conversion of energy units to Wh and of power units to W, power is multiplied with the time step in hours
+ENERGY_UNITS = {"Wh": 1.0, "kWh": 1e3, "MWh": 1e6}
+POWER_UNITS = {"W": 1.0, "kW": 1e3, "MW": 1e6}
+FUEL_UNITS = {"l": 1.0, "L": 1.0, "Lt": 1.0, "m3": 1e3}
+FUEL_RATE_UNITS = {"l/h": 1.0, "L/hr": 1.0, "L/h": 1.0}
+UNITS = {**ENERGY_UNITS, **POWER_UNITS, **FUEL_UNITS, **FUEL_RATE_UNITS}
+RATE_UNITS = {*POWER_UNITS, *FUEL_RATE_UNITS}
+
+# Unit at the end of a header, e.g. "PV Power Output (kW)", "Load [kWh]" or "Genset Fuel Consumption L/hr"
+HEADER_UNIT = re.compile(r"[\s(\[](" + "|".join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True)) + r")[)\]]?\s*$")
+
+QUANTITY_COLUMNS = {
+    "energy": "Model {component} Energy Total [Wh]",
+    "curtailment": "Model {component} Curtailed Energy Total [Wh]",
+    "fuel": "Model Fuel Consumption Total [l]",
+}
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+@dataclass(frozen=True, slots=True)
+class ColumnRule:
+    """
+    Mapping of the columns of a tool to a quantity of the model output of a component.
+
+    Attributes:
+        component (str): Component of the model output, e.g. solar_pv.
+        pattern (str): Pattern of the columns, all matching columns are summed, e.g. all PV arrays.
+        quantity (str): Quantity of the model output, energy, curtailment or fuel.
+        unit (str): Unit of the columns, taken from the header if not given.
+        sign (float): Sign of the columns, e.g. -1 for the charging of the battery.
+    """
+    component: str
+    pattern: str
+    quantity: str = "energy"
+    unit: str = None
+    sign: float = 1.0
+
+    def matching_columns(self, columns) -> list:
+        return [column for column in columns if column != "Time" and re.search(self.pattern, str(column), re.IGNORECASE)]
+
+    def column_unit(self, column: str) -> str:
+        if self.unit is not None:
+            return self.unit
+        unit = HEADER_UNIT.search(str(column))
+        if unit is None:
+            raise ValueError(f"The unit of column {column} is not in its header, set the unit of the rule.")
+        return unit.group(1)
+
+class ImporterPlugin:
+    """
+    Base class of the importer plugins.
+    A plugin reads the export of a tool in chunks with a Time column and declares the column rules of the components.
+    """
+    name = None
+    label = None
+    rules = ()
+
+    def read_chunks(self, path: Path, chunk_size: int, start_time=None) -> Iterator[pd.DataFrame]:
+        """Read an export in chunks of rows, start_time is the start of the project for formats without time stamps."""
+        raise NotImplementedError
+
+    def map_chunk(self, chunk: pd.DataFrame, step_hours: float) -> dict:
+        """Map a chunk to the model output of each component with columns in the chunk."""
+        model_outputs = {}
+        for rule in self.rules:
+            columns = rule.matching_columns(chunk.columns)
+            if not columns:
+                continue
+            values = 0.0
+            for column in columns:
+                unit = rule.column_unit(column)
+                scale = UNITS[unit] * (step_hours if unit in RATE_UNITS else 1.0)
+                values = values + pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=float) * scale
+            model_output = model_outputs.setdefault(rule.component, {"Time": chunk["Time"].to_numpy()})
+            column = QUANTITY_COLUMNS[rule.quantity].format(component=rule.component)
+            model_output[column] = model_output.get(column, 0.0) + rule.sign * values
+        return {component: pd.DataFrame(model_output) for component, model_output in model_outputs.items()}
+
+@dataclass(frozen=True, slots=True)
+class PluginEntry:
+    """
+    Registered importer plugin.
+
+    Attributes:
+        name (str): Name of the plugin.
+        label (str): Label of the plugin shown in the UI.
+        module (str): Module of the plugin, it is imported on first use.
+        attribute (str): Class of the plugin in the module.
+        extensions (tuple): File extensions of the exports of the tool.
+    """
+    name: str
+    label: str
+    module: str
+    attribute: str
+    extensions: tuple
+
+PLUGINS = {}
+
+def register_importer(name: str, label: str, module: str, attribute: str, extensions: tuple) -> None:
+    """Register an importer plugin, e.g. for another tool."""
+    PLUGINS[name] = PluginEntry(name, label, module, attribute, tuple(extensions))
+
+register_importer("microgridspy", "MicroGridsPy", "validationtesting.importers.microgridspy", "MicroGridsPyImporter", (".xlsx",))
+register_importer("homer", "HOMER Time Series", "validationtesting.importers.homer", "HomerImporter", (".csv", ".txt"))
+register_importer("pypsa", "PyPSA Network", "validationtesting.importers.pypsa", "PyPSAImporter", (".nc",))
+register_importer("csv", "Custom CSV", "validationtesting.importers.custom_csv", "CustomCSVImporter", (".csv",))
+
+def load_importer(name: str, **options) -> ImporterPlugin:
+    """Import and create an importer plugin with the given options."""
+    entry = PLUGINS[name]
+    return load_attribute(entry.module, entry.attribute)(**options)
+
+def detect_importer(path: Path) -> str:
+    """Get the name of the first plugin registered for the extension of a file."""
+    suffix = Path(path).suffix.lower()
+    for entry in PLUGINS.values():
+        if suffix in entry.extensions:
+            return entry.name
+    raise ValueError(f"No importer is registered for {suffix} files.")
+
+def infer_step_hours(time: pd.Series) -> float:
+    """Infer the time step in hours from the time stamps of a chunk, one hour if it has a single row."""
+    steps = pd.to_datetime(time).diff().dropna()
+    return steps.median() / pd.Timedelta(hours=1) if len(steps) else 1.0
+
+def get_yaml_path(project_name: str) -> Path:
+    return PathManager.PROJECTS_FOLDER_PATH / project_name / f"{project_name}.yaml"
+
+def project_start_time(project_name: str):
+    """Get the start date of a project from its parameters, None if the project has no parameters."""
+    from validationtesting.validation.parameters import ProjectParameters
+    yaml_path = get_yaml_path(project_name)
+    if not yaml_path.exists():
+        return None
+    return ProjectParameters.instantiate_from_yaml(yaml_path).general_info.start_date
+
+def mark_uploaded(project_name: str, component: str) -> None:
+    """Set the upload flag of a model output in the project parameters, so the GUI shows the imported data."""
+    from validationtesting.validation.parameters import ProjectParameters
+    yaml_path = get_yaml_path(project_name)
+    parameters = ProjectParameters.instantiate_from_yaml(yaml_path)
+    flag = f"{component}_data_uploaded"
+    if hasattr(parameters.upload_model_parameters, flag) and not getattr(parameters.upload_model_parameters, flag):
+        setattr(parameters.upload_model_parameters, flag, True)
+        parameters.save_to_yaml(yaml_path)
+
+def import_file(project_name: str, path: Path, plugin: ImporterPlugin, chunk_size: int = DEFAULT_CHUNK_SIZE, start_time=None) -> list:
+    """
+    Import the export of a tool into the model output files of a project, chunk by chunk.
+    The files are written next to the inputs and only replace them once the whole export is imported.
+    If no start time is given, the start date of the project is used. Returns the imported components.
+    """
+    inputs_path = PathManager.PROJECTS_FOLDER_PATH / project_name / "inputs"
+    inputs_path.mkdir(parents=True, exist_ok=True)
+    start_time = project_start_time(project_name) if start_time is None else start_time
+    temporary_paths, step_hours = {}, None
+    for chunk in plugin.read_chunks(path, chunk_size, start_time):
+        if step_hours is None:
+            step_hours = infer_step_hours(chunk["Time"])
+        for component, model_output in plugin.map_chunk(chunk, step_hours).items():
+            header = component not in temporary_paths
+            temporary_path = temporary_paths.setdefault(component, inputs_path / f"model_output_{component}.csv.tmp")
+            model_output.to_csv(temporary_path, mode="w" if header else "a", header=header, index=False)
+
+    for component, temporary_path in temporary_paths.items():
+        os.replace(temporary_path, inputs_path / f"model_output_{component}.csv")
+        if get_yaml_path(project_name).exists():
+            mark_uploaded(project_name, component)
+    logger.info("Imported %s from %s into %s", ", ".join(temporary_paths) or "nothing", path, project_name)
+    return list(temporary_paths)
+
+def parse_options(options: list) -> dict:
+    """Parse key=value options of the command line, values are read as YAML, e.g. numbers or lists."""
+    import yaml
+    return {key: yaml.safe_load(value) for key, value in (option.split("=", 1) for option in options)}
+
+def main(arguments: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Import the output of an energy system model into the model output files of a project.")
+    parser.add_argument("file", type=Path, help="Export of the model.")
+    parser.add_argument("--project", required=True, help="Name of the project.")
+    parser.add_argument("--format", choices=sorted(PLUGINS), default=None, help="Importer plugin, detected from the file extension by default.")
+    parser.add_argument("--option", action="append", default=[], help="Option of the plugin as key=value.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Number of rows imported at once.")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    plugin = load_importer(args.format or detect_importer(args.file), **parse_options(args.option))
+    components = import_file(args.project, args.file, plugin, args.chunk_size)
+    print(f"{args.project}: {', '.join(components) or 'no components found'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+This module is used to import pages, validation stages and heavy dependencies only when they are first used.
+Importing every page and validator at startup pulls in matplotlib, BLAST-Lite, folium and requests,
+which slows down the cold start of the app even if they are never needed.
+"""
+
+import importlib
+from typing import Any, Callable
+
+def load_attribute(module: str, attribute: str) -> Any:
+    """Import a module on first use and return one of its attributes."""
+    return getattr(importlib.import_module(module), attribute)
+
+def lazy_callable(module: str, attribute: str, *args, name: str = None) -> Callable:
+    """
+    Create a function which imports the module on the first call and calls the attribute with the given arguments.
+    The name of the function is used by Streamlit to build the URL of a page, so it must be unique per page.
+    """
+    def call(*call_args, **call_kwargs):
+        return load_attribute(module, attribute)(*args, *call_args, **call_kwargs)
+    call.__name__ = call.__qualname__ = name or attribute
+    return call
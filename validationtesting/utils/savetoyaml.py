@@ -1,4 +1,12 @@
+"""
+This module is used to save the project parameters in the session state to the YAML file of the project.
+The parsed parameters are kept in the session state and a hash of the parameter values is stored after each save,
+so the YAML file is only rewritten if a parameter changed since the last save.
+"""
+
 import streamlit as st
+import hashlib
+import os
 from pathlib import Path
 from datetime import datetime
 from validationtesting.validation.parameters import ProjectParameters
@@ -39,8 +47,24 @@ def update_nested_settings(settings: Any) -> Any:
                 setattr(settings, field, update_nested_settings(value))
     return settings
 
+def get_parameter_fields(settings: Any) -> list:
+    """Get the names of all parameters of the nested settings."""
+    fields = []
+    for field in settings.__fields__:
+        value = getattr(settings, field)
+        if hasattr(value, '__fields__'):
+            fields.extend(get_parameter_fields(value))
+        else:
+            fields.append(field)
+    return fields
+
+def get_session_hash(fields: list) -> str:
+    """Hash the current session state values of the given parameters."""
+    snapshot = repr([(field, st.session_state[field]) for field in fields if field in st.session_state])
+    return hashlib.sha256(snapshot.encode()).hexdigest()
+
 def save_to_yaml() -> None:
-    """Load, update, and save the project parameters based on session state."""
+    """Update and save the project parameters based on session state, if any parameter changed since the last save."""
     # Get the current project's YAML file path
     project_name = st.session_state.get('project_name')
 
@@ -48,12 +72,30 @@ def save_to_yaml() -> None:
     path_manager = PathManager(project_name)
     yaml_filepath = path_manager.PROJECTS_FOLDER_PATH / project_name / f"{project_name}.yaml"
 
-    # Load current project parameters from YAML
-    current_settings = ProjectParameters.instantiate_from_yaml(yaml_filepath)
-    
+    # Load the project parameters from YAML only if they are not cached or the file was changed by someone else
+    modified_time = os.path.getmtime(yaml_filepath)
+    saved = st.session_state.get('saved_settings')
+    if saved is None or saved['path'] != yaml_filepath or saved['modified_time'] != modified_time:
+        current_settings = ProjectParameters.instantiate_from_yaml(yaml_filepath)
+        saved = {
+            'path': yaml_filepath,
+            'modified_time': modified_time,
+            'settings': current_settings,
+            'fields': get_parameter_fields(current_settings),
+            'hash': None,
+        }
+        st.session_state.saved_settings = saved
+
+    # Skip the save if no parameter changed
+    session_hash = get_session_hash(saved['fields'])
+    if session_hash == saved['hash']:
+        return
+
     # Update current settings with values from session state
-    updated_settings = update_nested_settings(current_settings)
+    updated_settings = update_nested_settings(saved['settings'])
 
     # Save the updated settings back to the YAML file
     updated_settings.save_to_yaml(yaml_filepath)
-    st.toast(f"Settings saved successfully to {yaml_filepath}")
\ No newline at end of file
+    saved['modified_time'] = os.path.getmtime(yaml_filepath)
+    saved['hash'] = session_hash
+    st.toast(f"Settings saved successfully to {yaml_filepath}")
@@ -0,0 +1,59 @@
+"""
+This module is used to handle time zones, UTC offsets and years of time stamps for all time stamps of a series at once.
+Wall clock times in the skipped hour of a DST change do not exist and times in the repeated hour of a change are
+ambiguous. Both are resolved as pytz does with is_dst: by default as standard time, otherwise as daylight saving
+time, so the results are the same as localizing each time stamp with pytz. The time zones are loaded once and cached.
+"""
+
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pytz
+
+@lru_cache(maxsize=None)
+def get_timezone(timezone: str):
+    """Get a time zone by its name, e.g. Europe/Rome or Etc/GMT-2."""
+    return pytz.timezone(timezone)
+
+def to_utc(times, timezone: str, is_dst: bool = False) -> pd.DatetimeIndex:
+    """
+    Convert wall clock times of a time zone to naive UTC times.
+    Ambiguous and non-existent times are taken as daylight saving time if is_dst is set and as standard time otherwise.
+    """
+    times = pd.DatetimeIndex(times)
+    tz = get_timezone(timezone)
+    # The offset before a gap is the standard time of a spring DST change and the offset after it the daylight saving time
+    localized = times.tz_localize(tz, ambiguous=np.full(len(times), is_dst), nonexistent="shift_forward" if is_dst else "shift_backward")
+    offsets = localized.tz_localize(None) - localized.tz_convert("UTC").tz_localize(None)
+    return pd.DatetimeIndex(times - offsets)
+
+def localize(times, timezone: str, is_dst: bool = False) -> pd.DatetimeIndex:
+    """Localize wall clock times to a time zone, ambiguous and non-existent times are resolved as in to_utc."""
+    return to_utc(times, timezone, is_dst).tz_localize("UTC").tz_convert(get_timezone(timezone))
+
+def utc_offset_hours(times, timezone: str, is_dst: bool = False) -> np.ndarray:
+    """Get the UTC offset in hours of wall clock times of a time zone."""
+    times = pd.DatetimeIndex(times)
+    return ((times - to_utc(times, timezone, is_dst)) / pd.Timedelta(hours=1)).to_numpy(dtype=float)
+
+def normalize_year(times, year: int):
+    """
+    Set the year of time stamps, e.g. to put the hours of a typical meteorological year from different years into one.
+    Time zone aware time stamps keep their wall clock time. A Series is returned as Series, anything else as DatetimeIndex.
+    """
+    index = pd.DatetimeIndex(times)
+    naive = index.tz_localize(None) if index.tz is not None else index
+    normalized = pd.to_datetime(pd.DataFrame({
+        "year": year,
+        "month": naive.month,
+        "day": naive.day,
+        "hour": naive.hour,
+        "minute": naive.minute,
+        "second": naive.second,
+    })).to_numpy()
+    normalized = pd.DatetimeIndex(normalized)
+    if index.tz is not None:
+        normalized = normalized.tz_localize(index.tz, ambiguous=np.zeros(len(normalized), dtype=bool), nonexistent="shift_forward")
+    if isinstance(times, pd.Series):
+        return pd.Series(normalized, index=times.index, name=times.name)
+    return normalized
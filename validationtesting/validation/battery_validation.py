@@ -7,7 +7,15 @@ import pandas as pd
 from config.path_manager import PathManager
 import datetime
 import numpy as np
-from blast import models
+from validationtesting.validation.project_model import compile_unit_table
+from validationtesting.validation.rollups import write_rollups
+from validationtesting.validation.tiles import write_tiles
+from validationtesting.validation.events import find_events, write_events
+from validationtesting.validation.cycles import write_cycles
+from validationtesting.validation.kernels import battery_energy_stored, battery_unit_energy_stored
+
+# Split of the battery power between the units: one aggregate battery, or per unit in proportion to capacity or headroom
+DISPATCH_SPLITS = ["Aggregate", "Capacity", "Headroom"]
 
 def test_charging_rate(battery_power: float, max_charge_power: float, max_discharge_power: float) -> bool:
     """Test if the battery power is within the charge and discharge power constraints."""
@@ -49,29 +57,65 @@ def get_cyclic_degradation(cell, soc_values) -> float:
 
     return soh_end
 
+def unit_battery_states(time_axis, battery_power, battery_capacities, unit_available, units, unit_installed_energy, dispatch_split, soc_tolerance) -> tuple:
+    """
+    Track the energy stored in each battery unit (hours x units) with the battery power split between the units.
+    Returns the total energy stored, the result columns of each unit and the SoC violation events of each unit.
+    """
+    min_soc = units["battery_min_soc"] / 100
+    max_soc = units["battery_max_soc"] / 100
+    unit_energy_stored, unit_power = battery_unit_energy_stored(
+        battery_power, battery_capacities, units["battery_charging_efficiency"] / 100, units["battery_discharging_efficiency"] / 100,
+        min_soc, max_soc, unit_installed_energy, split_headroom=dispatch_split == "Headroom")
+    unit_active = battery_capacities > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_soc = np.where(unit_active, unit_energy_stored / battery_capacities, 0.0)
+    soc_lower_limit = np.where(unit_active, min_soc - soc_tolerance, np.nan)
+    soc_upper_limit = np.where(unit_active, max_soc + soc_tolerance, np.nan)
+    soc_within_limits = ~unit_active | ((soc_lower_limit <= unit_soc) & (unit_soc <= soc_upper_limit))
+    charge_limit = unit_available * units["battery_max_charge_power"].astype(float)
+    discharge_limit = unit_available * units["battery_max_discharge_power"].astype(float)
+
+    columns, events = {}, []
+    for unit in range(units.num_units):
+        columns[f"Benchmark battery Energy {unit+1} [Wh]"] = unit_power[:, unit]
+        columns[f"Charge Power Constraints {unit+1}"] = ~((unit_power[:, unit] > discharge_limit[:, unit]) | (-unit_power[:, unit] > charge_limit[:, unit]))
+        columns[f"SoC Constraints {unit+1}"] = soc_within_limits[:, unit]
+        columns[f"Energy Stored {unit+1} [Wh]"] = np.where(unit_active[:, unit], unit_energy_stored[:, unit], 0.0)
+        columns[f"Capacity {unit+1}"] = battery_capacities[:, unit]
+        columns[f"Benchmark battery SoC {unit+1} [%]"] = unit_soc[:, unit]
+        events.append(find_events(time_axis, ~soc_within_limits[:, unit],
+                                  np.fmax(soc_lower_limit[:, unit] - unit_soc[:, unit], unit_soc[:, unit] - soc_upper_limit[:, unit]) * 100,
+                                  f"State of Charge {unit+1}", "%"))
+    return unit_energy_stored.sum(axis=1), pd.DataFrame(columns, index=time_axis), events
+
 def battery_validation_testing() -> None:
     """Run the battery validation testing."""
     project_name = st.session_state.get("project_name")
     battery_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_battery.csv"
     battery_data = pd.read_csv(battery_data_path)
 
-    num_units = st.session_state.battery_num_units
-    max_charge_powers = st.session_state.battery_max_charge_power
-    max_discharge_powers = st.session_state.battery_max_discharge_power
-    installation_dates = st.session_state.battery_installation_dates
-    lifetime = st.session_state.battery_lifetime
-    end_of_life = [installation_dates[unit].replace(year=installation_dates[unit].year + lifetime[unit]) for unit in range(num_units)]
-    battery_type = st.session_state.battery_type
-    initial_battery_capacity = st.session_state.battery_capacity
-    initial_soc = [x / 100 for x in st.session_state.battery_initial_soc]
-    charging_efficiency = [x / 100 for x in st.session_state.battery_charging_efficiency]
-    discharging_efficiency = [x / 100 for x in st.session_state.battery_discharging_efficiency]
-    min_soc = [x / 100 for x in st.session_state.battery_min_soc]
-    max_soc = [x / 100 for x in st.session_state.battery_max_soc]
-    temporal_degradation_rate = [x / 100 for x in st.session_state.battery_temporal_degradation_rate]
+    # Compile the battery units once, so that all parameters are indexed by unit in the hourly loop
+    units = compile_unit_table("battery", [
+        "battery_max_charge_power", "battery_max_discharge_power", "battery_capacity", "battery_initial_soc",
+        "battery_charging_efficiency", "battery_discharging_efficiency", "battery_min_soc", "battery_max_soc",
+        "battery_temporal_degradation_rate",
+    ])
+    num_units = units.num_units
+    max_charge_powers = units["battery_max_charge_power"]
+    max_discharge_powers = units["battery_max_discharge_power"]
+    installation_dates = units.installation_dates
+    initial_battery_capacity = units["battery_capacity"]
+    initial_soc = units["battery_initial_soc"] / 100
+    charging_efficiency = units["battery_charging_efficiency"] / 100
+    discharging_efficiency = units["battery_discharging_efficiency"] / 100
+    min_soc = units["battery_min_soc"] / 100
+    max_soc = units["battery_max_soc"] / 100
+    temporal_degradation_rate = units["battery_temporal_degradation_rate"] / 100
     cyclic_degradation = st.session_state.battery_cyclic_degradation
     replacement_cost = (st.session_state.battery_degradation_accounting == "Replacement Cost")
-
+    soc_tolerance = st.session_state.soc_tolerance / 100
+    dispatch_split = st.session_state.get("battery_dispatch_split", DISPATCH_SPLITS[0])
 
     battery_data[f"Charge Power Constraints Total"] = None 
     battery_data[f"SoC Constraints Total"] = None
@@ -81,6 +125,10 @@ def battery_validation_testing() -> None:
     for unit in range(num_units):
         battery_data[f"Replacement Capacity {unit+1}"] = None
     battery_data['Time'] = pd.to_datetime(battery_data['Time'], errors='coerce')
+
+    # Availability of each unit (time steps x units) at the timestamps of the model output
+    time_axis = pd.DatetimeIndex(battery_data['Time'])
+    unit_available = units.available(time_axis)
     
     st.write("--------------------")
     #start_year = datetime.datetime.strptime(battery_data.iloc[0]['Time'], '%Y-%m-%d %H:%M:%S').year
@@ -97,101 +145,177 @@ def battery_validation_testing() -> None:
     discharging_efficiencies = num_units * [0]
     battery_capacities = num_units * [0]
     current_energy_stored = 0
+
+    # Hourly limits of all units, used for the exceedance of the violation events
+    charge_limit = np.zeros(len(battery_data))
+    discharge_limit = np.zeros(len(battery_data))
+    soc_lower_limit = np.full(len(battery_data), np.nan)
+    soc_upper_limit = np.full(len(battery_data), np.nan)
+    unit_results, unit_events = None, []
     if cyclic_degradation:
         model_name = st.session_state.battery_model[0]
+        # BLAST-Lite is only imported if cyclic degradation is modelled
+        from blast import models
         model_class = getattr(models, model_name)
         cell = model_class()
         soc_values = {}
-    for i, row in battery_data.iterrows():
-        total_max_charge_power = 0
-        total_max_discharge_power = 0
-        total_battery_capacity = 0
-        time = row['Time']
-        if time.hour == 0 and time.month == 1 and time.day == 1:
-            battery_progress += progress_step
-            battery_progress_bar.progress(battery_progress)
-            battery_text.write(f"Processing year {time.year} for battery validation")
-            if replacement_cost:
+        for i, row in battery_data.iterrows():
+            total_max_charge_power = 0
+            total_max_discharge_power = 0
+            total_battery_capacity = 0
+            time = row['Time']
+            if time.hour == 0 and time.month == 1 and time.day == 1:
+                battery_progress += progress_step
+                battery_progress_bar.progress(battery_progress)
+                battery_text.write(f"Processing year {time.year} for battery validation")
+                if replacement_cost:
+                    for unit in range(num_units):
+                        if unit in soc_values:
+                            cell = model_class()
+                            soh = get_cyclic_degradation(cell, soc_values[unit])
+                            battery_replacement = (1-soh) * initial_battery_capacity[unit]
+                            battery_data.at[i, f"Replacement Capacity {unit+1}"] = battery_replacement
+                            soc_values[unit] = [soc_values[unit][-1]]
+            if replacement_cost and i == len(battery_data) - 1:
                 for unit in range(num_units):
-                    type = int(battery_type[unit].replace("Type ", "")) - 1
                     if unit in soc_values:
                         cell = model_class()
                         soh = get_cyclic_degradation(cell, soc_values[unit])
-                        battery_replacement = (1-soh) * initial_battery_capacity[type]
+                        battery_replacement = (1-soh) * initial_battery_capacity[unit]
                         battery_data.at[i, f"Replacement Capacity {unit+1}"] = battery_replacement
                         soc_values[unit] = [soc_values[unit][-1]]
-        if replacement_cost and i == len(battery_data) - 1:
             for unit in range(num_units):
-                type = int(battery_type[unit].replace("Type ", "")) - 1
-                if unit in soc_values:
-                    cell = model_class()
-                    soh = get_cyclic_degradation(cell, soc_values[unit])
-                    battery_replacement = (1-soh) * initial_battery_capacity[type]
-                    battery_data.at[i, f"Replacement Capacity {unit+1}"] = battery_replacement
-                    soc_values[unit] = [soc_values[unit][-1]]
-        for unit in range(num_units):
-            type = int(battery_type[unit].replace("Type ", "")) - 1
-
-            if installation_dates[unit] <= time <= end_of_life[unit]:  
-                max_charge_power = max_charge_powers[type]
-                max_discharge_power = max_discharge_powers[type]
-                battery_capacity = initial_battery_capacity[type]
-                if cyclic_degradation:
-                    if unit in soc_values:
-                        soc_values[unit].append(soc_value)
-                        if replacement_cost:
-                            pass
+                if unit_available[i, unit]:
+                    max_charge_power = max_charge_powers[unit]
+                    max_discharge_power = max_discharge_powers[unit]
+                    battery_capacity = initial_battery_capacity[unit]
+                    if cyclic_degradation:
+                        if unit in soc_values:
+                            soc_values[unit].append(soc_value)
+                            if replacement_cost:
+                                pass
+                            else:
+                                soh = get_cyclic_degradation(cell, soc_values[unit])
+                                battery_capacity = soh * battery_capacity
+                                max_charge_power = max_charge_power * soh
+                                max_discharge_power = max_discharge_power * soh
                         else:
-                            soh = get_cyclic_degradation(cell, soc_values[unit])
-                            battery_capacity = soh * battery_capacity
-                            max_charge_power = max_charge_power * soh
-                            max_discharge_power = max_discharge_power * soh
-                    else:
-                        soc_values[unit] = [initial_soc[type]]
-            else:
-                max_charge_power = 0
-                max_discharge_power = 0
-                battery_capacity = 0
-
-            if installation_dates[unit] == time:
-                current_energy_stored += initial_soc[type] * initial_battery_capacity[type]
-
-            if st.session_state.battery_temporal_degradation:
-                battery_capacity = temporal_degradation_capacity(battery_capacity[type], temporal_degradation_rate[type], time.date(), installation_dates[unit])                      
-
-            total_max_charge_power += max_charge_power
-            total_max_discharge_power += max_discharge_power
-            total_battery_capacity += battery_capacity
-            charging_efficiencies[unit] = charging_efficiency[type]
-            discharging_efficiencies[unit] = discharging_efficiency[type]
-            battery_capacities[unit] = battery_capacity
-        battery_power = row[f'Model battery Energy Total [Wh]']
-        #battery_power = row[f'Model battery SoC Total [%]']
-
-        if total_battery_capacity == 0:
-            battery_data.at[i, f"Charge Power Constraints Total"] = test_charging_rate(0, total_max_charge_power, total_max_discharge_power)
-            battery_data.at[i, f"Benchmark battery SoC Total [%]"], battery_data.loc[i, f"SoC Constraints Total"] = 0, True
-            battery_data.at[i, f"Energy Stored Total [Wh]"] = 0
-            battery_data.at[i, f"Capacity Total"] = 0
+                            soc_values[unit] = [initial_soc[unit]]
+                else:
+                    max_charge_power = 0
+                    max_discharge_power = 0
+                    battery_capacity = 0
 
-        else:
-            total_charging_efficiency = sum(charging_efficiencies[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
-            total_discharging_efficiency = sum(discharging_efficiencies[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
-            min_soc_total = sum(min_soc[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
-            max_soc_total = sum(max_soc[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
+                if installation_dates[unit] == time:
+                    current_energy_stored += initial_soc[unit] * initial_battery_capacity[unit]
+
+                if st.session_state.battery_temporal_degradation:
+                    battery_capacity = temporal_degradation_capacity(battery_capacity, temporal_degradation_rate[unit], time.date(), installation_dates[unit].date())                      
+
+                total_max_charge_power += max_charge_power
+                total_max_discharge_power += max_discharge_power
+                total_battery_capacity += battery_capacity
+                charging_efficiencies[unit] = charging_efficiency[unit]
+                discharging_efficiencies[unit] = discharging_efficiency[unit]
+                battery_capacities[unit] = battery_capacity
+            battery_power = row[f'Model battery Energy Total [Wh]']
+            charge_limit[i], discharge_limit[i] = total_max_charge_power, total_max_discharge_power
+            #battery_power = row[f'Model battery SoC Total [%]']
+
+            if total_battery_capacity == 0:
+                battery_data.at[i, f"Charge Power Constraints Total"] = test_charging_rate(0, total_max_charge_power, total_max_discharge_power)
+                battery_data.at[i, f"Benchmark battery SoC Total [%]"], battery_data.loc[i, f"SoC Constraints Total"] = 0, True
+                battery_data.at[i, f"Energy Stored Total [Wh]"] = 0
+                battery_data.at[i, f"Capacity Total"] = 0
 
-            if battery_power <= 0:
-                current_energy_stored -= battery_power * total_charging_efficiency
             else:
-                current_energy_stored -= battery_power / total_discharging_efficiency
+                total_charging_efficiency = sum(charging_efficiencies[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
+                total_discharging_efficiency = sum(discharging_efficiencies[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
+                min_soc_total = sum(min_soc[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
+                max_soc_total = sum(max_soc[unit] * battery_capacities[unit] for unit in range(num_units)) / total_battery_capacity
+                soc_lower_limit[i], soc_upper_limit[i] = min_soc_total - soc_tolerance, max_soc_total + soc_tolerance
+
+                if battery_power <= 0:
+                    current_energy_stored -= battery_power * total_charging_efficiency
+                else:
+                    current_energy_stored -= battery_power / total_discharging_efficiency
 
-            battery_data.at[i, f"Charge Power Constraints Total"] = test_charging_rate(battery_power, total_max_charge_power, total_max_discharge_power)
-            soc_value, battery_data.at[i, f"Benchmark battery SoC Total [%]"] = test_soc(total_battery_capacity, current_energy_stored, min_soc_total, max_soc_total, soc_tolerance=0.005)
-            battery_data.loc[i, f"SoC Constraints Total"] = soc_value
-            battery_data.at[i, f"Energy Stored Total [Wh]"] = current_energy_stored
-            battery_data.at[i, f"Capacity Total"] = total_battery_capacity
+                battery_data.at[i, f"Charge Power Constraints Total"] = test_charging_rate(battery_power, total_max_charge_power, total_max_discharge_power)
+                soc_value, battery_data.loc[i, f"SoC Constraints Total"] = test_soc(total_battery_capacity, current_energy_stored, min_soc_total, max_soc_total, soc_tolerance=soc_tolerance)
+                battery_data.at[i, f"Benchmark battery SoC Total [%]"] = soc_value
+                battery_data.at[i, f"Energy Stored Total [Wh]"] = current_energy_stored
+                battery_data.at[i, f"Capacity Total"] = total_battery_capacity
+    else:
+        # Without cyclic degradation the capacity does not depend on the state of charge, so the hourly totals of all
+        # units are calculated at once and only the energy stored is calculated as a recursion over the hours
+        battery_text.write("Calculating battery state of charge")
+        battery_capacities = np.where(unit_available, initial_battery_capacity, 0.0)
+        if st.session_state.battery_temporal_degradation:
+            installation_days = np.array([pd.Timestamp(date).normalize() for date in installation_dates], dtype="datetime64[ns]")
+            years_since_install = (time_axis.normalize().values[:, None] - installation_days[None, :]) / np.timedelta64(1, "D") / 365.25
+            battery_capacities = battery_capacities * (1 - temporal_degradation_rate * years_since_install)
+        charge_limit = unit_available @ max_charge_powers.astype(float)
+        discharge_limit = unit_available @ max_discharge_powers.astype(float)
+        total_battery_capacity = battery_capacities.sum(axis=1)
+        active = total_battery_capacity != 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_charging_efficiency = battery_capacities @ charging_efficiency / total_battery_capacity
+            total_discharging_efficiency = battery_capacities @ discharging_efficiency / total_battery_capacity
+            min_soc_total = battery_capacities @ min_soc / total_battery_capacity
+            max_soc_total = battery_capacities @ max_soc / total_battery_capacity
+        soc_lower_limit = np.where(active, min_soc_total - soc_tolerance, np.nan)
+        soc_upper_limit = np.where(active, max_soc_total + soc_tolerance, np.nan)
+
+        # Energy of the units installed in each hour (hours x units)
+        unit_installed_energy = np.zeros((len(battery_data), num_units))
+        for unit in range(num_units):
+            unit_installed_energy[np.asarray(time_axis == installation_dates[unit]), unit] = initial_soc[unit] * initial_battery_capacity[unit]
+
+        battery_power = battery_data['Model battery Energy Total [Wh]'].to_numpy(dtype=float)
+        if dispatch_split == "Aggregate":
+            energy_stored = battery_energy_stored(battery_power, total_charging_efficiency, total_discharging_efficiency, active, unit_installed_energy.sum(axis=1))
+        else:
+            energy_stored, unit_results, unit_events = unit_battery_states(
+                time_axis, battery_power, battery_capacities, unit_available, units, unit_installed_energy, dispatch_split, soc_tolerance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            soc = np.where(active, energy_stored / total_battery_capacity, 0.0)
+        checked_power = np.where(active, battery_power, 0.0)
+
+        battery_data[f"Charge Power Constraints Total"] = ~((checked_power > discharge_limit) | (-checked_power > charge_limit))
+        battery_data[f"SoC Constraints Total"] = ~active | ((soc_lower_limit <= soc) & (soc <= soc_upper_limit))
+        battery_data[f"Energy Stored Total [Wh]"] = np.where(active, energy_stored, 0.0)
+        battery_data[f"Capacity Total"] = total_battery_capacity
+        battery_data[f"Benchmark battery SoC Total [%]"] = soc
+        if unit_results is not None:
+            battery_data = pd.concat([battery_data, unit_results.reset_index(drop=True)], axis=1)
+        battery_progress_bar.progress(1.0)
 
     battery_text.write("Saving battery validation results...")
     results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "battery_validation.csv"
     battery_data.to_csv(results_data_path)
-    battery_text.write("Battery Benchmark Calculation Completed.")
\ No newline at end of file
+    series = [column for column in battery_data.columns if column.endswith("]")]
+    hourly_results = battery_data.set_index("Time")
+    write_rollups("battery_validation", hourly_results, series)
+    write_tiles("battery_validation", hourly_results, series)
+
+    # Run-length encode the hours in violation into events
+    model_power = battery_data['Model battery Energy Total [Wh]'].to_numpy(dtype=float)
+    benchmark_soc = pd.to_numeric(battery_data["Benchmark battery SoC Total [%]"], errors='coerce').to_numpy(dtype=float)
+    write_events("battery_validation", [
+        find_events(time_axis, battery_data["Charge Power Constraints Total"] == False,
+                    np.maximum(model_power - discharge_limit, -model_power - charge_limit), "Charge Power", "Wh"),
+        find_events(time_axis, battery_data["SoC Constraints Total"] == False,
+                    np.fmax(soc_lower_limit - benchmark_soc, benchmark_soc - soc_upper_limit) * 100, "State of Charge", "%"),
+        *unit_events,
+    ])
+
+    # Count the charge cycles of the battery and of each unit from the benchmark SoC
+    battery_text.write("Counting battery cycles...")
+    batteries = {"Total": (benchmark_soc, model_power, pd.to_numeric(battery_data["Capacity Total"], errors='coerce'))}
+    if unit_results is not None:
+        for unit in range(num_units):
+            batteries[str(unit + 1)] = (unit_results[f"Benchmark battery SoC {unit+1} [%]"], unit_results[f"Benchmark battery Energy {unit+1} [Wh]"],
+                                        unit_results[f"Capacity {unit+1}"])
+    write_cycles("battery_validation", time_axis, batteries)
+    battery_text.write("Battery Benchmark Calculation Completed.")
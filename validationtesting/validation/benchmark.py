@@ -8,6 +8,12 @@ import pandas as pd
 from config.path_manager import PathManager
 from validationtesting.validation.solar_pv_validation import solar_pv_benchmark
 from validationtesting.validation.wind_validation import wind_benchmark
+from validationtesting.validation.rollups import write_rollups, write_rollups_by_column
+from validationtesting.validation.tiles import write_tiles, write_tiles_by_column
+from validationtesting.validation.events import find_events, write_events
+from validationtesting.validation.out_of_core import (
+    use_out_of_core, clear_partitions, write_partition, partition_csv, partition_years, read_year, read_column
+)
 
 class Benchmark():
     """Class to calculate the benchmark of the model output"""
@@ -20,6 +26,7 @@ class Benchmark():
         }
 
         combined_df = None
+        resources = []
 
         for component_name, benchmark_function in components.items():
             if component_name == "solar_pv":
@@ -29,15 +36,72 @@ class Benchmark():
             component = st.session_state.get(component_name)
             if component and callable(benchmark_function):
                 benchmark_function()
-                resource_df = self.create_df(component_name)
-                if combined_df is None: 
-                    combined_df = resource_df
-                else:
-                    combined_df = pd.merge(combined_df, resource_df, on="Time", how='outer')
+                resources.append(component_name)
+                if not use_out_of_core():
+                    resource_df = self.create_df(component_name)
+                    if combined_df is None: 
+                        combined_df = resource_df
+                    else:
+                        combined_df = pd.merge(combined_df, resource_df, on="Time", how='outer')
                 progress += progress_step
                 progress_bar.progress(progress)
         combined_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results" / f"combined_model_benchmark.csv"
+        if use_out_of_core():
+            self.combine_partitions(resources, combined_data_path)
+            return
         combined_df.to_csv(combined_data_path, index=False)
+        series = [column for column in combined_df.columns if column != "Time"]
+        hourly_results = combined_df.set_index(pd.to_datetime(combined_df["Time"]))
+        write_rollups("combined_model_benchmark", hourly_results, series)
+        write_tiles("combined_model_benchmark", hourly_results, series)
+        write_events("combined_model_benchmark", [
+            self.deviation_events(hourly_results, component_name) for component_name in components if st.session_state.get(component_name)
+        ])
+
+    def combine_partitions(self, resources: list, combined_data_path) -> None:
+        """
+        Combine the model and benchmark data of the resources one year at a time for the out-of-core engine.
+        The combined data is written to the same CSV file as in memory and to yearly partitions, the rollups, tiles and
+        events are calculated one column at a time.
+        """
+        for resource in resources:
+            model_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "inputs" / f"model_output_{resource}.csv"
+            partition_csv(f"model_output_{resource}", model_data_path)
+
+        clear_partitions("combined_model_benchmark")
+        years = sorted(set().union(*[
+            partition_years(name) for resource in resources for name in (f"{resource}_validation", f"model_output_{resource}")
+        ]))
+        series = []
+        for year in years:
+            combined_df = None
+            for resource in resources:
+                resource_df = pd.merge(read_year(f"{resource}_validation", year), read_year(f"model_output_{resource}", year), on="Time", how='outer')
+                resource_df = resource_df.loc[:, resource_df.columns.str.contains('Time|Model|Benchmark')]
+                combined_df = resource_df if combined_df is None else pd.merge(combined_df, resource_df, on="Time", how='outer')
+            write_partition("combined_model_benchmark", combined_df)
+            combined_df.to_csv(combined_data_path, index=False, mode="w" if not series else "a", header=not series)
+            series = series or [column for column in combined_df.columns if column != "Time"]
+
+        def read_combined_column(column: str) -> pd.Series:
+            return read_column("combined_model_benchmark", column)
+
+        write_rollups_by_column("combined_model_benchmark", read_combined_column, series)
+        write_tiles_by_column("combined_model_benchmark", read_combined_column, series)
+        write_events("combined_model_benchmark", [
+            self.deviation_events(pd.concat([
+                read_combined_column(f"Model {resource} Energy Total [Wh]"),
+                read_combined_column(f"Benchmark {resource} Energy Total [Wh]"),
+            ], axis=1), resource) for resource in resources
+        ])
+
+    def deviation_events(self, hourly_results: pd.DataFrame, resource: str) -> pd.DataFrame:
+        """Find the events where the model output deviates from the benchmark by more than the deviation threshold"""
+        threshold = st.session_state.deviation_threshold / 100
+        model = hourly_results[f"Model {resource} Energy Total [Wh]"].to_numpy(dtype=float)
+        benchmark = hourly_results[f"Benchmark {resource} Energy Total [Wh]"].to_numpy(dtype=float)
+        exceedance = abs(model - benchmark) - threshold * benchmark
+        return find_events(hourly_results.index, exceedance > 0, exceedance, f"{resource} Deviation", "Wh")
 
     def create_df(self, resource: str) -> pd.DataFrame:
         """Create a dataframe of the model and benchmark data for one resource"""
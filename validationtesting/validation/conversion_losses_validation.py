@@ -1,110 +1,160 @@
+"""
+This module is used to validate the conversion losses of the model.
+The energy flows of all components are loaded once onto the time axis of the model conversion losses,
+combined into one column per converter and the benchmark losses of all converters are calculated in one vectorized pass.
+Converters can either have a constant efficiency or a part-load efficiency curve, which is interpolated on the normalized load.
+"""
+
 import streamlit as st
-from config.path_manager import PathManager
+import numpy as np
 import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.validation.model_output import load_component_energy
 
+def get_conversion_stages() -> list[dict]:
+    """
+    Get the converters of the system based on the connection types and the current type of the microgrid.
+    Each converter is described by the components feeding it, the efficiency for energy flowing to the microgrid
+    and the efficiency for energy flowing from the microgrid.
+    """
+    stages = []
+    alternating_current = st.session_state.current_type == "Alternating Current"
+    dc_system = (alternating_current and st.session_state.solar_pv and st.session_state.battery
+                 and st.session_state.solar_pv_connection_type == "Connected with the same Inverter as the Battery to the Microgrid")
 
-def conversion_losses_validation() -> None:
+    if st.session_state.solar_pv and st.session_state.solar_pv_connection_type == "Connected with a seperate Inverter to the Microgrid":
+        stages.append({
+            "name": "solar_pv",
+            "converter": "solar_pv",
+            "components": ["solar_pv"],
+            "efficiency_out": st.session_state.solar_pv_conversion_efficiency / 100,
+            "efficiency_in": st.session_state.solar_pv_conversion_efficiency / 100,
+        })
+    if st.session_state.wind and st.session_state.wind_connection_type in ["Connected with a AC-AC Converter to the Microgrid", "Connected with a Rectifier to the Microgrid"]:
+        stages.append({
+            "name": "wind",
+            "converter": "wind",
+            "components": ["wind"],
+            "efficiency_out": st.session_state.wind_conversion_efficiency / 100,
+            "efficiency_in": st.session_state.wind_conversion_efficiency / 100,
+        })
+    if st.session_state.generator and not alternating_current:
+        stages.append({
+            "name": "generator",
+            "converter": "generator",
+            "components": ["generator"],
+            "efficiency_out": st.session_state.generator_conversion_efficiency / 100,
+            "efficiency_in": st.session_state.generator_conversion_efficiency / 100,
+        })
+    if st.session_state.battery and alternating_current:
+        stages.append({
+            "name": "DC System" if dc_system else "battery",
+            "converter": "battery",
+            "components": ["solar_pv", "battery"] if dc_system else ["battery"],
+            "efficiency_out": st.session_state.battery_conversion_efficiency_dc_ac / 100,
+            "efficiency_in": st.session_state.battery_conversion_efficiency_ac_dc / 100,
+        })
+    return stages
+
+def load_efficiency_curves(stages: list) -> dict:
+    """
+    Load the part-load efficiency curve of each converter once.
+    Returns a dictionary with the normalized loads [%] and efficiencies (%) sorted by load for each converter.
+    Converters whose curve was never saved are left out and keep their constant efficiency.
+    """
+    project_name = st.session_state.get("project_name")
+    efficiency_curves = {}
+    for stage in stages:
+        converter = stage["converter"]
+        if converter in efficiency_curves:
+            continue
+        curve_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"conversion_efficiency_curve_{converter}.csv"
+        if not curve_path.exists():
+            st.warning(f"No part-load efficiency curve saved for the {converter} converter, its constant efficiency is used instead.")
+            continue
+        curve_df = pd.read_csv(curve_path).sort_values(by="Load [%]")
+        efficiency_curves[converter] = (curve_df["Load [%]"].to_numpy(dtype=float), curve_df["Efficiency (%)"].to_numpy(dtype=float))
+    return efficiency_curves
 
+def part_load_efficiency(energy: np.ndarray, rated_power: float, efficiency_curve: tuple) -> np.ndarray:
+    """
+    Interpolate the efficiency for an array of energy flows on the normalized load of the converter.
+    Loads outside of the curve take the efficiency of the closest point of the curve.
+    """
+    if not rated_power > 0:
+        raise ValueError(f"The rated power of a converter with a part-load efficiency curve must be positive, got {rated_power} W.")
+    loads, efficiencies = efficiency_curve
+    normalized_load = np.abs(energy) / rated_power * 100
+    return np.interp(normalized_load, loads, efficiencies) / 100
+
+def calculate_benchmark_losses(energy: np.ndarray, efficiency_out: np.ndarray, efficiency_in: np.ndarray) -> np.ndarray:
+    """
+    Calculate the conversion losses for an array of energy flows through the converters.
+    Positive energy flows to the microgrid and loses (1 - efficiency_out) of the energy,
+    negative energy flows from the microgrid and requires (1 / efficiency_in - 1) additional energy.
+    The efficiencies are either constant per converter or given for every hour and converter.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        losses = np.where(
+            energy > 0,
+            (1 - efficiency_out) * energy,
+            (1 / efficiency_in - 1) * np.abs(energy)
+        )
+    return np.where(energy == 0, 0.0, losses)
+
+def conversion_losses_validation() -> None:
+    """Calculate the benchmark conversion losses of all converters and save them together with the model losses in a CSV file."""
     st.write("--------------------")
-    progress_steps = 1
+    progress_step = 1.0 / 3
     conversion_progress = 0
     conversion_progress_bar = st.progress(conversion_progress)
     conversion_text = st.empty()
 
-    used_components = []
-    if st.session_state.solar_pv and st.session_state.solar_pv_connection_type == "Connected with a seperate Inverter to the Microgrid":
-        used_components.append("solar_pv")
-        progress_steps += 1
-    if st.session_state.wind and st.session_state.wind_connection_type == "Connected with a AC-AC Converter to the Microgrid":
-        used_components.append("wind")
-        progress_steps += 1
-    if st.session_state.generator and st.session_state.current_type == "Direct Current":
-        used_components.append("generator")
-        progress_steps += 1
-    if st.session_state.battery:
-        if st.session_state.solar_pv and st.session_state.solar_pv_connection_type == "Connected with the same Inverter as the Battery to the Microgrid":
-            used_components.append("DC System")
-        else:
-            used_components.append("battery")
-        progress_steps += 1
-
-    progress_step = 1.0 / progress_steps
+    stages = get_conversion_stages()
+    stage_names = [stage["name"] for stage in stages]
 
     project_name = st.session_state.get("project_name")
-    project_folder_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_conversion_losses.csv"
-    losses_df = pd.read_csv(project_folder_path)
+    losses_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / "model_conversion_losses.csv"
+    losses_df = pd.read_csv(losses_path)
+    time_index = pd.DatetimeIndex(pd.to_datetime(losses_df["Time"]))
 
-    result_df = pd.DataFrame()
+    # Load the energy of all needed components once onto the time axis of the model losses
+    conversion_text.write("Loading component energy for " + ", ".join(stage_names))
+    components = list(dict.fromkeys(component for stage in stages for component in stage["components"]))
+    component_energy = load_component_energy(components, time_index)
+    conversion_progress += progress_step
+    conversion_progress_bar.progress(conversion_progress)
 
-    for component in used_components:
-        conversion_text.write(f"Calculating conversion losses for {component}")
-        if not component == "DC System" and not component == "battery":
-            component_energy_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_{component}.csv"
-            energy_df = pd.read_csv(component_energy_path)
-            energy = energy_df[f"Model {component} Energy Total [Wh]"]
-            if f"Model {component} Curtailed Energy Total [Wh]" in solar_pv_energy_df.columns:
+    # Energy through each converter (hours x converters) from the components connected to it
+    conversion_text.write("Calculating benchmark conversion losses")
+    connection_matrix = np.array([[component in stage["components"] for stage in stages] for component in components], dtype=float).reshape(len(components), len(stages))
+    stage_energy = np.nan_to_num(component_energy.to_numpy()) @ connection_matrix
+    efficiency_out = np.array([stage["efficiency_out"] for stage in stages])
+    efficiency_in = np.array([stage["efficiency_in"] for stage in stages])
+    if st.session_state.conversion_part_load_efficiency:
+        # Replace the constant efficiencies by the part-load efficiencies of every hour for converters with a curve
+        efficiency_curves = load_efficiency_curves(stages)
+        efficiency_out = np.broadcast_to(efficiency_out, stage_energy.shape).copy()
+        efficiency_in = np.broadcast_to(efficiency_in, stage_energy.shape).copy()
+        for index, stage in enumerate(stages):
+            converter = stage["converter"]
+            if converter not in efficiency_curves:
+                continue
+            rated_power = st.session_state[f"{converter}_conversion_rated_power"]
+            efficiency_out[:, index] = part_load_efficiency(stage_energy[:, index], rated_power, efficiency_curves[converter])
+            efficiency_in[:, index] = efficiency_out[:, index]
+    benchmark_losses = calculate_benchmark_losses(stage_energy, efficiency_out, efficiency_in)
+    conversion_progress += progress_step
+    conversion_progress_bar.progress(conversion_progress)
 
-                st.write("Curtailed Energy Total [Wh] found for", component)
-                energy -= energy_df[f"Model {component} Curtailed Energy Total [Wh]"]
-            losses = losses_df[f'{component} Conversion Losses [Wh]']
-            benchmark_losses = (1-(st.session_state[f"{component}_conversion_efficiency"]/100)) * energy
-            component_result_df = pd.DataFrame({
-                "Time": energy_df["Time"],
-                f"{component} Conversion Losses [Wh]": losses,
-                f"{component} Benchmark Losses [Wh]": benchmark_losses
-            })
-            if result_df.empty:
-                result_df = component_result_df
-            else:
-                result_df = result_df.merge(component_result_df, on="Time", how="outer")
-        elif component == "DC System":
-            solar_pv_energy_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_solar_pv.csv"
-            battery_energy_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_battery.csv"
-            solar_pv_energy_df = pd.read_csv(solar_pv_energy_path)
-            battery_energy_df = pd.read_csv(battery_energy_path)
-            solar_pv_energy = solar_pv_energy_df["Model solar_pv Energy Total [Wh]"]
-            if "Model solar_pv Curtailed Energy Total [Wh]" in solar_pv_energy_df.columns:
-                solar_pv_energy -= solar_pv_energy_df["Model solar_pv Curtailed Energy Total [Wh]"]
-            battery_energy = battery_energy_df["Model battery Energy Total [Wh]"]
-            system_energy = solar_pv_energy + battery_energy
-            losses = losses_df["DC System Conversion Losses [Wh]"]
-            benchmark_losses = pd.Series([
-                (1 - (st.session_state["battery_conversion_efficiency_dc_ac"]/100)) * energy if energy > 0 else ((1 / (st.session_state["battery_conversion_efficiency_ac_dc"]/100)) - 1) * abs(energy)
-                for energy in system_energy
-            ])
-            component_result_df = pd.DataFrame({
-                "Time": solar_pv_energy_df["Time"],
-                "DC System Conversion Losses [Wh]": losses,
-                "DC System Benchmark Losses [Wh]": benchmark_losses
-            })
-            if result_df.empty:
-                result_df = component_result_df
-            else:
-                result_df = result_df.merge(component_result_df, on="Time", how="outer")
-        elif component == "battery":
-            battery_energy_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_battery.csv"
-            battery_energy_df = pd.read_csv(battery_energy_path)
-            battery_energy = battery_energy_df["Model battery Energy Total [Wh]"]
-            losses = losses_df["Battery Conversion Losses [Wh]"]
-            benchmark_losses = pd.Series([
-                (1 - (st.session_state["battery_conversion_efficiency_dc_ac"]/100)) * energy if energy > 0 else ((1 / (st.session_state["battery_conversion_efficiency_ac_dc"]/100)) - 1) * abs(energy)
-                for energy in battery_energy
-            ])
-            component_result_df = pd.DataFrame({
-                "Time": battery_energy_df["Time"],
-                "Battery Conversion Losses [Wh]": losses,
-                "Battery Benchmark Losses [Wh]": benchmark_losses
-            })
-            if result_df.empty:
-                result_df = component_result_df
-            else:
-                result_df = result_df.merge(component_result_df, on="Time", how="outer")
-        conversion_progress += progress_step
-        conversion_progress_bar.progress(conversion_progress)
+    result_df = pd.DataFrame({"Time": losses_df["Time"]})
+    for index, name in enumerate(stage_names):
+        result_df[f"{name} Conversion Losses [Wh]"] = losses_df[f"{name} Conversion Losses [Wh]"]
+        result_df[f"{name} Benchmark Losses [Wh]"] = benchmark_losses[:, index]
 
-    conversion_text.write("Saving Solar PV Benchmark Results")   
+    conversion_text.write("Saving Conversion Losses Benchmark Results")
     results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "conversion_losses_validation.csv"
-    result_df.to_csv(results_data_path)
+    result_df.to_csv(results_data_path, index=False)
     conversion_text.write("Conversion Losses Benchmark Calculation Completed.")
     conversion_progress += progress_step
-    conversion_progress_bar.progress(conversion_progress)
\ No newline at end of file
+    conversion_progress_bar.progress(conversion_progress)
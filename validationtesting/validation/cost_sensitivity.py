@@ -0,0 +1,190 @@
+"""
+This module is used to calculate the sensitivity of the discounted project cost to the discount rate, the investment cost and the fuel price.
+All combinations of the given grids are evaluated at once by broadcasting the discount factors over the cash flows of all units
+and over the yearly benchmark fuel consumption of the generator.
+The results are saved as a sweep table and a tornado summary in CSV files.
+"""
+
+import streamlit as st
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.validation.cost_validation import compile_cost_units, get_unit_costs
+
+CASH_FLOW_CATEGORIES = ["Investment", "Operation", "Salvage"]
+
+def get_cash_flows(start_date: datetime, end_date: datetime, used_components: list) -> pd.DataFrame:
+    """
+    Collect the undiscounted cash flows of all units with the time in years at which they are discounted.
+    The timing follows get_discounted_cost, so that the sweep reproduces the results of the cost validation.
+    """
+    start_date = datetime.combine(start_date, datetime.min.time())
+    end_date = datetime.combine(end_date, datetime.min.time())
+    project_years = (end_date - start_date).days / 365
+    cash_flows = []
+    for component in used_components:
+        units = compile_cost_units(component)
+        for unit in range(units.num_units):
+            installation_date, investment_cost, operation_cost, end_of_project_cost, lifetime = get_unit_costs(units, unit)
+            cash_flows.append((component, unit + 1, "Investment", (installation_date - start_date).days / 365, investment_cost))
+            for year in range(0, int(lifetime) + 1):
+                if installation_date.year + year <= end_date.year:
+                    cash_flows.append((component, unit + 1, "Operation", year + 1, operation_cost))
+            remaining_lifetime = max(0, lifetime - ((end_date - installation_date).days / 365))
+            cash_flows.append((component, unit + 1, "Salvage", project_years, end_of_project_cost * (remaining_lifetime / lifetime)))
+    return pd.DataFrame(cash_flows, columns=["Component", "Unit", "Category", "Time [years]", "Amount [$]"])
+
+def get_fuel_cash_flows(start_date: datetime) -> pd.DataFrame:
+    """
+    Aggregate the hourly benchmark fuel consumption of the generator to yearly fuel costs at the base fuel price.
+    The discounting of the generator validation is done per year, so the yearly sums are discounted identically.
+    """
+    project_name = st.session_state.get("project_name")
+    data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "generator_validation.csv"
+    generator_df = pd.read_csv(data_path, usecols=["Time", "Benchmark Fuel Consumption generator Total [l]"])
+    years = pd.to_datetime(generator_df["Time"]).dt.year.to_numpy()
+    fuel_consumption = generator_df["Benchmark Fuel Consumption generator Total [l]"].to_numpy(dtype=float)
+
+    unique_years, year_index = np.unique(years, return_inverse=True)
+    yearly_fuel_consumption = np.bincount(year_index, weights=fuel_consumption)
+
+    if st.session_state.generator_variable_fuel_price:
+        fuel_price_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / "generator_fuel_price.csv"
+        fuel_price_df = pd.read_csv(fuel_price_path)
+        fuel_prices = fuel_price_df.set_index("Year")["Fuel Price [$/l]"]
+        fuel_price = fuel_prices.reindex(unique_years).fillna(fuel_prices.iloc[-1]).to_numpy(dtype=float)
+    else:
+        fuel_price = np.full(len(unique_years), st.session_state.generator_fuel_price, dtype=float)
+
+    return pd.DataFrame({
+        "Year": unique_years,
+        "Time [years]": (unique_years - start_date.year) + 1,
+        "Fuel Consumption [l]": yearly_fuel_consumption,
+        "Amount [$]": yearly_fuel_consumption * fuel_price,
+    })
+
+def discounted_cost_grid(cash_flows: pd.DataFrame, fuel_cash_flows: pd.DataFrame, discount_rates: np.ndarray,
+                         investment_cost_multipliers: np.ndarray, fuel_price_multipliers: np.ndarray) -> dict:
+    """
+    Calculate the discounted costs for all combinations of discount rates, investment cost multipliers and fuel price multipliers.
+    Returns a dictionary with one array of shape (discount rates, investment cost multipliers, fuel price multipliers) per cost category.
+    The operation cost is a share of the investment cost and therefore scales with the investment cost multiplier.
+    """
+    discount_rates = np.asarray(discount_rates, dtype=float)[:, None]
+    investment_cost_multipliers = np.asarray(investment_cost_multipliers, dtype=float)[None, :, None]
+    fuel_price_multipliers = np.asarray(fuel_price_multipliers, dtype=float)[None, None, :]
+
+    # Discount factors of all cash flows for all discount rates, shape (discount rates, cash flows)
+    discount_factors = (1 + discount_rates) ** -cash_flows["Time [years]"].to_numpy(dtype=float)[None, :]
+    amounts = cash_flows["Amount [$]"].to_numpy(dtype=float)
+    categories = cash_flows["Category"].to_numpy()
+    discounted = {}
+    for category in CASH_FLOW_CATEGORIES:
+        mask = categories == category
+        discounted[category] = (discount_factors[:, mask] @ amounts[mask])[:, None, None]
+
+    if fuel_cash_flows is not None and not fuel_cash_flows.empty:
+        fuel_discount_factors = (1 + discount_rates) ** -fuel_cash_flows["Time [years]"].to_numpy(dtype=float)[None, :]
+        discounted_fuel = (fuel_discount_factors @ fuel_cash_flows["Amount [$]"].to_numpy(dtype=float))[:, None, None]
+    else:
+        discounted_fuel = np.zeros((discount_rates.shape[0], 1, 1))
+
+    shape = (discount_rates.shape[0], investment_cost_multipliers.shape[1], fuel_price_multipliers.shape[2])
+    grid = {
+        "Discounted Investment Cost [$]": np.broadcast_to(discounted["Investment"] * investment_cost_multipliers, shape),
+        "Discounted Operation Cost [$]": np.broadcast_to(discounted["Operation"] * investment_cost_multipliers, shape),
+        "Discounted Salvage Value [$]": np.broadcast_to(discounted["Salvage"], shape),
+        "Discounted Fuel Cost [$]": np.broadcast_to(discounted_fuel * fuel_price_multipliers, shape),
+    }
+    grid["Total Discounted Cost [$]"] = sum(grid.values())
+    return grid
+
+def tornado_summary(cash_flows: pd.DataFrame, fuel_cash_flows: pd.DataFrame, base_discount_rate: float,
+                    discount_rates: list, investment_cost_multipliers: list, fuel_price_multipliers: list) -> pd.DataFrame:
+    """
+    Vary each parameter between the lowest and highest value of its grid while keeping the others at their base value.
+    """
+    base = {"Discount Rate [%]": base_discount_rate, "Investment Cost Multiplier": 1.0, "Fuel Price Multiplier": 1.0}
+    parameter_grids = {
+        "Discount Rate [%]": discount_rates,
+        "Investment Cost Multiplier": investment_cost_multipliers,
+        "Fuel Price Multiplier": fuel_price_multipliers,
+    }
+    base_total = discounted_cost_grid(cash_flows, fuel_cash_flows, [base_discount_rate / 100], [1.0], [1.0])["Total Discounted Cost [$]"].item()
+
+    rows = []
+    for parameter, values in parameter_grids.items():
+        low, high = min(values), max(values)
+        totals = []
+        for value in (low, high):
+            setting = {**base, parameter: value}
+            totals.append(discounted_cost_grid(
+                cash_flows, fuel_cash_flows,
+                [setting["Discount Rate [%]"] / 100],
+                [setting["Investment Cost Multiplier"]],
+                [setting["Fuel Price Multiplier"]],
+            )["Total Discounted Cost [$]"].item())
+        rows.append({
+            "Parameter": parameter,
+            "Base Value": base[parameter],
+            "Low Value": low,
+            "High Value": high,
+            "Base Total Discounted Cost [$]": base_total,
+            "Total Discounted Cost at Low Value [$]": totals[0],
+            "Total Discounted Cost at High Value [$]": totals[1],
+            "Swing [$]": abs(totals[1] - totals[0]),
+        })
+    return pd.DataFrame(rows).sort_values(by="Swing [$]", ascending=False, ignore_index=True)
+
+def cost_sensitivity_validation() -> None:
+    """Calculate the discounted cost for all combinations of the sensitivity grids and save the sweep and tornado tables in CSV files."""
+    project_name = st.session_state.get("project_name")
+    start_date = st.session_state.start_date
+    end_date = st.session_state.end_date
+
+    discount_rates = list(st.session_state.sensitivity_discount_rates)
+    investment_cost_multipliers = list(st.session_state.sensitivity_investment_cost_multipliers)
+    fuel_price_multipliers = list(st.session_state.sensitivity_fuel_price_multipliers)
+
+    used_components = []
+    if st.session_state.solar_pv:
+        used_components.append("solar_pv")
+    if st.session_state.wind:
+        used_components.append("wind")
+    if st.session_state.generator:
+        used_components.append("generator")
+    if st.session_state.battery:
+        used_components.append("battery")
+
+    cash_flows = get_cash_flows(start_date, end_date, used_components)
+
+    fuel_cash_flows = None
+    generator_results_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "generator_validation.csv"
+    if st.session_state.generator and st.session_state.technical_validation:
+        if generator_results_path.exists():
+            fuel_cash_flows = get_fuel_cash_flows(start_date)
+        else:
+            st.warning("No generator validation results found. Run the technical validation to include the fuel cost in the sensitivity analysis.")
+
+    grid = discounted_cost_grid(cash_flows, fuel_cash_flows, np.asarray(discount_rates) / 100, investment_cost_multipliers, fuel_price_multipliers)
+
+    # Tidy table with one row per combination
+    discount_rate_grid, investment_grid, fuel_grid = np.meshgrid(discount_rates, investment_cost_multipliers, fuel_price_multipliers, indexing="ij")
+    sweep = pd.DataFrame({
+        "Discount Rate [%]": discount_rate_grid.ravel(),
+        "Investment Cost Multiplier": investment_grid.ravel(),
+        "Fuel Price Multiplier": fuel_grid.ravel(),
+        **{column: values.ravel() for column, values in grid.items()},
+    })
+
+    tornado = tornado_summary(
+        cash_flows, fuel_cash_flows, st.session_state.discount_rate,
+        discount_rates, investment_cost_multipliers, fuel_price_multipliers
+    )
+
+    results_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results"
+    sweep.to_csv(results_path / "cost_sensitivity.csv", index=False)
+    tornado.to_csv(results_path / "cost_sensitivity_tornado.csv", index=False)
+
+    st.write(tornado)
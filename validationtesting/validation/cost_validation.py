@@ -6,6 +6,27 @@ import streamlit as st
 from datetime import datetime
 import pandas as pd
 from config.path_manager import PathManager
+from validationtesting.validation.project_model import UNIT_KEYS, UnitTable, compile_unit_table
+
+def compile_cost_units(component: str) -> UnitTable:
+    """Compile the units of a component with the cost parameters and the nominal capacity of their type."""
+    return compile_unit_table(component, [
+        f"{component}_investment_cost", f"{component}_maintenance_cost", f"{component}_end_of_project_cost",
+        f"{component}_exclude_investment_cost", UNIT_KEYS[component]["capacity"],
+    ])
+
+def get_unit_costs(units: UnitTable, unit: int) -> tuple:
+    """
+    Get the installation date, investment cost, yearly operation cost, end of project cost and lifetime of one unit.
+    """
+    component = units.component
+    nominal_capacity = float(units[UNIT_KEYS[component]["capacity"]][unit])
+    investment_cost = float(units[f"{component}_investment_cost"][unit]) * nominal_capacity
+    operation_cost = float(units[f"{component}_maintenance_cost"][unit]) / 100 * investment_cost
+    end_of_project_cost = float(units[f"{component}_end_of_project_cost"][unit]) * nominal_capacity
+    if units[f"{component}_exclude_investment_cost"][unit]:
+        investment_cost = 0
+    return units.installation_dates[unit], investment_cost, operation_cost, end_of_project_cost, float(units.lifetime[unit])
 
 def get_discounted_cost(start_date, end_date, installation_date, investment_cost, operation_cost, end_of_project_cost, discount_rate, lifetime):
     """
@@ -49,30 +70,19 @@ def cost_validation() -> None:
     economic_validation = pd.DataFrame(columns=["Component", "Unit", "Total Discounted Cost [$]", "Discounted Investment Cost [$]", "Discounted Operation Cost [$]", "Discounted Salvage Value [$]", "Discounted Fuel Cost [$]"])
     project_name = st.session_state.get("project_name")
 
-    if st.session_state.solar_pv:
+    for component in used_components:
         total_discounted_investment_cost = 0
         total_discounted_operation_cost = 0
         total_discounted_salvage_value = 0
-        for unit in range(st.session_state.solar_pv_num_units):
-            installation_date = st.session_state.installation_dates[unit]
-            type = st.session_state.solar_pv_type[unit]
-            type_int = int(type.replace("Type ", ""))
-            investment_cost = st.session_state.solar_pv_investment_cost[type_int-1]
-            operation_cost = st.session_state.solar_pv_maintenance_cost[type_int-1] / 100
-            end_of_project_cost = st.session_state.solar_pv_end_of_project_cost[type_int-1]
-            nominal_capacity = st.session_state.pv_nominal_power[type_int-1]
-            investment_cost = investment_cost * nominal_capacity
-            operation_cost = operation_cost * investment_cost
-            end_of_project_cost = end_of_project_cost * nominal_capacity
-            if st.session_state.solar_pv_exclude_investment_cost[type_int-1]:
-                investment_cost = 0
-            lifetime = st.session_state.pv_lifetime[type_int-1]
+        units = compile_cost_units(component)
+        for unit in range(units.num_units):
+            installation_date, investment_cost, operation_cost, end_of_project_cost, lifetime = get_unit_costs(units, unit)
             discounted_investment_cost, discounted_operation_cost, discounted_salvage_value = get_discounted_cost(start_date, end_date, installation_date, investment_cost, operation_cost, end_of_project_cost, discount_rate, lifetime)
             total_discounted_investment_cost += discounted_investment_cost
             total_discounted_operation_cost += discounted_operation_cost
             total_discounted_salvage_value += discounted_salvage_value
             economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-                "Component": "solar_pv", 
+                "Component": component, 
                 "Unit": unit+1, 
                 "Discounted Investment Cost [$]": discounted_investment_cost, 
                 "Discounted Operation Cost [$]": discounted_operation_cost,
@@ -80,127 +90,13 @@ def cost_validation() -> None:
             }])], ignore_index=True)
         
         economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-            "Component": "solar_pv", 
-            "Unit": "Total", 
-            "Discounted Investment Cost [$]": total_discounted_investment_cost, 
-            "Discounted Operation Cost [$]": total_discounted_operation_cost,
-            "Discounted Salvage Value [$]": total_discounted_salvage_value
-        }])], ignore_index=True)
-
-    if st.session_state.wind:
-        total_discounted_investment_cost = 0
-        total_discounted_operation_cost = 0
-        total_discounted_salvage_value = 0
-        for unit in range(st.session_state.wind_num_units):
-            installation_date = st.session_state.wind_installation_dates[unit]
-            type = st.session_state.wind_type[unit]
-            type_int = int(type.replace("Type ", ""))
-            investment_cost = st.session_state.wind_investment_cost[type_int-1]
-            operation_cost = st.session_state.wind_maintenance_cost[type_int-1] / 100
-            end_of_project_cost = st.session_state.wind_end_of_project_cost[type_int-1]
-            nominal_capacity = st.session_state.wind_rated_power[type_int-1]
-            investment_cost = investment_cost * nominal_capacity
-            operation_cost = operation_cost * investment_cost
-            end_of_project_cost = end_of_project_cost * nominal_capacity
-            if st.session_state.wind_exclude_investment_cost[type_int-1]:
-                investment_cost = 0
-            lifetime = st.session_state.wind_lifetime[type_int-1]
-            discounted_investment_cost, discounted_operation_cost, discounted_salvage_value = get_discounted_cost(start_date, end_date, installation_date, investment_cost, operation_cost, end_of_project_cost, discount_rate, lifetime)
-            total_discounted_investment_cost += discounted_investment_cost
-            total_discounted_operation_cost += discounted_operation_cost
-            total_discounted_salvage_value += discounted_salvage_value
-            economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-                "Component": "wind", 
-                "Unit": unit+1, 
-                "Discounted Investment Cost [$]": discounted_investment_cost, 
-                "Discounted Operation Cost [$]": discounted_operation_cost,
-                "Discounted Salvage Value [$]": discounted_salvage_value
-            }])], ignore_index=True)
-        economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-            "Component": "wind", 
+            "Component": component, 
             "Unit": "Total", 
             "Discounted Investment Cost [$]": total_discounted_investment_cost, 
             "Discounted Operation Cost [$]": total_discounted_operation_cost,
             "Discounted Salvage Value [$]": total_discounted_salvage_value
         }])], ignore_index=True)
 
-
-    if st.session_state.generator:
-        total_discounted_investment_cost = 0
-        total_discounted_operation_cost = 0
-        total_discounted_salvage_value = 0
-        for unit in range(st.session_state.generator_num_units):
-            installation_date = st.session_state.generator_installation_dates[unit]
-            type = st.session_state.generator_type[unit]
-            type_int = int(type.replace("Type ", ""))
-            investment_cost = st.session_state.generator_investment_cost[type_int-1]
-            operation_cost = st.session_state.generator_maintenance_cost[type_int-1] / 100
-            end_of_project_cost = st.session_state.generator_end_of_project_cost[type_int-1]
-            nominal_capacity = st.session_state.generator_max_power[type_int-1]
-            investment_cost = investment_cost * nominal_capacity
-            operation_cost = operation_cost * investment_cost
-            end_of_project_cost = end_of_project_cost * nominal_capacity
-            if st.session_state.generator_exclude_investment_cost[type_int-1]:
-                investment_cost = 0
-            lifetime = st.session_state.generator_lifetime[type_int-1]
-            discounted_investment_cost, discounted_operation_cost, discounted_salvage_value = get_discounted_cost(start_date, end_date, installation_date, investment_cost, operation_cost, end_of_project_cost, discount_rate, lifetime)
-            total_discounted_investment_cost += discounted_investment_cost
-            total_discounted_operation_cost += discounted_operation_cost
-            total_discounted_salvage_value += discounted_salvage_value
-            economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-                "Component": "generator", 
-                "Unit": unit+1, 
-                "Discounted Investment Cost [$]": discounted_investment_cost, 
-                "Discounted Operation Cost [$]": discounted_operation_cost,
-                "Discounted Salvage Value [$]": discounted_salvage_value
-            }])], ignore_index=True)
-        economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-            "Component": "generator", 
-            "Unit": "Total", 
-            "Discounted Investment Cost [$]": total_discounted_investment_cost, 
-            "Discounted Operation Cost [$]": total_discounted_operation_cost,
-            "Discounted Salvage Value [$]": total_discounted_salvage_value
-        }])], ignore_index=True)
-
-    if st.session_state.battery:
-        total_discounted_investment_cost = 0
-        total_discounted_operation_cost = 0
-        total_discounted_salvage_value = 0
-        for unit in range(st.session_state.battery_num_units):
-            installation_date = st.session_state.battery_installation_dates[unit]
-            type = st.session_state.battery_type[unit]
-            type_int = int(type.replace("Type ", ""))
-            investment_cost = st.session_state.battery_investment_cost[type_int-1]
-            operation_cost = st.session_state.battery_maintenance_cost[type_int-1] / 100
-            end_of_project_cost = st.session_state.battery_end_of_project_cost[type_int-1]
-            nominal_capacity = st.session_state.pv_nominal_power[type_int-1]
-            investment_cost = investment_cost * nominal_capacity
-            operation_cost = operation_cost * investment_cost
-            end_of_project_cost = end_of_project_cost * nominal_capacity
-            if st.session_state.battery_exclude_investment_cost[type_int-1]:
-                investment_cost = 0
-            lifetime = st.session_state.battery_lifetime[type_int-1]
-            discounted_investment_cost, discounted_operation_cost, discounted_salvage_value = get_discounted_cost(start_date, end_date, installation_date, investment_cost, operation_cost, end_of_project_cost, discount_rate, lifetime)
-            total_discounted_investment_cost += discounted_investment_cost
-            total_discounted_operation_cost += discounted_operation_cost
-            total_discounted_salvage_value += discounted_salvage_value
-            economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-                "Component": "battery", 
-                "Unit": unit+1, 
-                "Discounted Investment Cost [$]": discounted_investment_cost, 
-                "Discounted Operation Cost [$]": discounted_operation_cost,
-                "Discounted Salvage Value [$]": discounted_salvage_value
-            }])], ignore_index=True)
-        economic_validation = pd.concat([economic_validation, pd.DataFrame([{
-            "Component": "battery", 
-            "Unit": "Total", 
-            "Discounted Investment Cost [$]": total_discounted_investment_cost, 
-            "Discounted Operation Cost [$]": total_discounted_operation_cost,
-            "Discounted Salvage Value [$]": total_discounted_salvage_value
-        }])], ignore_index=True)
-
-
-
     if st.session_state.technical_validation and st.session_state.economic_validation:
         for component in used_components:
             if component == "generator":
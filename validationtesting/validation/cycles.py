@@ -0,0 +1,168 @@
+"""
+This module is used to count the charge cycles of the battery from the benchmark state of charge with rainflow counting.
+The turning points of the SoC are extracted with NumPy and closed into full and half cycles by the rainflow kernel.
+Each cycle has a depth of discharge, a mean SoC and a C-rate. The cycles are stored in a cycle table, and the equivalent
+full cycles and the histograms of the depth of discharge and of the C-rate are stored per year and battery, so the
+results page can show the cyclic stress without reading the hourly results. Long series have hundreds of thousands of
+cycles, so the cycle table is stored as Parquet and the small tables per year as CSV.
+"""
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+from config.path_manager import PathManager
+from validationtesting.validation.kernels import rainflow_cycles
+
+CYCLE_COLUMNS = ["Battery", "Start", "End", "Depth of Discharge [%]", "Mean SoC [%]", "Count", "Duration [h]", "C-Rate [1/h]"]
+STATISTICS_COLUMNS = ["Battery", "Year", "Equivalent Full Cycles", "Full Cycles", "Half Cycles", "Mean Depth of Discharge [%]",
+                      "Max Depth of Discharge [%]"]
+
+# Bin edges of the histograms, the depth of discharge in % and the C-rate in 1/h
+DOD_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, np.inf]
+C_RATE_BINS = [0, 0.1, 0.25, 0.5, 1, 2, np.inf]
+
+def get_cycles_path(name: str, table: str):
+    """Get the path of a cycle table of a result: cycles, statistics, dod_histogram or c_rate_histogram."""
+    project_name = st.session_state.get("project_name")
+    suffix = "parquet" if table == "cycles" else "csv"
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "cycles" / f"{name}_{table}.{suffix}"
+
+def bin_labels(bins: list) -> list:
+    """Get the labels of histogram bins, e.g. 0-10 and >100 for the open last bin."""
+    return [f"{low:g}-{high:g}" if np.isfinite(high) else f">{low:g}" for low, high in zip(bins[:-1], bins[1:])]
+
+def turning_points(values) -> np.ndarray:
+    """
+    Get the indices of the turning points of a series, the first and the last value are always turning points.
+    Repeated values are skipped, of a plateau at a turning point the first index is taken.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return np.arange(len(values))
+    changes = np.flatnonzero(np.diff(values) != 0)
+    if len(changes) == 0:
+        return np.array([0, len(values) - 1])
+    directions = np.sign(values[changes + 1] - values[changes])
+    reversed_direction = directions[1:] != directions[:-1]
+    return np.concatenate(([0], changes[:-1][reversed_direction] + 1, [len(values) - 1]))
+
+def step_hours(times: pd.DatetimeIndex) -> np.ndarray:
+    """Get the length of each time step in hours, the last step is as long as the one before."""
+    hours = np.asarray((times[1:] - times[:-1]) / pd.Timedelta(hours=1), dtype=float)
+    return np.append(hours, hours[-1] if len(hours) else 1.0)
+
+def count_cycles(times, soc, battery: str) -> pd.DataFrame:
+    """
+    Count the rainflow cycles of a state of charge series (fraction of the capacity).
+    The depth of discharge is the SoC range of a cycle and the C-rate the range divided by the time between its turning points.
+    """
+    times = pd.DatetimeIndex(times)
+    soc = np.asarray(soc, dtype=float)
+    points = turning_points(soc)
+    starts, ends, counts = rainflow_cycles(soc[points])
+    first, last = points[starts], points[ends]
+    depth = np.abs(soc[last] - soc[first])
+    duration = (times[last] - times[first]) / pd.Timedelta(hours=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c_rate = np.where(duration > 0, depth / duration, np.nan)
+    return pd.DataFrame({
+        "Battery": battery,
+        "Start": times[first],
+        "End": times[last],
+        "Depth of Discharge [%]": depth * 100,
+        "Mean SoC [%]": (soc[first] + soc[last]) / 2 * 100,
+        "Count": counts,
+        "Duration [h]": np.asarray(duration, dtype=float),
+        "C-Rate [1/h]": c_rate,
+    }, columns=CYCLE_COLUMNS)
+
+def cycle_statistics(cycles: pd.DataFrame) -> pd.DataFrame:
+    """
+    Get the equivalent full cycles, the number of full and half cycles and the depth of discharge per battery and year.
+    A cycle counts in the year it starts in, one full cycle of 100% depth of discharge is one equivalent full cycle.
+    """
+    cycles = cycles.assign(
+        Year=cycles["Start"].dt.year,
+        Weighted=cycles["Count"] * cycles["Depth of Discharge [%]"],
+        Full=cycles["Count"] == 1,
+        Half=cycles["Count"] == 0.5,
+    )
+    statistics = cycles.groupby(["Battery", "Year"]).agg(
+        Weighted=("Weighted", "sum"),
+        Count=("Count", "sum"),
+        Full=("Full", "sum"),
+        Half=("Half", "sum"),
+        Maximum=("Depth of Discharge [%]", "max"),
+    )
+    return pd.DataFrame({
+        "Equivalent Full Cycles": statistics["Weighted"] / 100,
+        "Full Cycles": statistics["Full"].astype(int),
+        "Half Cycles": statistics["Half"].astype(int),
+        "Mean Depth of Discharge [%]": statistics["Weighted"] / statistics["Count"],
+        "Max Depth of Discharge [%]": statistics["Maximum"],
+    }).reset_index()
+
+def dod_histogram(cycles: pd.DataFrame) -> pd.DataFrame:
+    """Get the number of cycles per depth of discharge bin, battery and year, half cycles count as 0.5."""
+    depth_bins = pd.cut(cycles["Depth of Discharge [%]"], DOD_BINS, labels=bin_labels(DOD_BINS), include_lowest=True)
+    histogram = cycles["Count"].groupby([cycles["Battery"], cycles["Start"].dt.year.rename("Year"), depth_bins], observed=False).sum()
+    return histogram.unstack(fill_value=0).reset_index()
+
+def c_rate_histogram(times, hours, battery_energy, capacity, battery: str) -> pd.DataFrame:
+    """
+    Get the hours per C-rate bin and year of a battery, the C-rate is the battery power divided by the capacity.
+    hours is the length of each time step, taken from the full time axis so that gaps between active periods are not counted.
+    """
+    times = pd.DatetimeIndex(times)
+    hours = np.asarray(hours, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c_rate = np.abs(np.asarray(battery_energy, dtype=float)) / hours / np.asarray(capacity, dtype=float)
+    rate_bins = pd.cut(c_rate, C_RATE_BINS, labels=bin_labels(C_RATE_BINS), include_lowest=True)
+    histogram = pd.Series(hours).groupby([pd.Index(times.year, name="Year"), rate_bins], observed=False).sum()
+    histogram = histogram.unstack(fill_value=0).reset_index()
+    histogram.insert(0, "Battery", battery)
+    return histogram
+
+def write_cycles(name: str, times, batteries: dict) -> None:
+    """
+    Count the cycles of each battery and save the cycle table, the statistics and the histograms in the cycles folder.
+    batteries maps the name of each battery, e.g. Total or a unit, to its SoC, battery energy and capacity per time step.
+    Only the time steps with capacity are counted, so inactive periods do not add cycles. Batteries without an active
+    time step, e.g. a unit installed after the end of the project, have no cycles and are left out of the tables.
+    """
+    times = pd.DatetimeIndex(times)
+    hours = step_hours(times)
+    cycles, c_rates = [], []
+    for battery, (soc, battery_energy, capacity) in batteries.items():
+        soc, capacity = np.asarray(soc, dtype=float), np.nan_to_num(np.asarray(capacity, dtype=float))
+        active = (capacity > 0) & np.isfinite(soc)
+        if not active.any():
+            continue
+        cycles.append(count_cycles(times[active], soc[active], battery))
+        c_rates.append(c_rate_histogram(times[active], hours[active], np.asarray(battery_energy, dtype=float)[active], capacity[active], battery))
+
+    os.makedirs(get_cycles_path(name, "cycles").parent, exist_ok=True)
+    if cycles:
+        cycles = pd.concat(cycles, ignore_index=True)
+        statistics, depth_histogram = cycle_statistics(cycles), dod_histogram(cycles)
+        c_rates = pd.concat(c_rates, ignore_index=True)
+    else:
+        cycles = pd.DataFrame(columns=CYCLE_COLUMNS)
+        statistics = pd.DataFrame(columns=STATISTICS_COLUMNS)
+        depth_histogram = pd.DataFrame(columns=["Battery", "Year"] + bin_labels(DOD_BINS))
+        c_rates = pd.DataFrame(columns=["Battery", "Year"] + bin_labels(C_RATE_BINS))
+    cycles.to_parquet(get_cycles_path(name, "cycles"), index=False)
+    statistics.to_csv(get_cycles_path(name, "statistics"), index=False)
+    depth_histogram.to_csv(get_cycles_path(name, "dod_histogram"), index=False)
+    c_rates.to_csv(get_cycles_path(name, "c_rate_histogram"), index=False)
+
+def read_cycles(name: str, table: str, battery: str = None) -> pd.DataFrame:
+    """Read a cycle table of a result, optionally only for one battery."""
+    if table == "cycles":
+        table_data = pd.read_parquet(get_cycles_path(name, table))
+    else:
+        table_data = pd.read_csv(get_cycles_path(name, table), dtype={"Battery": str})
+    if battery is not None:
+        table_data = table_data[table_data["Battery"] == battery].reset_index(drop=True)
+    return table_data
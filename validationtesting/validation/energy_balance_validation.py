@@ -1,14 +1,113 @@
 """
 This module is used to validate the energy balance of the system.
+The energy of all components is stacked into one (hours x components) array on the time axis of the consumption.
+The residual of the energy balance is checked against a tolerance for every hour
+and aggregated by year, month and hour of the day.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from config.path_manager import PathManager
+from validationtesting.validation.model_output import load_component_energy
+from validationtesting.validation.rollups import write_rollups, write_rollups_by_column
+from validationtesting.validation.tiles import write_tiles, write_tiles_by_column
+from validationtesting.validation.out_of_core import (
+    use_out_of_core, clear_partitions, write_partition, partition_csv, partition_years, read_column, read_partitions, compute
+)
+
+def read_model_conversion_losses() -> pd.Series:
+    """Read the total conversion losses of the model indexed by time."""
+    project_name = st.session_state.get("project_name")
+    conversion_losses_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "conversion_losses_validation.csv"
+    conversion_losses = pd.read_csv(conversion_losses_path)
+    conversion_losses.index = pd.DatetimeIndex(pd.to_datetime(conversion_losses.pop("Time")))
+    return conversion_losses.loc[:, conversion_losses.columns.str.contains('Conversion Losses')].sum(axis=1)
+
+def get_model_conversion_losses(time_index: pd.DatetimeIndex, total_losses: pd.Series = None) -> np.ndarray:
+    """Get the total conversion losses of the model for every hour of the time axis."""
+    total_losses = read_model_conversion_losses() if total_losses is None else total_losses
+    return total_losses.reindex(time_index).fillna(0).to_numpy(dtype=float)
+
+def aggregate_residual(residual_df, tolerance: float) -> dict:
+    """
+    Aggregate the residual of the energy balance by year, month and hour of the day.
+    The residual is a pandas or Dask dataframe with Time and Residual [Wh] columns, so the same calculation is used by
+    the in-memory and the out-of-core engine. Months and hours are ordered as they appear, starting with the first hour.
+    """
+    time = residual_df["Time"].dt
+    residual_df = residual_df.assign(**{
+        "Absolute Residual [Wh]": residual_df["Residual [Wh]"].abs(),
+        "Exceeds Tolerance": residual_df["Residual [Wh]"].abs() > tolerance,
+        "Year": time.year, "Month": time.month, "Hour": time.hour,
+    })
+    first_time = pd.Timestamp(compute(residual_df["Time"].min()))
+    granularities = {
+        "yearly": ("Year", lambda year: str(year)),
+        "monthly": ("Month", lambda month: pd.to_datetime(month, format='%m').strftime('%B')),
+        "hourly": ("Hour", lambda hour: f"{hour:02d}:00"),
+    }
+    aggregated = {}
+    for granularity, (scope, label) in granularities.items():
+        table = compute(residual_df.groupby(scope).agg({
+            "Residual [Wh]": ["mean", "min", "max", "sum"],
+            "Absolute Residual [Wh]": "mean",
+            "Exceeds Tolerance": "sum",
+        })).sort_index()
+        table.columns = [
+            "Mean Residual [Wh]", "Min Residual [Wh]", "Max Residual [Wh]", "Sum Residual [Wh]",
+            "Mean Absolute Residual [Wh]", "Hours Exceeding Tolerance",
+        ]
+        # Months and hours repeat, so they start at the month and hour of the first time step
+        keys = table.index.to_numpy()
+        first_key = getattr(first_time, scope.lower())
+        table = table.loc[np.concatenate([keys[keys >= first_key], keys[keys < first_key]])]
+        table.index = [label(int(key)) for key in table.index]
+        aggregated[granularity] = table.rename_axis(scope).reset_index()
+    return aggregated
+
+def balance_energy(component_energy: pd.DataFrame, used_components: list, conversion_losses: np.ndarray = None) -> pd.DataFrame:
+    """
+    Calculate the residual of the energy balance for every hour of the component energy.
+    Returns the energy of all components with the conversion losses and the residual as Total Energy [Wh].
+    """
+    time_index = component_energy.index
+    energy = component_energy.to_numpy()
+
+    # The consumption is taken from the microgrid, all other components feed into it
+    signs = np.array([-1.0 if component == "consumption" else 1.0 for component in used_components])
+    residual = np.nan_to_num(energy) @ signs
+
+    if conversion_losses is not None:
+        residual -= conversion_losses
+
+    column_names = []
+    for component in used_components:
+        if component in ["solar_pv", "wind"] and any(st.session_state[f'{component}_curtailment']):
+            column_names.append(f'Model {component} Used Energy Total [Wh]')
+        else:
+            column_names.append(f'Model {component} Energy Total [Wh]')
+    combined_energy = pd.DataFrame(energy, columns=column_names)
+    combined_energy.insert(0, 'Time', time_index)
+    if conversion_losses is not None:
+        combined_energy['Conversion Losses [Wh]'] = conversion_losses
+    combined_energy['Total Energy [Wh]'] = residual
+    return combined_energy
+
+def find_violations(combined_energy: pd.DataFrame, tolerance: float, hour_offset: int = 0) -> pd.DataFrame:
+    """Find the hours where the residual exceeds the tolerance, the hour index starts at the given offset."""
+    residual = combined_energy['Total Energy [Wh]'].to_numpy()
+    violation_index = np.flatnonzero(np.abs(residual) > tolerance)
+    return pd.DataFrame({
+        "Hour Index": violation_index + hour_offset,
+        "Time": combined_energy['Time'].to_numpy()[violation_index],
+        "Residual [Wh]": residual[violation_index],
+    })
 
 def energy_balance_validation() -> None:
     """Calculate the energy balance of the system and save the result in a CSV file."""
-    project_name = st.session_state.get("project_name")    
+    project_name = st.session_state.get("project_name")
+    tolerance = st.session_state.energy_balance_tolerance
 
     used_components = []
     used_components.append("consumption")
@@ -20,41 +119,70 @@ def energy_balance_validation() -> None:
         used_components.append("generator")
     if st.session_state.battery:
         used_components.append("battery")
-    if st.session_state.conversion:
-        used_components.append("conversion")
 
-    combined_energy = pd.DataFrame()
+    results_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results"
+    if use_out_of_core():
+        counts = energy_balance_out_of_core(used_components, tolerance, results_path)
+        if counts is None:
+            return
+        num_hours, num_violations = counts
+    else:
+        # Energy of all components on the time axis of the consumption (hours x components)
+        component_energy = load_component_energy(used_components)
+        time_index = component_energy.index
+        conversion_losses = get_model_conversion_losses(time_index) if st.session_state.conversion else None
+        combined_energy = balance_energy(component_energy, used_components, conversion_losses)
+        violations = find_violations(combined_energy, tolerance)
+
+        combined_energy.to_csv(results_path / "energy_balance.csv", index=False)
+        series = [column for column in combined_energy.columns if column != "Time"]
+        write_rollups("energy_balance", combined_energy.set_index(time_index), series)
+        write_tiles("energy_balance", combined_energy.set_index(time_index), series)
+        violations.to_csv(results_path / "energy_balance_violations.csv", index=False)
+        residual_df = pd.DataFrame({"Time": time_index, "Residual [Wh]": combined_energy['Total Energy [Wh]']})
+        for granularity, aggregated_residual in aggregate_residual(residual_df, tolerance).items():
+            aggregated_residual.to_csv(results_path / f"energy_balance_residual_{granularity}.csv", index=False)
+        num_hours, num_violations = len(combined_energy), len(violations)
+
+    st.write(f"Energy balance exceeds the tolerance of {tolerance} Wh in {num_violations} of {num_hours} hours.")
+
+def energy_balance_out_of_core(used_components: list, tolerance: float, results_path) -> tuple:
+    """
+    Calculate the energy balance one year at a time for the out-of-core engine and save the same files as in memory.
+    Returns the number of hours and the number of hours exceeding the tolerance, None if there is no consumption data.
+    """
+    project_name = st.session_state.get("project_name")
     for component in used_components:
-        if not component == "conversion":
-            project_folder_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_{component}.csv"
-            df = pd.read_csv(project_folder_path)
-            if combined_energy.empty:
-                if (component == 'solar_pv' or component == 'wind') and st.session_state[f'{component}_curtailment']:
-                    combined_energy = df[['Time', f'Model {component} Energy Total [Wh]', f'Model {component} Curtailed Energy Total [Wh]']]
-                    combined_energy[f'Model {component} Used Energy Total [Wh]'] = combined_energy[f'Model {component} Energy Total [Wh]'] - combined_energy[f'Model {component} Curtailed Energy Total [Wh]']
-                    combined_energy.drop(columns=[f'Model {component} Energy Total [Wh]', f'Model {component} Curtailed Energy Total [Wh]'], inplace=True)
-                else:
-                    combined_energy = df[['Time', f'Model {component} Energy Total [Wh]']]
-            else:
-                if (component == 'solar_pv' or component == 'wind') and st.session_state[f'{component}_curtailment']:
-                    combined_energy = combined_energy.merge(df[['Time', f'Model {component} Energy Total [Wh]', f'Model {component} Curtailed Energy Total [Wh]']], on='Time')
-                    combined_energy[f'Model {component} Used Energy Total [Wh]'] = combined_energy[f'Model {component} Energy Total [Wh]'] - combined_energy[f'Model {component} Curtailed Energy Total [Wh]']
-                    combined_energy.drop(columns=[f'Model {component} Energy Total [Wh]', f'Model {component} Curtailed Energy Total [Wh]'], inplace=True)
-                else:
-                    combined_energy = combined_energy.merge(df[['Time', f'Model {component} Energy Total [Wh]']], on='Time')
-    
-    # Add this before Total Energy
-    if "conversion" in used_components:
-        combined_energy['Conversion Losses [Wh]'] = 0
-
-    combined_energy['Total Energy [Wh]'] = combined_energy.iloc[:, 2:].sum(axis=1)
-
-    if "conversion" in used_components:
-        conversion_losses_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "conversion_losses_validation.csv"
-        conversion_losses = pd.read_csv(conversion_losses_path)
-        combined_energy['Conversion Losses [Wh]'] = conversion_losses.loc[:, conversion_losses.columns.str.contains('Conversion Losses')].sum(axis=1)
-        combined_energy['Total Energy [Wh]'] -= combined_energy['Conversion Losses [Wh]']
-
-    combined_energy['Total Energy [Wh]'] -= combined_energy['Model consumption Energy Total [Wh]']
-    result_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / f"energy_balance.csv"
-    combined_energy.to_csv(result_path, index=False)
\ No newline at end of file
+        model_output_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_{component}.csv"
+        partition_csv(f"model_output_{component}", model_output_path)
+    total_losses = read_model_conversion_losses() if st.session_state.conversion else None
+
+    years = partition_years("model_output_consumption")
+    if not years:
+        st.error("The consumption model output has no data, the energy balance cannot be calculated.")
+        return None
+
+    clear_partitions("energy_balance")
+    num_hours, num_violations = 0, 0
+    for year in years:
+        component_energy = load_component_energy(used_components, year=year)
+        conversion_losses = None if total_losses is None else get_model_conversion_losses(component_energy.index, total_losses)
+        combined_energy = balance_energy(component_energy, used_components, conversion_losses)
+        violations = find_violations(combined_energy, tolerance, num_hours)
+
+        write_partition("energy_balance", combined_energy)
+        combined_energy.to_csv(results_path / "energy_balance.csv", index=False, mode="w" if num_hours == 0 else "a", header=num_hours == 0)
+        violations.to_csv(results_path / "energy_balance_violations.csv", index=False, mode="w" if num_hours == 0 else "a", header=num_hours == 0)
+        num_hours += len(combined_energy)
+        num_violations += len(violations)
+        series = [column for column in combined_energy.columns if column != "Time"]
+
+    def read_balance_column(column: str) -> pd.Series:
+        return read_column("energy_balance", column)
+
+    write_rollups_by_column("energy_balance", read_balance_column, series)
+    write_tiles_by_column("energy_balance", read_balance_column, series)
+    residual_df = read_partitions("energy_balance", ["Total Energy [Wh]"]).rename(columns={"Total Energy [Wh]": "Residual [Wh]"})
+    for granularity, aggregated_residual in aggregate_residual(residual_df, tolerance).items():
+        aggregated_residual.to_csv(results_path / f"energy_balance_residual_{granularity}.csv", index=False)
+    return num_hours, num_violations
@@ -9,6 +9,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from config.path_manager import PathManager
+from validationtesting.validation.out_of_core import use_out_of_core, read_partitions, compute
 import os
 
 class ERROR():
@@ -23,9 +24,12 @@ class ERROR():
             "wind"
         }
 
-        combined_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results" / f"combined_model_benchmark.csv"
-        combined_df = pd.read_csv(combined_data_path)
-        combined_df['Time'] = pd.to_datetime(combined_df['Time'])
+        if use_out_of_core():
+            combined_df = None
+        else:
+            combined_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results" / f"combined_model_benchmark.csv"
+            combined_df = pd.read_csv(combined_data_path)
+            combined_df['Time'] = pd.to_datetime(combined_df['Time'])
 
         benchmark_data = {"total": {}, "yearly": {}, "monthly": {}, "hourly": {}}
         model_data = {"total": {}, "yearly": {}, "monthly": {}, "hourly": {}}
@@ -37,19 +41,17 @@ class ERROR():
             component = st.session_state.get(component_name)
             if component:
                 columns_to_keep = ['Time', f'Model {component_name} Energy Total [Wh]', f'Benchmark {component_name} Energy Total [Wh]']
-                temp_df = combined_df[columns_to_keep]
-                temp_df = temp_df.set_index('Time')
+                # The out-of-core engine calculates the statistics with Dask on the yearly partitions
+                temp_df = read_partitions("combined_model_benchmark", columns_to_keep) if combined_df is None else combined_df[columns_to_keep]
                 temp_df = temp_df.rename(columns={ f'Model {component_name} Energy Total [Wh]': 'model_output', f'Benchmark {component_name} Energy Total [Wh]': 'benchmark_output'})
-                total_mae, yearly_mae, monthly_mae, hourly_mae = self.mae(temp_df)
-                total_rmse, yearly_rmse, monthly_rmse, hourly_rmse = self.rmse(temp_df)
-
-                benchmark_mean = temp_df['benchmark_output'].mean()
-                yearly_benchmark_series = temp_df.groupby(temp_df.index.year)['benchmark_output'].mean()
-                yearly_benchmark_mean = {str(year): mean for year, mean in yearly_benchmark_series.items()}
-                monthly_benchmark_series = temp_df.groupby(temp_df.index.month)['benchmark_output'].mean()
-                monthly_benchmark_mean = {pd.to_datetime(month, format='%m').strftime('%B'): mean for month, mean in monthly_benchmark_series.items()}
-                hourly_benchmark_series = temp_df.groupby(temp_df.index.hour)['benchmark_output'].mean()
-                hourly_benchmark_mean = {f"{hour:02d}:00": mean for hour, mean in hourly_benchmark_series.items()}
+                statistics = self.error_statistics(temp_df)
+                total_mae, yearly_mae, monthly_mae, hourly_mae = self.mae(statistics)
+                total_rmse, yearly_rmse, monthly_rmse, hourly_rmse = self.rmse(statistics)
+
+                benchmark_mean = statistics["total"]['benchmark_output']
+                yearly_benchmark_mean = self.label_yearly(statistics["yearly"]['benchmark_output'])
+                monthly_benchmark_mean = self.label_monthly(statistics["monthly"]['benchmark_output'])
+                hourly_benchmark_mean = self.label_hourly(statistics["hourly"]['benchmark_output'])
                 benchmark_data["yearly"][f"Year"] = list(yearly_benchmark_mean.keys()) 
                 benchmark_data["monthly"][f"Month"] = list(monthly_benchmark_mean.keys())
                 benchmark_data["hourly"][f"Hour"] = list(hourly_benchmark_mean.keys())
@@ -58,13 +60,10 @@ class ERROR():
                 benchmark_data["monthly"][f"Mean Benchmark Total"] = list(monthly_benchmark_mean.values())
                 benchmark_data["hourly"][f"Mean Benchmark Total"] = list(hourly_benchmark_mean.values())
 
-                model_mean = temp_df['model_output'].mean()
-                yearly_model_series = temp_df.groupby(temp_df.index.year)['model_output'].mean()
-                yearly_model_mean = {str(year): mean for year, mean in yearly_model_series.items()}
-                monthly_model_series = temp_df.groupby(temp_df.index.month)['model_output'].mean()
-                monthly_model_mean = {pd.to_datetime(month, format='%m').strftime('%B'): mean for month, mean in monthly_model_series.items()}
-                hourly_model_series = temp_df.groupby(temp_df.index.hour)['model_output'].mean()
-                hourly_model_mean = {str(hour): mean for hour, mean in hourly_model_series.items()}
+                model_mean = statistics["total"]['model_output']
+                yearly_model_mean = self.label_yearly(statistics["yearly"]['model_output'])
+                monthly_model_mean = self.label_monthly(statistics["monthly"]['model_output'])
+                hourly_model_mean = {str(hour): mean for hour, mean in statistics["hourly"]['model_output'].items()}
                 model_data["yearly"][f"Year"] = list(yearly_model_mean.keys()) 
                 model_data["monthly"][f"Month"] = list(monthly_model_mean.keys())
                 model_data["hourly"][f"Hour"] = list(hourly_model_mean.keys())
@@ -96,8 +95,6 @@ class ERROR():
                 self.save_as_csv(mae_data, "MAE", component_name)
                 self.save_as_csv(rmse_data, "RMSE", component_name)
 
-                results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results"
-
     def save_as_csv(self, data: dict, metric_name: str, component_name: str) -> None:
         results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results"
         for granularity, granularity_data in data.items():
@@ -106,40 +103,45 @@ class ERROR():
             results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(self.project_name) / "results" / "Error Calculation" / f"{component_name}_{metric_name.lower()}_{granularity}.csv"
             df.to_csv(results_data_path, index=False)
     
-    def mae(self, df: pd.DataFrame) -> tuple[dict[str, float], dict[str, float], dict[str, float], dict[str, float]]:
-        """Calculate the Mean Absolute Error (MAE) for the model output and benchmark data."""
-        # Total MAE
-        total_mae = {"Total MAE": np.mean(np.abs(df['model_output'] - df['benchmark_output']))}
-
-        # Yearly MAE
-        yearly_mae_series = df.groupby(df.index.year).apply(lambda x: np.mean(np.abs(x['model_output'] - x['benchmark_output'])))
-        yearly_mae = {str(year): mae for year, mae in yearly_mae_series.items()}
-
-        # Monthly MAE
-        monthly_mae_series = df.groupby(df.index.month).apply(lambda x: np.mean(np.abs(x['model_output'] - x['benchmark_output'])))
-        monthly_mae = {pd.to_datetime(month, format='%m').strftime('%B'): mae for month, mae in monthly_mae_series.items()}
-
-        # Hourly MAE
-        hourly_mae_series = df.groupby(df.index.hour).apply(lambda x: np.mean(np.abs(x['model_output'] - x['benchmark_output'])))
-        hourly_mae = {f"{hour:02d}:00": mae for hour, mae in hourly_mae_series.items()}
-
+    def error_statistics(self, df) -> dict:
+        """
+        Calculate the mean model output, benchmark output, absolute error and squared error in total and per year, month and hour.
+        The data is a pandas or Dask dataframe with Time, model_output and benchmark_output columns, so the same
+        calculation is used by the in-memory and the out-of-core engine.
+        """
+        time = df['Time'].dt
+        df = df.assign(
+            absolute_error=(df['model_output'] - df['benchmark_output']).abs(),
+            squared_error=(df['model_output'] - df['benchmark_output']) ** 2,
+            Year=time.year, Month=time.month, Hour=time.hour,
+        )
+        columns = ['model_output', 'benchmark_output', 'absolute_error', 'squared_error']
+        statistics = {"total": compute(df[columns].mean())}
+        for granularity, key in (("yearly", "Year"), ("monthly", "Month"), ("hourly", "Hour")):
+            statistics[granularity] = compute(df.groupby(key)[columns].mean()).sort_index()
+        return statistics
+
+    def label_yearly(self, series: pd.Series) -> dict[str, float]:
+        return {str(year): value for year, value in series.items()}
+
+    def label_monthly(self, series: pd.Series) -> dict[str, float]:
+        return {pd.to_datetime(month, format='%m').strftime('%B'): value for month, value in series.items()}
+
+    def label_hourly(self, series: pd.Series) -> dict[str, float]:
+        return {f"{hour:02d}:00": value for hour, value in series.items()}
+
+    def mae(self, statistics: dict) -> tuple[dict[str, float], dict[str, float], dict[str, float], dict[str, float]]:
+        """Get the Mean Absolute Error (MAE) for the model output and benchmark data from the error statistics."""
+        total_mae = {"Total MAE": statistics["total"]['absolute_error']}
+        yearly_mae = self.label_yearly(statistics["yearly"]['absolute_error'])
+        monthly_mae = self.label_monthly(statistics["monthly"]['absolute_error'])
+        hourly_mae = self.label_hourly(statistics["hourly"]['absolute_error'])
         return total_mae, yearly_mae, monthly_mae, hourly_mae
 
-    def rmse(self, df: pd.DataFrame) -> tuple[dict[str, float], dict[str, float], dict[str, float], dict[str, float]]:
-        """Calculate the Root Mean Squared Error (RMSE) for the model output and benchmark data."""
-        # Total RMSE
-        total_rmse = {"Total RMSE": np.sqrt(np.mean((df['model_output'] - df['benchmark_output']) ** 2))}
-
-        # Yearly RMSE
-        yearly_rmse_series = df.groupby(df.index.year).apply(lambda x: np.sqrt(np.mean((x['model_output'] - x['benchmark_output']) ** 2)))
-        yearly_rmse = {str(year): rmse for year, rmse in yearly_rmse_series.items()}
-
-        # Monthly RMSE
-        monthly_rmse_series = df.groupby(df.index.month).apply(lambda x: np.sqrt(np.mean((x['model_output'] - x['benchmark_output']) ** 2)))
-        monthly_rmse = {pd.to_datetime(month, format='%m').strftime('%B'): rmse for month, rmse in monthly_rmse_series.items()}
-
-        # Hourly RMSE
-        hourly_rmse_series = df.groupby(df.index.hour).apply(lambda x: np.sqrt(np.mean((x['model_output'] - x['benchmark_output']) ** 2)))
-        hourly_rmse = {f"{hour:02d}:00": rmse for hour, rmse in hourly_rmse_series.items()}
-
-        return total_rmse, yearly_rmse, monthly_rmse, hourly_rmse
\ No newline at end of file
+    def rmse(self, statistics: dict) -> tuple[dict[str, float], dict[str, float], dict[str, float], dict[str, float]]:
+        """Get the Root Mean Squared Error (RMSE) for the model output and benchmark data from the error statistics."""
+        total_rmse = {"Total RMSE": np.sqrt(statistics["total"]['squared_error'])}
+        yearly_rmse = self.label_yearly(np.sqrt(statistics["yearly"]['squared_error']))
+        monthly_rmse = self.label_monthly(np.sqrt(statistics["monthly"]['squared_error']))
+        hourly_rmse = self.label_hourly(np.sqrt(statistics["hourly"]['squared_error']))
+        return total_rmse, yearly_rmse, monthly_rmse, hourly_rmse
@@ -0,0 +1,69 @@
+"""
+This module is used to store the constraint violations and deviations of the validators as a sparse event table.
+Consecutive time steps in violation are run-length encoded into one event with its start, end, duration and peak exceedance,
+so the results page can count and show the violations without reading the hourly results.
+"""
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+from config.path_manager import PathManager
+
+EVENT_COLUMNS = ["Constraint", "Start", "End", "Duration [h]", "Peak Exceedance", "Unit"]
+
+def get_events_path(name: str):
+    """Get the path of the event table of a result."""
+    project_name = st.session_state.get("project_name")
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "events" / f"{name}_events.csv"
+
+def run_lengths(violated: np.ndarray) -> tuple:
+    """Get the first and last index of each run of consecutive True values."""
+    padded = np.concatenate(([0], np.asarray(violated, dtype=np.int8), [0]))
+    changes = np.diff(padded)
+    return np.flatnonzero(changes == 1), np.flatnonzero(changes == -1) - 1
+
+def step_length_hours(times: pd.DatetimeIndex) -> float:
+    """Get the typical length of a time step in hours, one hour if there is a single timestamp."""
+    steps = np.diff(times.asi8)
+    return float(np.median(steps)) / pd.Timedelta(hours=1).value if len(steps) else 1.0
+
+def find_events(times, violated, exceedance, constraint: str, unit: str) -> pd.DataFrame:
+    """
+    Run-length encode the time steps in violation of a constraint into events.
+    The duration of an event is the time from its first to its last step plus one step length, so it is given in hours
+    at any resolution. The peak exceedance of an event is the largest exceedance of the limit within the event.
+    """
+    times = pd.DatetimeIndex(times)
+    violated = np.asarray(violated, dtype=bool)
+    starts, ends = run_lengths(violated)
+    if len(starts) == 0:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    exceedance = np.nan_to_num(np.asarray(exceedance, dtype=float))
+    return pd.DataFrame({
+        "Constraint": constraint,
+        "Start": times[starts],
+        "End": times[ends],
+        "Duration [h]": (times[ends] - times[starts]) / pd.Timedelta(hours=1) + step_length_hours(times),
+        "Peak Exceedance": np.maximum.reduceat(np.where(violated, exceedance, -np.inf), starts),
+        "Unit": unit,
+    })
+
+def write_events(name: str, events: list) -> None:
+    """Save the events of all constraints of a result in the events folder of the results."""
+    events_path = get_events_path(name)
+    os.makedirs(events_path.parent, exist_ok=True)
+    events = [table for table in events if not table.empty]
+    table = pd.concat(events, ignore_index=True) if events else pd.DataFrame(columns=EVENT_COLUMNS)
+    table.to_csv(events_path, index=False)
+
+def read_events(name: str, constraint: str = None) -> pd.DataFrame:
+    """Read the event table of a result, optionally only for one constraint."""
+    events = pd.read_csv(get_events_path(name), parse_dates=["Start", "End"])
+    if constraint is not None:
+        events = events[events["Constraint"] == constraint].reset_index(drop=True)
+    return events
+
+def count_violation_hours(events: pd.DataFrame) -> float:
+    """Get the number of hours in violation of an event table."""
+    return float(events["Duration [h]"].sum())
@@ -6,6 +6,12 @@ import streamlit as st
 import pandas as pd
 from config.path_manager import PathManager
 import datetime
+from validationtesting.validation.project_model import compile_unit_table
+from validationtesting.validation.rollups import write_rollups
+from validationtesting.validation.tiles import write_tiles
+from validationtesting.validation.events import find_events, write_events
+from validationtesting.validation.kernels import dispatch_generators
+import numpy as np
 
 def get_efficiency_from_tabular(load: float, type_int: int) -> float:
     """Extract the efficiency from the tabular data for the specified load and generator type."""
@@ -96,17 +102,17 @@ def generator_validation_testing() -> None:
     generator_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_generator.csv"
     generator_data = pd.read_csv(generator_data_path)
 
-    # Print all current session states
-    num_units = st.session_state.generator_num_units
-    installation_dates = st.session_state.generator_installation_dates
-    lifetime = st.session_state.generator_lifetime
-    generator_type = st.session_state.generator_type
+    # Compile the generator units once, so that no type strings are parsed in the hourly loop
+    units = compile_unit_table("generator", ["generator_efficiency", "generator_min_power", "generator_max_power"])
+    num_units = units.num_units
+    unit_types = units.type_index
+    installation_dates = units.installation_dates
     dynamic_efficiency = st.session_state.generator_dynamic_efficiency
     dynamic_efficiency_type = st.session_state.generator_dynamic_efficiency_type
     temporal_degradation = st.session_state.generator_temporal_degradation
-    initial_efficiency = [x / 100 for x in st.session_state.generator_efficiency]
-    min_powers = st.session_state.generator_min_power
-    max_powers = st.session_state.generator_max_power
+    initial_efficiency = units["generator_efficiency"] / 100
+    min_powers = units["generator_min_power"]
+    max_powers = units["generator_max_power"]
     lhv = st.session_state.generator_fuel_lhv
     temporal_degradation_rate = [x / 100 for x in st.session_state.battery_temporal_degradation_rate]
     fuel_price = st.session_state.generator_fuel_price
@@ -135,37 +141,41 @@ def generator_validation_testing() -> None:
     generator_progress_bar = st.progress(generator_progress)
     generator_text = st.empty()
 
+    # Availability of each unit (time steps x units) at the timestamps of the model output
+    times = pd.to_datetime(generator_data['Time'])
+    unit_available = units.available(times)
+    if dynamic_efficiency:
+        # The energy is dispatched to the available units in the order of the units
+        dispatched_energy = dispatch_generators(generator_data['Model generator Energy Total [Wh]'], unit_available * max_powers.astype(float))
     max_power = [0] * num_units
     min_power = [0] * num_units
     efficiency = [0] * num_units
     energy_this_generator = [0] * num_units
     for i, row in generator_data.iterrows():
-        time = pd.to_datetime(row['Time'])
+        time = times[i]
         if time.hour == 0 and time.month == 1 and time.day == 1:
             generator_progress += progress_step
             generator_progress_bar.progress(generator_progress)
             generator_text.write(f"Processing year {time.year} for generator validation")
         total_max_power = 0
         total_energy = row[f'Model generator Energy Total [Wh]']
-        remaining_energy = total_energy
         for unit in range(num_units):
-            type = int(generator_type[unit].replace("Type ", "")) - 1
-            if installation_dates[unit] > time or installation_dates[unit].replace(year=installation_dates[unit].year + lifetime[type]) < time:
+            type = unit_types[unit]
+            if not unit_available[i, unit]:
                 max_power[unit] = 0
                 min_power[unit] = None
                 unit_efficiency = 0
             else:
-                max_power[unit] = max_powers[type]
-                min_power[unit] = min_powers[type]
+                max_power[unit] = max_powers[unit]
+                min_power[unit] = min_powers[unit]
                 if dynamic_efficiency:
-                    energy_this_generator[unit] = min(remaining_energy, max_power[unit])
-                    remaining_energy -= energy_this_generator[unit]
+                    energy_this_generator[unit] = dispatched_energy[i, unit]
                     if dynamic_efficiency_type[type] == "Tabular Data":
                         unit_efficiency = get_efficiency_from_tabular(energy_this_generator[unit], type + 1)
                     else:
                         unit_efficiency = get_efficiency_from_formula(energy_this_generator[unit], type)
                 else:
-                    unit_efficiency = initial_efficiency[type]
+                    unit_efficiency = initial_efficiency[unit]
 
             if temporal_degradation:
                 unit_efficiency = temporal_degradation_efficiency(unit_efficiency, temporal_degradation_rate[type], time.date(), installation_dates[unit])
@@ -196,4 +206,17 @@ def generator_validation_testing() -> None:
     generator_text.write("Saving generator validation results...")
     results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "generator_validation.csv"
     generator_data.to_csv(results_data_path)
+    series = [column for column in generator_data.columns if column.endswith("]")]
+    hourly_results = generator_data.set_index(times)
+    write_rollups("generator_validation", hourly_results, series)
+    write_tiles("generator_validation", hourly_results, series)
+
+    # Run-length encode the hours in violation into events
+    model_energy = generator_data['Model generator Energy Total [Wh]'].to_numpy(dtype=float)
+    min_power_limit = pd.to_numeric(generator_data['Min Power'], errors='coerce').to_numpy(dtype=float)
+    max_power_limit = generator_data['Max Power'].to_numpy(dtype=float)
+    write_events("generator_validation", [
+        find_events(times, generator_data['Power Constraints Total'] == False,
+                    np.fmax(model_energy - max_power_limit, min_power_limit - model_energy), "Power", "Wh"),
+    ])
     generator_text.write("Generator Benchmark Calculation Completed.")
\ No newline at end of file
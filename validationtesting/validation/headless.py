@@ -0,0 +1,225 @@
+"""
+This module is used to run the validation of a project without the GUI.
+The validators read their parameters from the Streamlit session state, so the project parameters are loaded from the
+YAML file of the project into a dictionary with attribute access that replaces the session state during the run.
+Only the stages whose inputs changed are recomputed. In watch mode the configured model output files are polled,
+a burst of changes is debounced until the file is stable, only the changed files are imported again and the affected
+stages are re-validated.
+
+Usage:
+    python -m validationtesting.validation.headless run PROJECT [--force]
+    python -m validationtesting.validation.headless watch PROJECT --config watch.yaml
+
+The watch configuration lists the model output file of each component and how it is read:
+
+    interval: 2.0      # Seconds between two polls
+    debounce: 5.0      # Seconds a changed file must be stable before it is imported
+    sources:
+      solar_pv:
+        path: /exports/solar_pv.csv
+        energy_column: Energy
+        unit: kWh
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass, fields
+from pathlib import Path
+import streamlit as st
+import yaml
+from config.path_manager import PathManager
+from validationtesting.validation.parameters import ProjectParameters
+from validationtesting.validation.project_model import flatten_parameters
+from validationtesting.validation.pipeline import TECHNICAL_STAGES, plan_stages, complete_stage
+
+logger = logging.getLogger(__name__)
+
+class HeadlessSessionState(dict):
+    """Dictionary with attribute access, used in place of the Streamlit session state when running without the GUI."""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def __delattr__(self, key):
+        del self[key]
+
+class SilentWidget:
+    """Placeholder for the progress bar and text widgets of the GUI, all calls are ignored."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+def get_yaml_path(project_name: str) -> Path:
+    return PathManager.PROJECTS_FOLDER_PATH / project_name / f"{project_name}.yaml"
+
+def load_project_state(project_name: str) -> HeadlessSessionState:
+    """Load the parameters of a project into a headless session state and make it the session state of the validators."""
+    state = HeadlessSessionState(flatten_parameters(ProjectParameters.instantiate_from_yaml(get_yaml_path(project_name))))
+    state.project_name = project_name
+    st.session_state = state
+    return state
+
+def run_validation(project_name: str, force: bool = False, stages: list = None, progress=None) -> list:
+    """
+    Run the technical validation of a project without the GUI, stages whose inputs did not change are reused.
+    If a stage was recomputed, the run is saved to the run history and the results database.
+    progress is called with the label and the status of each stage. Returns the plan of the stages.
+    """
+    from validationtesting.validation.results_store import record_run
+    from validationtesting.validation.run_history import save_run
+
+    progress = progress or (lambda label, status: None)
+    state = load_project_state(project_name)
+    start_time = time.perf_counter()
+    plan = plan_stages(TECHNICAL_STAGES if stages is None else stages, state, force=force)
+    for stage_plan in plan:
+        stage = stage_plan.stage
+        if stage_plan.reused:
+            logger.info("%s: reused", stage.label)
+            progress(stage.label, "reused")
+            continue
+        logger.info("%s: running", stage.label)
+        progress(stage.label, "running")
+        if stage.name == "benchmark":
+            stage.load()(SilentWidget(), SilentWidget(), 0, 0)
+        else:
+            stage.load()()
+        complete_stage(stage_plan, project_name)
+        progress(stage.label, "completed")
+
+    if any(not stage_plan.reused for stage_plan in plan):
+        calculation_time = time.perf_counter() - start_time
+        record_run(project_name, state, validation="headless", calculation_time=calculation_time)
+        run_id = save_run(project_name, label="headless")
+        logger.info("Validation of %s complete (run %s) in %.1f seconds", project_name, run_id, calculation_time)
+    else:
+        logger.info("Validation of %s is up to date", project_name)
+    return plan
+
+@dataclass(frozen=True, slots=True)
+class ModelOutputSource:
+    """
+    Model output file of a component exported by the energy system model.
+
+    Attributes:
+        component (str): Component of the model output, e.g. solar_pv or consumption.
+        path (Path): Path of the exported CSV file.
+        time_column (str): Column with the time stamps.
+        energy_column (str): Column with the energy of the component.
+        unit (str): Unit of the energy, Wh, kWh or MWh.
+        delimiter (str): Delimiter of the CSV file.
+        decimal (str): Decimal separator of the CSV file.
+        time_format (str): Format of the time stamps, inferred if not given.
+        curtailment_column (str): Column with the curtailed energy, if any.
+        fuel_consumption_column (str): Column with the fuel consumption time series in litres, if any.
+    """
+    component: str
+    path: Path
+    time_column: str = "Time"
+    energy_column: str = "Energy"
+    unit: str = "Wh"
+    delimiter: str = ","
+    decimal: str = "."
+    time_format: str = None
+    curtailment_column: str = None
+    fuel_consumption_column: str = None
+
+def import_model_output(project_name: str, source: ModelOutputSource) -> Path:
+    """Import a model output file into the inputs of a project, in the same form as the upload page saves it."""
+    from validationtesting.importers.custom_csv import CustomCSVImporter
+    from validationtesting.importers.registry import import_file
+
+    columns = {"energy": source.energy_column}
+    if source.curtailment_column:
+        columns["curtailment"] = source.curtailment_column
+    if source.fuel_consumption_column:
+        columns["fuel"] = source.fuel_consumption_column
+    plugin = CustomCSVImporter({source.component: columns}, source.time_column, source.time_format, source.delimiter, source.decimal, source.unit)
+    import_file(project_name, source.path, plugin)
+    return PathManager.PROJECTS_FOLDER_PATH / project_name / "inputs" / f"model_output_{source.component}.csv"
+
+def load_watch_config(config_path: Path) -> tuple:
+    """Load the model output sources, the poll interval and the debounce time of the watch mode from a YAML file."""
+    with open(config_path, "r") as file:
+        config = yaml.safe_load(file)
+    names = {field.name for field in fields(ModelOutputSource)}
+    sources = [
+        ModelOutputSource(component=component, **{key: value for key, value in source.items() if key in names and key != "component"})
+        for component, source in config["sources"].items()
+    ]
+    return sources, float(config.get("interval", 2.0)), float(config.get("debounce", 5.0))
+
+def file_signature(path: Path) -> tuple:
+    """Size and modification time of a file, None if it does not exist."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def watch(project_name: str, sources: list, interval: float = 2.0, debounce: float = 5.0, max_runs: int = None) -> None:
+    """
+    Poll the model output files and re-validate the project when they change.
+    A changed file is only imported once it did not change for the debounce time, so a model that writes its
+    results in several steps triggers one run. Only the changed files are imported, the pipeline then recomputes
+    the stages reading them. max_runs stops the watch after the given number of runs.
+    """
+    signatures = {source.component: file_signature(source.path) for source in sources}
+    pending = {}
+    runs = 0
+    logger.info("Watching %d model output files of %s", len(sources), project_name)
+    while max_runs is None or runs < max_runs:
+        time.sleep(interval)
+        now = time.monotonic()
+        for source in sources:
+            signature = file_signature(source.path)
+            if signature != signatures[source.component]:
+                signatures[source.component] = signature
+                if signature is not None:
+                    pending[source.component] = now
+
+        stable = [source for source in sources if source.component in pending and now - pending[source.component] >= debounce]
+        if not stable:
+            continue
+        for source in stable:
+            del pending[source.component]
+            logger.info("Importing %s from %s", source.component, source.path)
+            try:
+                import_model_output(project_name, source)
+            except Exception:
+                logger.exception("Import of %s failed", source.path)
+        try:
+            run_validation(project_name)
+        except Exception:
+            logger.exception("Validation of %s failed", project_name)
+        runs += 1
+
+def main(arguments: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the validation of a project without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the technical validation once.")
+    run_parser.add_argument("project", help="Name of the project.")
+    run_parser.add_argument("--force", action="store_true", help="Recompute all stages.")
+
+    watch_parser = subparsers.add_parser("watch", help="Re-validate when the model output files change.")
+    watch_parser.add_argument("project", help="Name of the project.")
+    watch_parser.add_argument("--config", type=Path, required=True, help="YAML file with the model output sources.")
+
+    args = parser.parse_args(arguments)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "run":
+        run_validation(args.project, force=args.force)
+    else:
+        sources, interval, debounce = load_watch_config(args.config)
+        watch(args.project, sources, interval, debounce)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+This module is used to run validation jobs through a local HTTP API, e.g. from an optimization pipeline after each solve.
+A job is submitted with the project parameters as YAML and the model output of the components as CSV text. The jobs
+are queued onto a pool of worker processes, which import pandas, the validators and BLAST-Lite once when they start
+and are reused for all following jobs. The number of workers limits how many jobs run at the same time. The progress
+of a job is streamed as server-sent events and a finished job returns its total metrics and links to its result files.
+The server only uses the standard library.
+
+Usage:
+    python -m validationtesting.validation.job_server [--host 127.0.0.1] [--port 8765] [--workers 2]
+
+Endpoints:
+    POST /jobs                          Submit a job: {"project_name", "parameters_yaml", "model_outputs": {component: csv}, "force"}
+    GET  /jobs                          List the jobs
+    GET  /jobs/<job id>                 Status, progress, metrics and result links of a job
+    GET  /jobs/<job id>/events          Progress of a job as server-sent events until it is finished
+    GET  /projects/<project>/results/<path>   Download a result file
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+from config.path_manager import PathManager
+
+logger = logging.getLogger(__name__)
+
+PROJECT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 _.-]{0,99}$")
+COMPONENT_PATTERN = re.compile(r"^[a-z_]+$")
+
+# Seconds between two checks for new progress of a streamed job
+EVENT_POLL_INTERVAL = 0.5
+
+# Granularities of the metrics returned with a finished job, the energy balance residuals have no total
+SUMMARY_GRANULARITIES = ("total", "yearly")
+
+FINISHED = ("completed", "failed")
+
+def warm_worker() -> None:
+    """Import the heavy modules once when a worker process starts, so that the jobs do not pay for the imports."""
+    from validationtesting.validation.pipeline import STAGES
+    for stage in STAGES.values():
+        stage.load()
+    try:
+        import blast  # noqa: F401
+    except ImportError:
+        pass
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+def run_job(job_id: str, project_name: str, force: bool, events) -> dict:
+    """
+    Run the validation of a job in a worker process, the progress of each stage is sent to the events queue.
+    A None event is sent last, so the server knows that all progress events of the job were collected.
+    """
+    from validationtesting.validation.headless import run_validation
+    from validationtesting.validation.results_store import collect_metrics, get_results_path
+
+    def progress(label: str, status: str) -> None:
+        events.put((job_id, {"time": datetime.now().isoformat(timespec="seconds"), "stage": label, "status": status}))
+
+    try:
+        progress(None, "started")
+        plan = run_validation(project_name, force=force, progress=progress)
+        metrics = collect_metrics(get_results_path(project_name))
+        return {
+            "stages": [{"stage": stage_plan.stage.label, "reused": stage_plan.reused} for stage_plan in plan],
+            "metrics": metrics[metrics["granularity"].isin(SUMMARY_GRANULARITIES)].to_dict(orient="records"),
+        }
+    finally:
+        events.put((job_id, None))
+
+def write_job_inputs(project_name: str, parameters_yaml: str, model_outputs: dict) -> None:
+    """Write the parameters and the model output files of a job into the project folder."""
+    project_path = PathManager.PROJECTS_FOLDER_PATH / project_name
+    (project_path / "inputs").mkdir(parents=True, exist_ok=True)
+    (project_path / "results").mkdir(parents=True, exist_ok=True)
+    if parameters_yaml is not None:
+        (project_path / f"{project_name}.yaml").write_text(parameters_yaml)
+    for component, csv_text in model_outputs.items():
+        (project_path / "inputs" / f"model_output_{component}.csv").write_text(csv_text)
+
+def result_links(project_name: str) -> list:
+    """Get the links of the result files of a project."""
+    results_path = PathManager.PROJECTS_FOLDER_PATH / project_name / "results"
+    return [
+        f"/projects/{quote(project_name)}/results/{quote(path.relative_to(results_path).as_posix())}"
+        for path in sorted(results_path.rglob("*")) if path.is_file() and "partitions" not in path.relative_to(results_path).parts
+    ]
+
+class JobManager:
+    """
+    Queue of the submitted jobs with their status, only one job per project runs at a time.
+    A job is only finished once its worker returned and its last progress event was collected.
+    """
+
+    def __init__(self, workers: int) -> None:
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=warm_worker)
+        self.events = context.Manager().Queue()
+        self.jobs = {}
+        # Futures of the jobs whose worker returned and jobs whose last progress event was collected
+        self.outcomes = {}
+        self.drained = set()
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        threading.Thread(target=self._collect_events, daemon=True).start()
+
+    def _collect_events(self) -> None:
+        """Move the progress events of the workers to their jobs, a job is running from its first event."""
+        while True:
+            try:
+                job_id, event = self.events.get()
+            except (EOFError, OSError):
+                return
+            with self.changed:
+                if event is None:
+                    self.drained.add(job_id)
+                    if job_id in self.outcomes:
+                        self._complete(job_id)
+                    continue
+                job = self.jobs[job_id]
+                if job["status"] == "queued":
+                    job["status"] = "running"
+                job["progress"].append(event)
+                self.changed.notify_all()
+
+    def submit(self, project_name: str, parameters_yaml: str, model_outputs: dict, force: bool) -> dict:
+        with self.lock:
+            if any(job["project_name"] == project_name and job["status"] not in FINISHED for job in self.jobs.values()):
+                raise ValueError(f"A job of project {project_name} is already queued or running.")
+            write_job_inputs(project_name, parameters_yaml, model_outputs)
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                "job_id": job_id,
+                "project_name": project_name,
+                "status": "queued",
+                "submitted_at": datetime.now().isoformat(timespec="seconds"),
+                "progress": [],
+                "result": None,
+                "error": None,
+            }
+            self.jobs[job_id] = job
+        future = self.executor.submit(run_job, job_id, project_name, force, self.events)
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+        return self.status(job_id)
+
+    def _finish(self, job_id: str, future) -> None:
+        """Keep the outcome of a job, it is finished now if its events were collected or no more events can arrive."""
+        with self.changed:
+            self.outcomes[job_id] = future
+            no_more_events = future.cancelled() or isinstance(future.exception(), BrokenProcessPool)
+            if job_id in self.drained or no_more_events:
+                self._complete(job_id)
+
+    def _complete(self, job_id: str) -> None:
+        """Set the final status of a job, the lock must be held."""
+        future = self.outcomes.pop(job_id)
+        self.drained.discard(job_id)
+        job = self.jobs[job_id]
+        if future.cancelled():
+            job["status"], job["error"] = "failed", "The job was cancelled."
+        elif future.exception() is not None:
+            job["status"], job["error"] = "failed", repr(future.exception())
+        else:
+            job["status"], job["result"] = "completed", future.result()
+        job["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        self.changed.notify_all()
+
+    def has_job(self, job_id: str) -> bool:
+        with self.lock:
+            return job_id in self.jobs
+
+    def status(self, job_id: str) -> dict:
+        with self.lock:
+            job = dict(self.jobs[job_id])
+            job["progress"] = list(job["progress"])
+        if job["status"] == "completed":
+            job["artifacts"] = result_links(job["project_name"])
+        return job
+
+    def list_jobs(self) -> list:
+        with self.lock:
+            return [
+                {key: job.get(key) for key in ("job_id", "project_name", "status", "submitted_at", "finished_at")}
+                for job in self.jobs.values()
+            ]
+
+    def wait_for_events(self, job_id: str, seen: int) -> tuple:
+        """Wait until a job has more than the seen progress events or is finished, returns the new events and the status."""
+        with self.changed:
+            job = self.jobs[job_id]
+            self.changed.wait_for(lambda: len(job["progress"]) > seen or job["status"] in FINISHED, timeout=EVENT_POLL_INTERVAL)
+            return list(job["progress"][seen:]), job["status"]
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler of the job API, the job manager is set on the server."""
+
+    def send_json(self, data, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: HTTPStatus, message: str) -> None:
+        self.send_json({"error": message}, status)
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown endpoint.")
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            project_name = request["project_name"]
+            model_outputs = request.get("model_outputs", {})
+        except (ValueError, KeyError) as error:
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid request: {error}")
+        if not PROJECT_NAME_PATTERN.match(project_name) or not all(COMPONENT_PATTERN.match(component) for component in model_outputs):
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, "Invalid project or component name.")
+        if request.get("parameters_yaml") is None and not (PathManager.PROJECTS_FOLDER_PATH / project_name / f"{project_name}.yaml").exists():
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, "The parameters YAML is required for a new project.")
+        try:
+            job = self.server.jobs.submit(project_name, request.get("parameters_yaml"), model_outputs, bool(request.get("force", False)))
+        except ValueError as error:
+            return self.send_error_json(HTTPStatus.CONFLICT, str(error))
+        job["status_url"] = f"/jobs/{job['job_id']}"
+        job["events_url"] = f"/jobs/{job['job_id']}/events"
+        self.send_json(job, HTTPStatus.ACCEPTED)
+
+    def do_GET(self) -> None:
+        parts = [unquote(part) for part in urlparse(self.path).path.strip("/").split("/")]
+        if parts == ["jobs"]:
+            return self.send_json(self.server.jobs.list_jobs())
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            if not self.server.jobs.has_job(parts[1]):
+                return self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown job.")
+            if len(parts) == 2:
+                return self.send_json(self.server.jobs.status(parts[1]))
+            if parts[2] == "events":
+                return self.stream_events(parts[1])
+        if len(parts) >= 4 and parts[0] == "projects" and parts[2] == "results":
+            return self.send_result_file(parts[1], parts[3:])
+        self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown endpoint.")
+
+    def stream_events(self, job_id: str) -> None:
+        """Stream the progress of a job as server-sent events, the last event has the final status of the job."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        seen, status = 0, None
+        while status not in FINISHED:
+            events, status = self.server.jobs.wait_for_events(job_id, seen)
+            seen += len(events)
+            for event in events:
+                self.wfile.write(f"event: progress\ndata: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(f"event: {status}\ndata: {json.dumps(self.server.jobs.status(job_id), default=str)}\n\n".encode())
+        self.wfile.flush()
+
+    def send_result_file(self, project_name: str, path_parts: list) -> None:
+        results_path = (PathManager.PROJECTS_FOLDER_PATH / project_name / "results").resolve()
+        file_path = results_path.joinpath(*path_parts).resolve()
+        if results_path not in file_path.parents or not file_path.is_file():
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown result file.")
+        body = file_path.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/csv" if file_path.suffix == ".csv" else "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, workers: int = 2) -> ThreadingHTTPServer:
+    """Create the HTTP server of the job API with a pool of the given number of worker processes."""
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.jobs = JobManager(workers)
+    return server
+
+def main(arguments: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Run validation jobs through a local HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of the server, only local requests are accepted by default.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes, i.e. jobs running at the same time.")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = create_server(args.host, args.port, args.workers)
+    logger.info("Job API listening on http://%s:%d with %d workers", args.host, args.port, args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.jobs.executor.shutdown(cancel_futures=True)
+
+if __name__ == "__main__":
+    main()
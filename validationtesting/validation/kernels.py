@@ -0,0 +1,275 @@
+"""
+This module contains the kernels of the sequential calculations of the validators.
+The energy stored in the battery is a recursion over the time steps and the generators are dispatched one after another,
+so these loops are written once as plain Python reference kernels. The per-unit battery kernel tracks the energy stored
+in each unit (time steps x units), the battery power is split between the units in each time step. The rainflow kernel closes
+the charge cycles of the turning points of the state of charge on a stack. If Numba is installed, the reference kernels are
+compiled, otherwise an equivalent NumPy implementation is used. The NumPy rainflow kernel closes most cycles in a few
+vectorized passes and is faster than the compiled stack loop, so it is always the default for rainflow counting.
+All backends have the same arguments and return values.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Backend used if no backend is given, Numba is only used if it is installed
+BACKENDS = ("python", "numpy", "numba")
+DEFAULT_BACKEND = "numba" if numba is not None else "numpy"
+
+def reference_battery_energy_stored(battery_power, charging_efficiency, discharging_efficiency, active, installed_energy):
+    """
+    Calculate the energy stored in the battery after each time step.
+    The energy of newly installed units is added first, then the battery is charged (negative power) with the charging
+    efficiency or discharged (positive power) with the discharging efficiency if any unit is active.
+    """
+    energy_stored = np.empty(len(battery_power))
+    current_energy_stored = 0.0
+    for i in range(len(battery_power)):
+        current_energy_stored += installed_energy[i]
+        if active[i]:
+            if battery_power[i] <= 0:
+                current_energy_stored -= battery_power[i] * charging_efficiency[i]
+            else:
+                current_energy_stored -= battery_power[i] / discharging_efficiency[i]
+        energy_stored[i] = current_energy_stored
+    return energy_stored
+
+def numpy_battery_energy_stored(battery_power, charging_efficiency, discharging_efficiency, active, installed_energy):
+    """Calculate the energy stored in the battery after each time step as cumulative sum of the changes."""
+    battery_power = np.asarray(battery_power, dtype=float)
+    charging = battery_power <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(charging, -battery_power * charging_efficiency, -battery_power / np.where(charging, 1.0, discharging_efficiency))
+    return np.cumsum(installed_energy + np.where(active, change, 0.0))
+
+def reference_battery_unit_energy_stored(battery_power, capacity, charging_efficiency, discharging_efficiency, min_soc, max_soc,
+                                         installed_energy, split_headroom):
+    """
+    Calculate the energy stored in each battery unit after each time step (time steps x units).
+    The battery power is split between the units with capacity in proportion to their capacity, or with split_headroom
+    in proportion to the energy they can still take up to the maximum SoC when charging (negative power) or give down to
+    the minimum SoC when discharging. If no unit has headroom left, the power is split by capacity.
+    Returns the energy stored and the power of each unit.
+    """
+    num_steps, num_units = capacity.shape
+    energy_stored = np.empty((num_steps, num_units))
+    unit_power = np.zeros((num_steps, num_units))
+    current_energy_stored = np.zeros(num_units)
+    weights = np.zeros(num_units)
+    for i in range(num_steps):
+        total_weight = 0.0
+        for unit in range(num_units):
+            current_energy_stored[unit] += installed_energy[i, unit]
+            weights[unit] = 0.0
+            if split_headroom and capacity[i, unit] > 0:
+                if battery_power[i] <= 0:
+                    weights[unit] = max(max_soc[unit] * capacity[i, unit] - current_energy_stored[unit], 0.0)
+                else:
+                    weights[unit] = max(current_energy_stored[unit] - min_soc[unit] * capacity[i, unit], 0.0)
+            total_weight += weights[unit]
+        if total_weight <= 0:
+            for unit in range(num_units):
+                weights[unit] = max(capacity[i, unit], 0.0)
+                total_weight += weights[unit]
+        if total_weight > 0:
+            for unit in range(num_units):
+                power = battery_power[i] * weights[unit] / total_weight
+                unit_power[i, unit] = power
+                if power <= 0:
+                    current_energy_stored[unit] -= power * charging_efficiency[unit]
+                else:
+                    current_energy_stored[unit] -= power / discharging_efficiency[unit]
+        for unit in range(num_units):
+            energy_stored[i, unit] = current_energy_stored[unit]
+    return energy_stored, unit_power
+
+def numpy_battery_unit_energy_stored(battery_power, capacity, charging_efficiency, discharging_efficiency, min_soc, max_soc,
+                                     installed_energy, split_headroom):
+    """
+    Calculate the energy stored in each battery unit after each time step.
+    The split by capacity does not depend on the energy stored, so it is a cumulative sum over all units at once. The
+    split by headroom depends on the energy stored of the previous time step and is calculated step by step for all units.
+    """
+    battery_power = np.asarray(battery_power, dtype=float)
+    capacity = np.maximum(np.asarray(capacity, dtype=float), 0.0)
+    total_capacity = capacity.sum(axis=1, keepdims=True)
+    charging = (battery_power <= 0)[:, None]
+    if not split_headroom:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unit_power = np.where(total_capacity > 0, battery_power[:, None] * capacity / total_capacity, 0.0)
+            change = np.where(charging, -unit_power * charging_efficiency, -unit_power / discharging_efficiency)
+        return np.cumsum(installed_energy + change, axis=0), unit_power
+
+    energy_stored = np.empty(capacity.shape)
+    unit_power = np.zeros(capacity.shape)
+    current_energy_stored = np.zeros(capacity.shape[1])
+    for i in range(len(battery_power)):
+        current_energy_stored += installed_energy[i]
+        if charging[i, 0]:
+            weights = np.where(capacity[i] > 0, np.maximum(max_soc * capacity[i] - current_energy_stored, 0.0), 0.0)
+        else:
+            weights = np.where(capacity[i] > 0, np.maximum(current_energy_stored - min_soc * capacity[i], 0.0), 0.0)
+        if weights.sum() <= 0:
+            weights = capacity[i]
+        if weights.sum() > 0:
+            unit_power[i] = battery_power[i] * weights / weights.sum()
+            if charging[i, 0]:
+                current_energy_stored -= unit_power[i] * charging_efficiency
+            else:
+                current_energy_stored -= unit_power[i] / discharging_efficiency
+        energy_stored[i] = current_energy_stored
+    return energy_stored, unit_power
+
+def reference_dispatch_generators(total_energy, max_power):
+    """
+    Dispatch the total energy to the generators in the order of the units.
+    Each unit takes the remaining energy up to its maximum power (time steps x units).
+    """
+    num_steps, num_units = max_power.shape
+    energy = np.empty((num_steps, num_units))
+    for i in range(num_steps):
+        remaining_energy = total_energy[i]
+        for unit in range(num_units):
+            energy[i, unit] = min(remaining_energy, max_power[i, unit])
+            remaining_energy -= energy[i, unit]
+    return energy
+
+def numpy_dispatch_generators(total_energy, max_power):
+    """Dispatch the total energy to the generators in the order of the units from the cumulative maximum power."""
+    total_energy = np.asarray(total_energy, dtype=float)[:, None]
+    max_power = np.asarray(max_power, dtype=float)
+    previous_max_power = np.cumsum(max_power, axis=1) - max_power
+    remaining_energy = np.maximum(total_energy - previous_max_power, 0.0)
+    remaining_energy[:, :1] = total_energy
+    return np.minimum(remaining_energy, max_power)
+
+def reference_rainflow_cycles(reversals):
+    """
+    Count the cycles of a series of turning points with the three-point rainflow method of ASTM E1049.
+    A range that is not larger than the following range is closed as a full cycle, the ranges of the starting point
+    and of the residue at the end are half cycles. Returns the index of the first and last turning point of each
+    cycle and its count (1 or 0.5), sorted by the first turning point.
+    """
+    num_points = len(reversals)
+    stack = np.empty(num_points, dtype=np.int64)
+    starts = np.empty(num_points, dtype=np.int64)
+    ends = np.empty(num_points, dtype=np.int64)
+    counts = np.empty(num_points)
+    num_stack = 0
+    num_cycles = 0
+    for i in range(num_points):
+        stack[num_stack] = i
+        num_stack += 1
+        while num_stack >= 3:
+            current_range = abs(reversals[stack[num_stack - 1]] - reversals[stack[num_stack - 2]])
+            previous_range = abs(reversals[stack[num_stack - 2]] - reversals[stack[num_stack - 3]])
+            if current_range < previous_range:
+                break
+            if num_stack == 3:
+                # The previous range contains the starting point, it is a half cycle and the starting point is dropped
+                starts[num_cycles] = stack[0]
+                ends[num_cycles] = stack[1]
+                counts[num_cycles] = 0.5
+                stack[0] = stack[1]
+                stack[1] = stack[2]
+                num_stack = 2
+            else:
+                starts[num_cycles] = stack[num_stack - 3]
+                ends[num_cycles] = stack[num_stack - 2]
+                counts[num_cycles] = 1.0
+                stack[num_stack - 3] = stack[num_stack - 1]
+                num_stack -= 2
+            num_cycles += 1
+    for i in range(num_stack - 1):
+        starts[num_cycles] = stack[i]
+        ends[num_cycles] = stack[i + 1]
+        counts[num_cycles] = 0.5
+        num_cycles += 1
+    order = np.argsort(starts[:num_cycles])
+    return starts[:num_cycles][order], ends[:num_cycles][order], counts[:num_cycles][order]
+
+def numpy_rainflow_cycles(reversals):
+    """
+    Count the rainflow cycles of a series of turning points with the four-point method.
+    All ranges that are smaller than the range before and not larger than the range after are closed as full cycles at
+    once and removed, which gives the same cycles as the three-point method. If a pass closes only few cycles, the
+    remaining turning points are counted with the three-point method.
+    """
+    reversals = np.asarray(reversals, dtype=float)
+    remaining = np.arange(len(reversals))
+    starts, ends = [], []
+    while len(remaining) >= 4:
+        ranges = np.abs(np.diff(reversals[remaining]))
+        closed = np.flatnonzero((ranges[1:-1] < ranges[:-2]) & (ranges[1:-1] <= ranges[2:])) + 1
+        if len(closed) <= len(remaining) // 64:
+            break
+        starts.append(remaining[closed])
+        ends.append(remaining[closed + 1])
+        keep = np.ones(len(remaining), dtype=bool)
+        keep[closed] = False
+        keep[closed + 1] = False
+        remaining = remaining[keep]
+    residue_starts, residue_ends, residue_counts = reference_rainflow_cycles(reversals[remaining])
+    starts = np.concatenate(starts + [remaining[residue_starts]])
+    ends = np.concatenate(ends + [remaining[residue_ends]])
+    counts = np.concatenate([np.ones(len(starts) - len(residue_counts)), residue_counts])
+    order = np.argsort(starts)
+    return starts[order], ends[order], counts[order]
+
+KERNELS = {
+    "battery_energy_stored": {"python": reference_battery_energy_stored, "numpy": numpy_battery_energy_stored},
+    "battery_unit_energy_stored": {"python": reference_battery_unit_energy_stored, "numpy": numpy_battery_unit_energy_stored},
+    "dispatch_generators": {"python": reference_dispatch_generators, "numpy": numpy_dispatch_generators},
+    "rainflow_cycles": {"python": reference_rainflow_cycles, "numpy": numpy_rainflow_cycles},
+}
+
+if numba is not None:
+    KERNELS["battery_energy_stored"]["numba"] = numba.njit(cache=True)(reference_battery_energy_stored)
+    KERNELS["battery_unit_energy_stored"]["numba"] = numba.njit(cache=True)(reference_battery_unit_energy_stored)
+    KERNELS["dispatch_generators"]["numba"] = numba.njit(cache=True)(reference_dispatch_generators)
+    KERNELS["rainflow_cycles"]["numba"] = numba.njit(cache=True)(reference_rainflow_cycles)
+
+# Default backend of each kernel if it differs from DEFAULT_BACKEND
+KERNEL_DEFAULT_BACKENDS = {"rainflow_cycles": "numpy"}
+
+def default_backend(name: str) -> str:
+    return KERNEL_DEFAULT_BACKENDS.get(name, DEFAULT_BACKEND)
+
+def get_kernel(name: str, backend: str = None):
+    """Get the implementation of a kernel for a backend, the default backend of the kernel is used if none is given."""
+    backend = backend or default_backend(name)
+    if backend not in KERNELS[name]:
+        raise ValueError(f"Backend {backend} is not available for {name}, available backends: {', '.join(KERNELS[name])}.")
+    return KERNELS[name][backend]
+
+def battery_energy_stored(battery_power, charging_efficiency, discharging_efficiency, active, installed_energy, backend: str = None) -> np.ndarray:
+    """Calculate the energy stored in the battery after each time step, see reference_battery_energy_stored."""
+    return get_kernel("battery_energy_stored", backend)(
+        np.ascontiguousarray(battery_power, dtype=float), np.ascontiguousarray(charging_efficiency, dtype=float),
+        np.ascontiguousarray(discharging_efficiency, dtype=float), np.ascontiguousarray(active, dtype=bool),
+        np.ascontiguousarray(installed_energy, dtype=float),
+    )
+
+def battery_unit_energy_stored(battery_power, capacity, charging_efficiency, discharging_efficiency, min_soc, max_soc,
+                               installed_energy, split_headroom: bool = False, backend: str = None) -> tuple:
+    """Calculate the energy stored and the power of each battery unit, see reference_battery_unit_energy_stored."""
+    return get_kernel("battery_unit_energy_stored", backend)(
+        np.ascontiguousarray(battery_power, dtype=float), np.ascontiguousarray(capacity, dtype=float),
+        np.ascontiguousarray(charging_efficiency, dtype=float), np.ascontiguousarray(discharging_efficiency, dtype=float),
+        np.ascontiguousarray(min_soc, dtype=float), np.ascontiguousarray(max_soc, dtype=float),
+        np.ascontiguousarray(installed_energy, dtype=float), bool(split_headroom),
+    )
+
+def dispatch_generators(total_energy, max_power, backend: str = None) -> np.ndarray:
+    """Dispatch the total energy to the generators in the order of the units, see reference_dispatch_generators."""
+    return get_kernel("dispatch_generators", backend)(
+        np.ascontiguousarray(total_energy, dtype=float), np.ascontiguousarray(max_power, dtype=float),
+    )
+
+def rainflow_cycles(reversals, backend: str = None) -> tuple:
+    """Count the rainflow cycles of a series of turning points, see reference_rainflow_cycles."""
+    return get_kernel("rainflow_cycles", backend)(np.ascontiguousarray(reversals, dtype=float))
@@ -0,0 +1,48 @@
+"""
+This module is used to load the uploaded model output of the components onto a shared time axis.
+"""
+
+import streamlit as st
+import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.validation.out_of_core import read_year
+
+def read_model_output(component: str, columns: list = None, year: int = None) -> pd.DataFrame:
+    """
+    Read the model output of a component indexed by time.
+    If columns are given, only these columns are read (missing columns are skipped).
+    If a year is given, only this year is read from the partitions of the out-of-core engine.
+    """
+    if year is not None:
+        model_output = read_year(f"model_output_{component}", year)
+        model_output = model_output[[column for column in model_output.columns if columns is None or column in ["Time", *columns]]]
+        model_output.index = pd.DatetimeIndex(pd.to_datetime(model_output.pop("Time")), name="Time")
+        return model_output
+    project_name = st.session_state.get("project_name")
+    model_output_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "inputs" / f"model_output_{component}.csv"
+    if columns is None:
+        model_output = pd.read_csv(model_output_path)
+    else:
+        model_output = pd.read_csv(model_output_path, usecols=lambda column: column in ["Time", *columns])
+    model_output.index = pd.DatetimeIndex(pd.to_datetime(model_output.pop("Time")), name="Time")
+    return model_output
+
+def load_component_energy(components: list, time_index: pd.DatetimeIndex = None, subtract_curtailment: bool = True, year: int = None) -> pd.DataFrame:
+    """
+    Load the energy of each component onto the given time axis, one column per component.
+    If no time axis is given, the time axis of the first component is used.
+    The curtailed energy is subtracted if it is part of the model output. Every model output file is read only once.
+    If a year is given, only this year is loaded from the partitions of the out-of-core engine.
+    """
+    component_energy = {}
+    for component in components:
+        energy_column = f"Model {component} Energy Total [Wh]"
+        curtailment_column = f"Model {component} Curtailed Energy Total [Wh]"
+        model_output = read_model_output(component, [energy_column, curtailment_column], year)
+        if time_index is None:
+            time_index = model_output.index
+        energy = model_output[energy_column]
+        if subtract_curtailment and curtailment_column in model_output.columns:
+            energy = energy - model_output[curtailment_column]
+        component_energy[component] = energy.reindex(time_index).to_numpy(dtype=float)
+    return pd.DataFrame(component_energy, index=time_index)
@@ -0,0 +1,86 @@
+"""
+This module is used to run the validation out of core for very long or very wide projects.
+The hourly tables are stored as Parquet partitions with one partition per year in the results folder, so that the
+benchmark, the error calculation and the energy balance only hold one year in memory at a time. Aggregations over
+all years are calculated with Dask on the partitions and give the same results as the in-memory engine.
+"""
+
+import streamlit as st
+import pandas as pd
+import shutil
+from config.path_manager import PathManager
+
+IN_MEMORY = "In-Memory"
+OUT_OF_CORE = "Out-of-Core"
+EXECUTION_ENGINES = [IN_MEMORY, OUT_OF_CORE]
+
+# Number of rows read at once when a CSV file is partitioned
+PARTITION_CHUNK_SIZE = 8760
+
+def use_out_of_core() -> bool:
+    """Whether the current run uses the out-of-core engine."""
+    return st.session_state.get("execution_engine", IN_MEMORY) == OUT_OF_CORE
+
+def get_partitions_path(name: str):
+    """Get the folder of the yearly partitions of a table."""
+    project_name = st.session_state.get("project_name")
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "partitions" / name
+
+def clear_partitions(name: str) -> None:
+    """Remove the partitions of a table, e.g. before it is written again."""
+    shutil.rmtree(get_partitions_path(name), ignore_errors=True)
+
+def write_partition(name: str, frame: pd.DataFrame) -> None:
+    """Append the rows of a table with a Time column to the partitions of their years."""
+    if frame.empty:
+        return
+    frame = frame.assign(Year=pd.to_datetime(frame["Time"]).dt.year)
+    frame.to_parquet(get_partitions_path(name), partition_cols=["Year"], index=False)
+
+def partition_csv(name: str, csv_path, columns: list = None, chunksize: int = PARTITION_CHUNK_SIZE) -> None:
+    """Split a CSV file with a Time column into yearly partitions, only one chunk of rows is read at a time."""
+    clear_partitions(name)
+    usecols = None if columns is None else (lambda column: column in ["Time", *columns])
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+        chunk["Time"] = pd.to_datetime(chunk["Time"])
+        write_partition(name, chunk)
+
+def partition_years(name: str) -> list:
+    """Get the years of the partitions of a table in chronological order."""
+    partitions_path = get_partitions_path(name)
+    if not partitions_path.exists():
+        return []
+    return sorted(int(path.name.split("=")[1]) for path in partitions_path.glob("Year=*"))
+
+def read_year(name: str, year: int, columns: list = None) -> pd.DataFrame:
+    """Read the partition of one year of a table sorted by time, an empty table if there is no data for this year."""
+    year_path = get_partitions_path(name) / f"Year={year}"
+    if not year_path.exists():
+        return pd.DataFrame(columns=["Time", *(columns or [])])
+    columns = None if columns is None else ["Time", *[column for column in columns if column != "Time"]]
+    frame = pd.read_parquet(year_path, columns=columns)
+    return frame.sort_values("Time", kind="stable").reset_index(drop=True)
+
+def read_column(name: str, column: str) -> pd.Series:
+    """Read one column of a table over all years, indexed by time."""
+    years = [read_year(name, year, [column]) for year in partition_years(name)]
+    frame = pd.concat(years, ignore_index=True)
+    return pd.Series(frame[column].to_numpy(), index=pd.DatetimeIndex(frame["Time"], name="Time"), name=column)
+
+def read_columns(name: str) -> list:
+    """Get the columns of a table without the partition column."""
+    import pyarrow.parquet as pq
+
+    first_file = next(get_partitions_path(name).glob("Year=*/*.parquet"))
+    return [column for column in pq.read_schema(first_file).names if column != "Year"]
+
+def read_partitions(name: str, columns: list = None):
+    """Read all partitions of a table as a Dask dataframe."""
+    import dask.dataframe as dd
+
+    columns = None if columns is None else ["Time", *[column for column in columns if column != "Time"]]
+    return dd.read_parquet(str(get_partitions_path(name)), columns=columns)
+
+def compute(result):
+    """Compute the result of a Dask calculation, results of the in-memory engine are returned as they are."""
+    return result.compute() if hasattr(result, "compute") else result
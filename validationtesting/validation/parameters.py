@@ -4,10 +4,17 @@ It can be instantiated from and saved to a YAML file for ease of configuration m
 """
 
 from datetime import datetime
+import os
+import shutil
+import tempfile
 
 import yaml
 from pydantic import BaseModel, ConfigDict
 
+# Use the libyaml bindings if PyYAML was built with them
+YAML_LOADER = getattr(yaml, "CFullLoader", yaml.FullLoader)
+YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
 
 class ProjectInfo(BaseModel):
     """
@@ -32,6 +39,9 @@ class ComponentSelection(BaseModel):
         technical_validation (bool): Whether to perform technical validation.
         economic_validation (bool): Whether to perform economic validation.
         energy_balance (bool): Whether to perform energy balance validation.
+        energy_balance_tolerance (float): Maximum absolute residual [Wh] of the hourly energy balance.
+        deviation_threshold (float): Maximum deviation [%] of the model from the benchmark output before an hour is flagged.
+        soc_tolerance (float): Tolerance [%] of the battery state of charge limits.
     """
     # Parameters
     solar_pv: bool
@@ -42,6 +52,9 @@ class ComponentSelection(BaseModel):
     economic_validation: bool
     energy_balance: bool
     conversion: bool
+    energy_balance_tolerance: float = 1.0
+    deviation_threshold: float = 2.0
+    soc_tolerance: float = 0.5
 
 class GeneralInfo(BaseModel):
     """
@@ -53,6 +66,10 @@ class GeneralInfo(BaseModel):
         discount_rate (float): The discount rate for the project.
         lat (float): The latitude of the project.
         lon (float): The longitude of the project.
+        sensitivity_discount_rates (list): Discount rates [%] evaluated in the cost sensitivity analysis.
+        sensitivity_investment_cost_multipliers (list): Investment cost multipliers evaluated in the cost sensitivity analysis.
+        sensitivity_fuel_price_multipliers (list): Fuel price multipliers evaluated in the cost sensitivity analysis.
+        execution_engine (str): Engine of the technical validation, "In-Memory" or "Out-of-Core" for yearly partitions.
     """
     # Parameters
     start_date: datetime
@@ -62,6 +79,10 @@ class GeneralInfo(BaseModel):
     lat: float
     lon: float
     current_type: str
+    sensitivity_discount_rates: list = [2.0, 5.0, 8.0, 11.0]
+    sensitivity_investment_cost_multipliers: list = [0.8, 1.0, 1.2]
+    sensitivity_fuel_price_multipliers: list = [0.8, 1.0, 1.2]
+    execution_engine: str = "In-Memory"
 
 
 class SolarPV(BaseModel):
@@ -160,6 +181,8 @@ class Battery(BaseModel):
         battery_maintenance_cost (list): Maintenance cost for each battery type.
         battery_chemistry (list): Chemistry for each battery type.
         battery_model (list): Model used for cyclic degradation calculation for each battery type.
+        battery_degradation_accounting (str): Whether degradation is accounted as capacity loss or replacement cost.
+        battery_dispatch_split (str): Split of the battery power between the units, Aggregate, Capacity or Headroom.
     """
     # Parameters
     battery_num_units: int
@@ -192,6 +215,7 @@ class Battery(BaseModel):
     battery_chemistry: list
     battery_model: list
     battery_degradation_accounting: str
+    battery_dispatch_split: str = "Aggregate"
 
 class SolarIrradiation(BaseModel):
     """
@@ -346,6 +370,11 @@ class Conversion(BaseModel):
     solar_pv_connection_type: str
     wind_connection_type: str
     conversion_losses_data_uploaded: bool
+    conversion_part_load_efficiency: bool = False
+    solar_pv_conversion_rated_power: float = 1000.0
+    wind_conversion_rated_power: float = 1000.0
+    generator_conversion_rated_power: float = 1000.0
+    battery_conversion_rated_power: float = 1000.0
 
 class UploadModelOutput(BaseModel):
     """
@@ -388,10 +417,21 @@ class ProjectParameters(BaseModel):
     def instantiate_from_yaml(cls, filepath: str) -> 'ProjectParameters':
         """Instantiate a ProjectParameters object loading parameters from a YAML file."""
         with open(filepath, 'r') as file:
-            data = yaml.load(file, Loader=yaml.FullLoader)
+            data = yaml.load(file, Loader=YAML_LOADER)
         return cls(**data)
     
     def save_to_yaml(self, filepath: str) -> None:
-        """Save parameters to a YAML file."""
-        with open(filepath, 'w') as file:
-            yaml.dump(self.model_dump(), file)
+        """Save parameters to a YAML file. The file is replaced atomically, so it is never left partially written."""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        file = tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False)
+        try:
+            with file:
+                yaml.dump(self.model_dump(), file, Dumper=YAML_DUMPER)
+            # The temporary file is created with 0600, keep the permissions of the replaced project file
+            if os.path.exists(filepath):
+                shutil.copymode(filepath, file.name)
+            os.replace(file.name, filepath)
+        except BaseException:
+            if os.path.exists(file.name):
+                os.remove(file.name)
+            raise
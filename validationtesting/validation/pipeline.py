@@ -0,0 +1,297 @@
+"""
+This module is used to re-run only the validation stages whose inputs changed.
+Every stage declares the session state parameters and input files it reads, the stages whose results it reads and the
+result files it produces. The session state keys read by name in the code of the stage and of the package modules it
+imports are added to the declared parameters. The fingerprint of a stage is a hash of these parameters, input files,
+the code of the stage and of these modules and the fingerprints of its upstream stages. A stage is reused if its
+fingerprint is the same as after its last run and its results still exist, so a changed parameter only recomputes the
+stages reading it and their downstream stages.
+"""
+
+import ast
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping
+import streamlit as st
+from config.path_manager import PathManager
+from validationtesting.validation.parameters import ProjectParameters
+from validationtesting.validation.run_history import hash_cached
+from validationtesting.utils.lazy_import import load_attribute
+
+# Cost parameters are only read by the economic stages
+COST_SUFFIXES = ("_investment_cost", "_exclude_investment_cost", "_maintenance_cost", "_end_of_project_cost")
+
+COMPONENT_FLAGS = ("solar_pv", "wind", "generator", "battery", "conversion")
+
+# Only modules of this package are part of the code of a stage
+PACKAGE = "validationtesting"
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+def section_keys(*sections: str, include_costs: bool = False) -> tuple:
+    """Get the session state keys of the parameters of the given sections of the project parameters."""
+    keys = []
+    for section in sections:
+        for key in ProjectParameters.model_fields[section].annotation.model_fields:
+            if include_costs or not key.endswith(COST_SUFFIXES):
+                keys.append(key)
+    return tuple(keys)
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """
+    Declaration of a validation stage.
+
+    Attributes:
+        name (str): Name of the stage, the same as in the validation stages of the run page.
+        label (str): Label of the stage shown in the UI.
+        module (str): Module of the stage, its code is part of the fingerprint.
+        function (str): Function of the module running the stage, it is imported on first use.
+        enabled_by (tuple): Session state flags of which at least one must be set for the stage to run.
+        parameters (tuple): Session state keys of the parameters read by the stage, the keys read by name in its code are added.
+        inputs (tuple): Glob patterns of the input files read by the stage, relative to the inputs folder.
+        depends_on (tuple): Stages whose results are read by the stage.
+        artifacts (tuple): Result files produced by the stage, relative to the results folder.
+    """
+    name: str
+    label: str
+    module: str
+    function: str
+    enabled_by: tuple
+    parameters: tuple = ()
+    inputs: tuple = ()
+    depends_on: tuple = ()
+    artifacts: tuple = ()
+
+    def is_enabled(self, state: Mapping) -> bool:
+        return any(state.get(flag) for flag in self.enabled_by)
+
+    def load(self):
+        """Import the function running the stage."""
+        return load_attribute(self.module, self.function)
+
+@dataclass(frozen=True, slots=True)
+class StagePlan:
+    """Planned run of a stage with its current fingerprint, reused is set if the stage does not need to run."""
+    stage: Stage
+    fingerprint: str
+    reused: bool
+
+STAGES = {
+    "benchmark": Stage(
+        name="benchmark",
+        label="Solar PV and Wind Benchmark",
+        module="validationtesting.validation.benchmark",
+        function="Benchmark",
+        enabled_by=("solar_pv", "wind"),
+        parameters=("start_date", "end_date", "timezone", "lat", "lon", "solar_pv", "wind", "deviation_threshold", "execution_engine",
+                    "discount_rate", "battery_temporal_degradation")
+            + section_keys("solar_pv_parameters", "solar_irradiation_parameters", "wind_parameters"),
+        inputs=("solar_irradiation.csv", "wind_data.csv", "wind_power_curve_type_*.csv", "model_output_solar_pv.csv", "model_output_wind.csv"),
+        artifacts=("combined_model_benchmark.csv",),
+    ),
+    "error_calculation": Stage(
+        name="error_calculation",
+        label="Error Calculation",
+        module="validationtesting.validation.error_calculation",
+        function="ERROR",
+        enabled_by=("solar_pv", "wind"),
+        parameters=("solar_pv", "wind", "execution_engine"),
+        depends_on=("benchmark",),
+        artifacts=("Error Calculation",),
+    ),
+    "battery": Stage(
+        name="battery",
+        label="Battery",
+        module="validationtesting.validation.battery_validation",
+        function="battery_validation_testing",
+        enabled_by=("battery",),
+        parameters=("start_date", "end_date", "soc_tolerance") + section_keys("battery_parameters"),
+        inputs=("model_output_battery.csv",),
+        artifacts=("battery_validation.csv",),
+    ),
+    "generator": Stage(
+        name="generator",
+        label="Generator",
+        module="validationtesting.validation.generator_validation",
+        function="generator_validation_testing",
+        enabled_by=("generator",),
+        parameters=("start_date", "end_date", "discount_rate", "battery_temporal_degradation_rate") + section_keys("generator_parameters"),
+        inputs=("model_output_generator.csv", "generator_dynamic_efficiency_type_*.csv", "generator_fuel_price.csv"),
+        artifacts=("generator_validation.csv",),
+    ),
+    "conversion": Stage(
+        name="conversion",
+        label="Conversion Losses",
+        module="validationtesting.validation.conversion_losses_validation",
+        function="conversion_losses_validation",
+        enabled_by=("conversion",),
+        parameters=COMPONENT_FLAGS + ("current_type",) + section_keys("conversion_parameters"),
+        inputs=("conversion_efficiency_curve_*.csv", "model_conversion_losses.csv", "model_output_*.csv"),
+        artifacts=("conversion_losses_validation.csv",),
+    ),
+    "energy_balance": Stage(
+        name="energy_balance",
+        label="Energy Balance",
+        module="validationtesting.validation.energy_balance_validation",
+        function="energy_balance_validation",
+        enabled_by=("energy_balance",),
+        parameters=COMPONENT_FLAGS + ("energy_balance_tolerance", "solar_pv_curtailment", "wind_curtailment", "execution_engine"),
+        inputs=("model_output_*.csv",),
+        depends_on=("conversion",),
+        artifacts=("energy_balance.csv",),
+    ),
+    "cost": Stage(
+        name="cost",
+        label="Cost",
+        module="validationtesting.validation.cost_validation",
+        function="cost_validation",
+        enabled_by=("economic_validation",),
+        parameters=("start_date", "end_date", "discount_rate", "technical_validation") + COMPONENT_FLAGS + section_keys(
+            "solar_pv_parameters", "wind_parameters", "generator_parameters", "battery_parameters", include_costs=True),
+        inputs=("generator_fuel_price.csv",),
+        depends_on=("benchmark", "battery", "generator"),
+        artifacts=("cost_validation.csv",),
+    ),
+    "cost_sensitivity": Stage(
+        name="cost_sensitivity",
+        label="Cost Sensitivity",
+        module="validationtesting.validation.cost_sensitivity",
+        function="cost_sensitivity_validation",
+        enabled_by=("economic_validation",),
+        parameters=("start_date", "end_date", "discount_rate", "technical_validation", "sensitivity_discount_rates",
+                    "sensitivity_investment_cost_multipliers", "sensitivity_fuel_price_multipliers") + COMPONENT_FLAGS + section_keys(
+            "solar_pv_parameters", "wind_parameters", "generator_parameters", "battery_parameters", include_costs=True),
+        inputs=("generator_fuel_price.csv",),
+        depends_on=("generator",),
+        artifacts=("cost_sensitivity.csv",),
+    ),
+}
+
+TECHNICAL_STAGES = ["benchmark", "error_calculation", "battery", "generator", "conversion", "energy_balance"]
+
+def get_pipeline_path(project_name: str) -> Path:
+    """Get the path of the file with the fingerprints of the last run of each stage."""
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "pipeline.json"
+
+def load_pipeline_state(project_name: str) -> dict:
+    pipeline_path = get_pipeline_path(project_name)
+    state = json.loads(pipeline_path.read_text()) if pipeline_path.exists() else {}
+    state.setdefault("stages", {})
+    state.setdefault("hash_cache", {})
+    return state
+
+def save_pipeline_state(project_name: str, pipeline_state: dict) -> None:
+    pipeline_path = get_pipeline_path(project_name)
+    pipeline_path.parent.mkdir(parents=True, exist_ok=True)
+    pipeline_path.write_text(json.dumps(pipeline_state))
+
+def module_path(module: str) -> Path | None:
+    """Get the source file of a package module without importing it, None if the name is not a module."""
+    path = PACKAGE_ROOT.joinpath(*module.split(".")).with_suffix(".py")
+    return path if path.is_file() else None
+
+@lru_cache(maxsize=None)
+def _parse_module(path: Path, modified_time: int) -> tuple:
+    """
+    Get the package modules imported by a module and the session state keys it reads by name.
+    The result is cached by modification time, so a module is only parsed again after it changed.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    imports, keys = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names if alias.name.startswith(PACKAGE))
+        elif isinstance(node, ast.ImportFrom) and node.module and node.module.startswith(PACKAGE):
+            imports.add(node.module)
+            # Submodules imported from a package, such as "from validationtesting.validation import kernels"
+            imports.update(f"{node.module}.{alias.name}" for alias in node.names if module_path(f"{node.module}.{alias.name}"))
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Attribute) and node.value.attr == "session_state":
+            if node.attr not in ("get", "setdefault"):
+                keys.add(node.attr)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ("get", "setdefault"):
+            target = node.func.value
+            if isinstance(target, ast.Attribute) and target.attr == "session_state" and node.args and isinstance(node.args[0], ast.Constant):
+                keys.add(node.args[0].value)
+        elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Attribute) and node.value.attr == "session_state":
+            if isinstance(node.slice, ast.Constant):
+                keys.add(node.slice.value)
+    return tuple(sorted(imports)), tuple(sorted(key for key in keys if isinstance(key, str)))
+
+def stage_code(stage: Stage) -> tuple:
+    """
+    Get the source files of a stage module and of all package modules it imports, directly or through other modules,
+    together with the session state keys read by name in these files.
+    """
+    paths, keys = {}, set()
+    pending = [stage.module]
+    while pending:
+        module = pending.pop()
+        if module in paths:
+            continue
+        path = module_path(module)
+        paths[module] = path
+        if path is None:
+            continue
+        imports, module_keys = _parse_module(path, path.stat().st_mtime_ns)
+        keys.update(module_keys)
+        pending.extend(imports)
+    return {module: path for module, path in paths.items() if path is not None}, keys
+
+def stage_fingerprint(stage: Stage, state: Mapping, project_path: Path, upstream: dict, hash_cache: dict) -> str:
+    """Calculate the fingerprint of a stage from its parameters, input files, code and upstream fingerprints."""
+    inputs_path = project_path / "inputs"
+    input_hashes = {
+        path.name: hash_cached(path, hash_cache)
+        for pattern in stage.inputs for path in sorted(inputs_path.glob(pattern)) if path.is_file()
+    }
+    code_paths, code_keys = stage_code(stage)
+    fingerprint = {
+        "parameters": {key: repr(state.get(key)) for key in code_keys.union(stage.parameters)},
+        "inputs": input_hashes,
+        "code": {module: hash_cached(path, hash_cache) for module, path in code_paths.items()},
+        "upstream": upstream,
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+def plan_stages(names: list, state: Mapping = None, force: bool = False) -> list:
+    """
+    Plan the run of the given stages in their order, stages that are not enabled are skipped.
+    A stage is reused if its fingerprint did not change since its last run and its results exist, unless force is set.
+    """
+    state = st.session_state if state is None else state
+    project_name = state.get("project_name")
+    project_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name)
+    pipeline_state = load_pipeline_state(project_name)
+    completed = pipeline_state["stages"]
+
+    plan, fingerprints = [], {}
+    for name in names:
+        stage = STAGES[name]
+        if not stage.is_enabled(state):
+            continue
+        # Upstream stages of this run use their new fingerprint, other upstream stages the one of their last run
+        upstream = {
+            dependency: fingerprints.get(dependency, completed.get(dependency, {}).get("fingerprint"))
+            for dependency in stage.depends_on if STAGES[dependency].is_enabled(state)
+        }
+        fingerprint = stage_fingerprint(stage, state, project_path, upstream, pipeline_state["hash_cache"])
+        fingerprints[name] = fingerprint
+        artifacts_exist = all((project_path / "results" / artifact).exists() for artifact in stage.artifacts)
+        reused = not force and artifacts_exist and completed.get(name, {}).get("fingerprint") == fingerprint
+        plan.append(StagePlan(stage, fingerprint, reused))
+    save_pipeline_state(project_name, pipeline_state)
+    return plan
+
+def complete_stage(stage_plan: StagePlan, project_name: str = None) -> None:
+    """Record the fingerprint of a stage after it ran, so that it is reused in the next run if nothing changed."""
+    project_name = st.session_state.get("project_name") if project_name is None else project_name
+    pipeline_state = load_pipeline_state(project_name)
+    pipeline_state["stages"][stage_plan.stage.name] = {
+        "fingerprint": stage_plan.fingerprint,
+        "completed_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    save_pipeline_state(project_name, pipeline_state)
@@ -0,0 +1,138 @@
+"""
+This module is used to compile the project parameters into immutable unit tables for each component.
+The type of each unit is parsed once into an integer index, the installation date and end of life are stored
+as int64 nanosecond timestamps and the per-type parameters are gathered into one array per unit.
+The validators consume these tables instead of parsing the type strings and indexing the parameter lists every hour.
+"""
+
+import streamlit as st
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+import numpy as np
+import pandas as pd
+from validationtesting.validation.parameters import ProjectParameters
+
+# Session state keys describing the units of each component
+UNIT_KEYS = {
+    "solar_pv": {
+        "num_units": "solar_pv_num_units",
+        "installation_dates": "installation_dates",
+        "type": "solar_pv_type",
+        "capacity": "pv_nominal_power",
+        "lifetime": "pv_lifetime",
+    },
+    "wind": {
+        "num_units": "wind_num_units",
+        "installation_dates": "wind_installation_dates",
+        "type": "wind_type",
+        "capacity": "wind_rated_power",
+        "lifetime": "wind_lifetime",
+    },
+    "generator": {
+        "num_units": "generator_num_units",
+        "installation_dates": "generator_installation_dates",
+        "type": "generator_type",
+        "capacity": "generator_max_power",
+        "lifetime": "generator_lifetime",
+    },
+    "battery": {
+        "num_units": "battery_num_units",
+        "installation_dates": "battery_installation_dates",
+        "type": "battery_type",
+        "capacity": "battery_capacity",
+        "lifetime": "battery_lifetime",
+    },
+}
+
+def type_index(unit_type: str) -> int:
+    """Get the zero based index of a type name such as "Type 1"."""
+    return int(unit_type.replace("Type ", "")) - 1
+
+def timestamps(times) -> np.ndarray:
+    """Get the timestamps as int64 nanoseconds."""
+    return pd.DatetimeIndex(pd.to_datetime(times)).asi8
+
+def _read_only(values) -> np.ndarray:
+    array = np.array(values)
+    array.flags.writeable = False
+    return array
+
+def _gather(component: str, name: str, values: list, types: np.ndarray) -> np.ndarray:
+    """Gather the value of the type of each unit from a per-type parameter list."""
+    if len(values) <= types.max(initial=-1):
+        raise ValueError(f"{name} has {len(values)} entries, but {component} uses Type {types.max() + 1}.")
+    return _read_only([values[unit_type] for unit_type in types])
+
+@dataclass(frozen=True, slots=True)
+class UnitTable:
+    """
+    Immutable table of the units of one component.
+
+    Attributes:
+        component (str): Name of the component.
+        type_index (np.ndarray): Zero based type index of each unit (int64).
+        installation_dates (tuple): Installation date of each unit.
+        end_of_life_dates (tuple): End of life of each unit, the installation date plus the lifetime of its type in years.
+        lifetime (np.ndarray): Lifetime of the type of each unit in years.
+        installation_time (np.ndarray): Installation date of each unit as nanosecond timestamp (int64).
+        end_of_life_time (np.ndarray): End of life of each unit as nanosecond timestamp (int64).
+        parameters (Mapping): Per-unit arrays of the requested per-type parameters.
+    """
+    component: str
+    type_index: np.ndarray
+    installation_dates: tuple
+    end_of_life_dates: tuple
+    lifetime: np.ndarray
+    installation_time: np.ndarray
+    end_of_life_time: np.ndarray
+    parameters: Mapping
+
+    @property
+    def num_units(self) -> int:
+        return len(self.type_index)
+
+    def __getitem__(self, parameter: str) -> np.ndarray:
+        return self.parameters[parameter]
+
+    def available(self, times) -> np.ndarray:
+        """Get whether each unit is in operation (time steps x units), from its installation date until its end of life."""
+        times = timestamps(times)[:, None]
+        return (times >= self.installation_time[None, :]) & (times <= self.end_of_life_time[None, :])
+
+def flatten_parameters(parameters: ProjectParameters) -> dict:
+    """Flatten the project parameters into one mapping with the same keys as the session state."""
+    flat = {}
+    for section in parameters.model_dump().values():
+        flat.update(section)
+    return flat
+
+def compile_unit_table(component: str, parameter_names: list = (), state: Mapping = None) -> UnitTable:
+    """
+    Compile the units of a component into an immutable unit table.
+    The per-type parameters given by parameter_names are gathered for each unit, keeping the parameter names as keys.
+    """
+    state = st.session_state if state is None else state
+    keys = UNIT_KEYS[component]
+    num_units = state[keys["num_units"]]
+
+    types = np.array([type_index(unit_type) for unit_type in state[keys["type"]][:num_units]], dtype=np.int64)
+    installation_dates = tuple(state[keys["installation_dates"]][:num_units])
+    lifetime = _gather(component, keys["lifetime"], state[keys["lifetime"]], types)
+    end_of_life_dates = tuple(
+        installation_date.replace(year=installation_date.year + int(unit_lifetime))
+        for installation_date, unit_lifetime in zip(installation_dates, lifetime)
+    )
+
+    unit_parameters = {name: _gather(component, name, state[name], types) for name in parameter_names}
+
+    return UnitTable(
+        component=component,
+        type_index=_read_only(types),
+        installation_dates=installation_dates,
+        end_of_life_dates=end_of_life_dates,
+        lifetime=lifetime,
+        installation_time=_read_only(timestamps(installation_dates)),
+        end_of_life_time=_read_only(timestamps(end_of_life_dates)),
+        parameters=MappingProxyType(unit_parameters),
+    )
@@ -0,0 +1,344 @@
+"""
+This module is used to collect the results of all projects in one embedded SQLite database for cross-project queries.
+After each validation run the run metadata, the error metrics, the energy balance residuals, the rollups and the
+violation events of the project are written to the database in the projects folder. Questions over the whole
+portfolio, e.g. which projects had a solar PV MAE above a value in a year, are answered with one indexed query
+instead of opening the CSV files of every project.
+
+Usage:
+    python -m validationtesting.validation.results_store ingest [PROJECT ...]
+    python -m validationtesting.validation.results_store metrics --component solar_pv --metric mae --granularity yearly --period 2030 --above 100
+    python -m validationtesting.validation.results_store sql "SELECT project_name, COUNT(*) FROM latest_events GROUP BY project_name"
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Mapping
+import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.validation.rollups import ROLLUP_LEVELS
+
+RESULTS_DATABASE_PATH: Path = PathManager.PROJECTS_FOLDER_PATH / "results.sqlite"
+
+COMPONENTS = ["solar_pv", "wind", "generator", "battery", "conversion", "energy_balance"]
+
+# Error Calculation files are named {component}_{metric}_{granularity}.csv
+ERROR_METRICS = ["benchmark_mean", "model_mean", "mae", "rmse"]
+GRANULARITIES = {"total": None, "yearly": "Year", "monthly": "Month", "hourly": "Hour"}
+
+# Columns of the long tables written to the database
+METRIC_COLUMNS = ["component", "metric", "granularity", "period", "value"]
+ROLLUP_COLUMNS = ["result", "level", "period", "series", "mean", "min", "max", "sum"]
+EVENT_COLUMNS = ["result", "constraint_name", "start", "end", "duration", "peak_exceedance", "unit"]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    validation TEXT NOT NULL,
+    components TEXT,
+    execution_engine TEXT,
+    calculation_time REAL,
+    parameters TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    project_name TEXT NOT NULL,
+    component TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    period TEXT NOT NULL,
+    value REAL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    project_name TEXT NOT NULL,
+    result TEXT NOT NULL,
+    level TEXT NOT NULL,
+    period TEXT NOT NULL,
+    series TEXT NOT NULL,
+    mean REAL,
+    min REAL,
+    max REAL,
+    sum REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    project_name TEXT NOT NULL,
+    result TEXT NOT NULL,
+    constraint_name TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    duration REAL,
+    peak_exceedance REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_project ON runs (project_name, run_id);
+CREATE INDEX IF NOT EXISTS metrics_lookup ON metrics (component, metric, granularity, period, value);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id);
+CREATE INDEX IF NOT EXISTS rollups_lookup ON rollups (result, level, series, period);
+CREATE INDEX IF NOT EXISTS rollups_run ON rollups (run_id);
+CREATE INDEX IF NOT EXISTS events_lookup ON events (result, constraint_name, start);
+CREATE INDEX IF NOT EXISTS events_run ON events (run_id);
+CREATE VIEW IF NOT EXISTS latest_runs AS
+    SELECT * FROM runs WHERE run_id IN (SELECT MAX(run_id) FROM runs GROUP BY project_name);
+CREATE VIEW IF NOT EXISTS latest_metrics AS
+    SELECT * FROM metrics WHERE run_id IN (SELECT run_id FROM latest_runs);
+CREATE VIEW IF NOT EXISTS latest_rollups AS
+    SELECT * FROM rollups WHERE run_id IN (SELECT run_id FROM latest_runs);
+CREATE VIEW IF NOT EXISTS latest_events AS
+    SELECT * FROM events WHERE run_id IN (SELECT run_id FROM latest_runs);
+"""
+
+def connect(database_path: Path = None) -> sqlite3.Connection:
+    """Open the results database and create the tables if they do not exist yet."""
+    database_path = RESULTS_DATABASE_PATH if database_path is None else Path(database_path)
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(database_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+def get_results_path(project_name: str) -> Path:
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results"
+
+def format_period(keys: list, values: tuple) -> str:
+    """Format the keys of a row as period, months and hours are zero padded so that periods sort correctly."""
+    parts = []
+    for key, value in zip(keys, values):
+        if key in ("Month", "Hour"):
+            parts.append(f"{int(value):02d}")
+        else:
+            parts.append(str(value))
+    return "-".join(parts)
+
+def metric_name(column: str) -> str:
+    """Convert a column name like "Mean Absolute Residual [Wh]" into a metric name like "mean_absolute_residual"."""
+    return re.sub(r"[^a-z0-9]+", "_", re.sub(r"\[.*?\]", "", column).lower()).strip("_")
+
+def read_error_metric(path: Path, component: str, metric: str, granularity: str) -> pd.DataFrame:
+    """Read an Error Calculation file as long metric table."""
+    key = GRANULARITIES[granularity]
+    data = pd.read_csv(path)
+    value_column = next(column for column in data.columns if column != key)
+    return pd.DataFrame({
+        "component": component,
+        "metric": metric,
+        "granularity": granularity,
+        "period": "Total" if key is None else data[key].astype(str),
+        "value": data[value_column],
+    }, columns=METRIC_COLUMNS)
+
+def read_residual_metrics(path: Path, granularity: str) -> pd.DataFrame:
+    """Read an aggregated energy balance residual file as long metric table."""
+    key = GRANULARITIES[granularity]
+    data = pd.read_csv(path)
+    tables = [pd.DataFrame({
+        "component": "energy_balance",
+        "metric": metric_name(column),
+        "granularity": granularity,
+        "period": data[key].astype(str),
+        "value": data[column],
+    }, columns=METRIC_COLUMNS) for column in data.columns.drop(key)]
+    return pd.concat(tables, ignore_index=True)
+
+def read_metric_file(path: Path, relative_path: str) -> pd.DataFrame:
+    """
+    Read a metric file of the results given by its path relative to the results folder as long metric table.
+    Returns None if the file is not a metric file.
+    """
+    relative_path = Path(relative_path)
+    if relative_path.parent == Path("Error Calculation"):
+        for component in COMPONENTS:
+            for metric in ERROR_METRICS:
+                for granularity in GRANULARITIES:
+                    if relative_path.stem == f"{component}_{metric}_{granularity}":
+                        return read_error_metric(path, component, metric, granularity)
+    elif relative_path.parent == Path("."):
+        for granularity, key in GRANULARITIES.items():
+            if key is not None and relative_path.stem == f"energy_balance_residual_{granularity}":
+                return read_residual_metrics(path, granularity)
+    return None
+
+def read_rollup_file(path: Path, relative_path: str) -> pd.DataFrame:
+    """
+    Read a rollup file of the results given by its path relative to the results folder as long rollup table.
+    Returns None if the file is not a rollup file.
+    """
+    relative_path = Path(relative_path)
+    if relative_path.parent != Path("rollups") or relative_path.suffix != ".csv":
+        return None
+    level = next((level for level in ROLLUP_LEVELS if relative_path.stem.endswith(f"_{level}")), None)
+    if level is None:
+        return None
+    keys = ROLLUP_LEVELS[level]
+    data = pd.read_csv(path)
+    return pd.DataFrame({
+        "result": relative_path.stem[:-len(level) - 1],
+        "level": level,
+        "period": [format_period(keys, values) for values in zip(*(data[key] for key in keys))],
+        "series": data["Series"],
+        "mean": data["Mean"],
+        "min": data["Min"],
+        "max": data["Max"],
+        "sum": data["Sum"],
+    }, columns=ROLLUP_COLUMNS)
+
+def result_files(results_path: Path, pattern: str) -> list:
+    """Get the files of the results matching a pattern with their paths relative to the results folder."""
+    return [(path, path.relative_to(results_path).as_posix()) for path in sorted(results_path.glob(pattern))]
+
+def collect_metrics(results_path: Path) -> pd.DataFrame:
+    """Collect the error metrics and the aggregated energy balance residuals of a project as one long table."""
+    files = result_files(results_path, "Error Calculation/*.csv") + result_files(results_path, "energy_balance_residual_*.csv")
+    tables = [table for table in (read_metric_file(path, relative_path) for path, relative_path in files) if table is not None]
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=METRIC_COLUMNS)
+
+def collect_rollups(results_path: Path) -> pd.DataFrame:
+    """Collect the rollup tables of all results of a project as one long table."""
+    files = result_files(results_path, "rollups/*.csv")
+    tables = [table for table in (read_rollup_file(path, relative_path) for path, relative_path in files) if table is not None]
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+def collect_events(results_path: Path) -> pd.DataFrame:
+    """Collect the event tables of all results of a project as one long table."""
+    tables = []
+    for events_path in sorted((results_path / "events").glob("*_events.csv")):
+        data = pd.read_csv(events_path)
+        tables.append(pd.DataFrame({
+            "result": events_path.stem[:-len("_events")],
+            "constraint_name": data["Constraint"],
+            "start": data["Start"].astype(str),
+            "end": data["End"].astype(str),
+            "duration": data["Duration [h]"],
+            "peak_exceedance": data["Peak Exceedance"],
+            "unit": data["Unit"],
+        }, columns=EVENT_COLUMNS))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=EVENT_COLUMNS)
+
+def record_run(project_name: str, settings: Mapping, validation: str = "technical", calculation_time: float = None, database_path: Path = None) -> int:
+    """
+    Write the metadata and the results of a validation run of a project to the results database.
+    The settings are the flat project parameters, e.g. the session state. Returns the id of the run.
+    """
+    results_path = get_results_path(project_name)
+    components = [component for component in COMPONENTS if settings.get(component)]
+    parameters = {key: value for key, value in settings.items() if isinstance(value, (int, float, str, bool, list))}
+    tables = {
+        "metrics": collect_metrics(results_path),
+        "rollups": collect_rollups(results_path),
+        "events": collect_events(results_path),
+    }
+
+    with closing(connect(database_path)) as connection, connection:
+        cursor = connection.execute(
+            "INSERT INTO runs (project_name, created_at, validation, components, execution_engine, calculation_time, parameters) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                project_name, datetime.now().isoformat(timespec="seconds"), validation, ",".join(components),
+                settings.get("execution_engine"), calculation_time, json.dumps(parameters, default=str),
+            ),
+        )
+        run_id = cursor.lastrowid
+        for table_name, table in tables.items():
+            if table.empty:
+                continue
+            table = table.assign(run_id=run_id, project_name=project_name)
+            columns = ", ".join(table.columns)
+            placeholders = ", ".join("?" for _ in table.columns)
+            rows = table.astype(object).where(table.notna(), None).itertuples(index=False, name=None)
+            connection.executemany(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows)
+    return run_id
+
+def query(sql: str, parameters: tuple = (), database_path: Path = None) -> pd.DataFrame:
+    """Run a SQL query on the results database and return the result as a dataframe."""
+    with closing(connect(database_path)) as connection:
+        return pd.read_sql_query(sql, connection, params=parameters)
+
+def find_metrics(component: str = None, metric: str = None, granularity: str = None, period: str = None,
+                 above: float = None, below: float = None, latest: bool = True, database_path: Path = None) -> pd.DataFrame:
+    """
+    Find the metrics of all projects matching the given filters, e.g. the projects with a yearly solar PV MAE above a value in 2030.
+    By default only the latest run of each project is searched.
+    """
+    conditions, parameters = [], []
+    for column, value in (("component", component), ("metric", metric), ("granularity", granularity), ("period", period)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+    if above is not None:
+        conditions.append("value > ?")
+        parameters.append(above)
+    if below is not None:
+        conditions.append("value < ?")
+        parameters.append(below)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    table = "latest_metrics" if latest else "metrics"
+    return query(
+        f"SELECT project_name, run_id, component, metric, granularity, period, value FROM {table} {where} "
+        "ORDER BY project_name, run_id, component, metric, granularity, period",
+        tuple(parameters), database_path,
+    )
+
+def ingest_project(project_name: str, database_path: Path = None) -> int:
+    """Write the existing results of a project to the results database, e.g. for projects validated before the database existed."""
+    from validationtesting.validation.parameters import ProjectParameters
+    from validationtesting.validation.project_model import flatten_parameters
+
+    yaml_path = PathManager.PROJECTS_FOLDER_PATH / project_name / f"{project_name}.yaml"
+    settings = flatten_parameters(ProjectParameters.instantiate_from_yaml(yaml_path))
+    return record_run(project_name, settings, validation="ingest", database_path=database_path)
+
+def main(arguments: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the results of all projects.")
+    parser.add_argument("--database", type=Path, default=None, help="Path of the results database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Write the existing results of projects to the database.")
+    ingest_parser.add_argument("projects", nargs="*", help="Names of the projects, all projects if none are given.")
+
+    metrics_parser = subparsers.add_parser("metrics", help="Find the metrics of all projects matching the filters.")
+    metrics_parser.add_argument("--component", help="Component, e.g. solar_pv or energy_balance.")
+    metrics_parser.add_argument("--metric", help="Metric, e.g. mae, rmse or mean_absolute_residual.")
+    metrics_parser.add_argument("--granularity", choices=list(GRANULARITIES), help="Granularity of the metric.")
+    metrics_parser.add_argument("--period", help="Period of the metric, e.g. 2030, March or 12:00.")
+    metrics_parser.add_argument("--above", type=float, help="Only metrics above this value.")
+    metrics_parser.add_argument("--below", type=float, help="Only metrics below this value.")
+    metrics_parser.add_argument("--all-runs", action="store_true", help="Search all runs instead of the latest run of each project.")
+
+    sql_parser = subparsers.add_parser("sql", help="Run a SQL query on the database.")
+    sql_parser.add_argument("sql", help="SQL query, the tables are runs, metrics, rollups and events with latest_* views.")
+
+    for subparser in (metrics_parser, sql_parser):
+        subparser.add_argument("--output", type=Path, help="Save the result as CSV file instead of printing it.")
+
+    args = parser.parse_args(arguments)
+    if args.command == "ingest":
+        projects = args.projects or sorted(
+            path.name for path in PathManager.PROJECTS_FOLDER_PATH.iterdir() if (path / f"{path.name}.yaml").exists()
+        )
+        for project_name in projects:
+            run_id = ingest_project(project_name, args.database)
+            print(f"{project_name}: run {run_id}")
+        return
+
+    if args.command == "metrics":
+        result = find_metrics(args.component, args.metric, args.granularity, args.period, args.above, args.below,
+                              latest=not args.all_runs, database_path=args.database)
+    else:
+        result = query(args.sql, database_path=args.database)
+    if args.output:
+        result.to_csv(args.output, index=False)
+    else:
+        with pd.option_context("display.width", 200, "display.max_rows", None):
+            print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
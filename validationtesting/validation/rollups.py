@@ -0,0 +1,85 @@
+"""
+This module is used to pre-aggregate the hourly results of the validators into small rollup tables.
+For every model and benchmark series the mean, minimum, maximum and sum are calculated per year, month,
+hour of the day, month and hour of the day and per day. The rollups are saved next to the results, so that
+the results page and the plots read these small tables instead of grouping the full hourly results again.
+"""
+
+import streamlit as st
+import pandas as pd
+import os
+from config.path_manager import PathManager
+
+# Keys of each rollup level
+ROLLUP_LEVELS = {
+    "yearly": ["Year"],
+    "monthly": ["Month"],
+    "hourly": ["Hour"],
+    "month_hour": ["Month", "Hour"],
+    "daily": ["Date"],
+}
+
+ROLLUP_STATISTICS = {"mean": "Mean", "min": "Min", "max": "Max", "sum": "Sum"}
+
+def get_rollup_path(name: str, level: str):
+    """Get the path of the rollup table of a result for one level."""
+    project_name = st.session_state.get("project_name")
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "rollups" / f"{name}_{level}.csv"
+
+def compute_rollups(data: pd.DataFrame, columns: list = None) -> dict:
+    """
+    Calculate the rollup tables of the given columns of an hourly table indexed by time.
+    Returns a dictionary with one table per level, with the keys of the level, the series name and the statistics as columns.
+    """
+    columns = list(data.columns) if columns is None else columns
+    time_index = pd.DatetimeIndex(data.index)
+    values = data[columns].apply(pd.to_numeric, errors='coerce')
+    keys = {
+        "Year": time_index.year,
+        "Month": time_index.month,
+        "Hour": time_index.hour,
+        "Date": time_index.normalize(),
+    }
+
+    rollups = {}
+    for level, level_keys in ROLLUP_LEVELS.items():
+        grouped = values.groupby([keys[key] for key in level_keys]).agg(list(ROLLUP_STATISTICS))
+        grouped.index.names = level_keys
+        tables = []
+        for column in columns:
+            table = grouped[column].rename(columns=ROLLUP_STATISTICS).reset_index()
+            table.insert(len(level_keys), "Series", column)
+            tables.append(table)
+        rollups[level] = pd.concat(tables, ignore_index=True)
+    return rollups
+
+def save_rollups(name: str, rollups: dict) -> None:
+    """Save the rollup tables of a result in the rollups folder of the results."""
+    rollups_path = get_rollup_path(name, "").parent
+    os.makedirs(rollups_path, exist_ok=True)
+    for level, table in rollups.items():
+        table.to_csv(get_rollup_path(name, level), index=False)
+
+def write_rollups(name: str, data: pd.DataFrame, columns: list = None) -> None:
+    """Calculate the rollup tables of an hourly result and save them in the rollups folder of the results."""
+    save_rollups(name, compute_rollups(data, columns))
+
+def write_rollups_by_column(name: str, read_column, columns: list) -> None:
+    """
+    Calculate the rollup tables of an hourly result one column at a time, used by the out-of-core engine.
+    read_column is called with the name of a column and returns its hourly values indexed by time.
+    """
+    tables = [compute_rollups(read_column(column).to_frame(column)) for column in columns]
+    save_rollups(name, {level: pd.concat([table[level] for table in tables], ignore_index=True) for level in ROLLUP_LEVELS})
+
+def read_rollup(name: str, level: str, series: list = None) -> pd.DataFrame:
+    """Read the rollup table of a result for one level, optionally only for some series."""
+    table = pd.read_csv(get_rollup_path(name, level))
+    if series is not None:
+        table = table[table["Series"].isin(series)]
+    return table
+
+def read_rollup_statistics(name: str, level: str, column: str) -> pd.DataFrame:
+    """Read the statistics of one series indexed by the keys of the level."""
+    table = read_rollup(name, level, [column])
+    return table.set_index(ROLLUP_LEVELS[level]).drop(columns="Series")
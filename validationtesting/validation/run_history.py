@@ -0,0 +1,196 @@
+"""
+This module is used to keep a history of the validation runs of a project and to compare two runs.
+After each run a manifest with the hashes of the project parameters, the inputs and the result files is saved under a
+new run id in the runs folder of the project. The files themselves are stored once per content hash, so files that did
+not change between runs take no extra disk space. Two runs are compared from their manifests and rollups, only the
+metric and rollup files whose hash changed are read.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from config.path_manager import PathManager
+from validationtesting.validation.results_store import read_metric_file, read_rollup_file
+
+MANIFEST_FILE = "manifest.json"
+
+# Result folders that are not kept in the history, the partitions are intermediate tables of the out-of-core engine
+EXCLUDED_RESULTS = ("partitions",)
+
+HASH_CHUNK_SIZE = 1 << 20
+
+def get_runs_path(project_name: str) -> Path:
+    """Get the folder of the run history of a project."""
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "runs"
+
+def get_object_path(project_name: str, content_hash: str) -> Path:
+    """Get the path of a stored file by its content hash."""
+    return get_runs_path(project_name) / "objects" / content_hash[:2] / content_hash
+
+def hash_file(path: Path) -> str:
+    """Calculate the SHA-256 hash of the content of a file."""
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def hash_cached(path: Path, hash_cache: dict) -> str:
+    """Hash a file, the file is not read again if it has the same size and modification time as in the hash cache."""
+    stat = path.stat()
+    cached = hash_cache.get(str(path))
+    if cached is None or cached[:2] != [stat.st_size, stat.st_mtime_ns]:
+        cached = [stat.st_size, stat.st_mtime_ns, hash_file(path)]
+        hash_cache[str(path)] = cached
+    return cached[2]
+
+def hash_folder(folder: Path, hash_cache: dict, excluded: tuple = ()) -> dict:
+    """Hash all files of a folder, keyed by their path relative to the folder."""
+    hashes = {}
+    if not folder.exists():
+        return hashes
+    for path in sorted(folder.rglob("*")):
+        relative_path = path.relative_to(folder).as_posix()
+        if path.is_file() and relative_path.split("/")[0] not in excluded:
+            hashes[relative_path] = hash_cached(path, hash_cache)
+    return hashes
+
+def store_object(project_name: str, path: Path, content_hash: str) -> None:
+    """Store a file by its content hash, nothing is written if a file with the same content is already stored."""
+    object_path = get_object_path(project_name, content_hash)
+    if object_path.exists():
+        return
+    os.makedirs(object_path.parent, exist_ok=True)
+    temporary_path = object_path.with_suffix(".tmp")
+    shutil.copyfile(path, temporary_path)
+    os.replace(temporary_path, object_path)
+
+def save_run(project_name: str, label: str = None) -> str:
+    """
+    Save the current parameters, inputs and results of a project as a new run and return its run id.
+    The manifest lists the content hash of every file, the files are added to the object store of the project.
+    """
+    project_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name)
+    runs_path = get_runs_path(project_name)
+    os.makedirs(runs_path, exist_ok=True)
+    hash_cache_path = runs_path / "hash_cache.json"
+    hash_cache = json.loads(hash_cache_path.read_text()) if hash_cache_path.exists() else {}
+
+    parameters_path = project_path / f"{project_name}.yaml"
+    files = {
+        "parameters": {parameters_path.name: hash_cached(parameters_path, hash_cache)} if parameters_path.exists() else {},
+        "inputs": hash_folder(project_path / "inputs", hash_cache),
+        "results": hash_folder(project_path / "results", hash_cache, EXCLUDED_RESULTS),
+    }
+    for kind, hashes in files.items():
+        folder = project_path if kind == "parameters" else project_path / kind
+        for relative_path, content_hash in hashes.items():
+            store_object(project_name, folder / relative_path, content_hash)
+
+    created_at = datetime.now()
+    inputs_hash = hashlib.sha256(json.dumps([files["parameters"], files["inputs"]], sort_keys=True).encode()).hexdigest()
+    run_id = f"{created_at:%Y%m%d-%H%M%S}-{inputs_hash[:8]}"
+    manifest = {
+        "run_id": run_id,
+        "project_name": project_name,
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "label": label,
+        "inputs_hash": inputs_hash,
+        **files,
+    }
+    os.makedirs(runs_path / run_id, exist_ok=True)
+    (runs_path / run_id / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    hash_cache_path.write_text(json.dumps(hash_cache))
+    return run_id
+
+def load_manifest(project_name: str, run_id: str) -> dict:
+    """Load the manifest of a run."""
+    return json.loads((get_runs_path(project_name) / run_id / MANIFEST_FILE).read_text())
+
+def list_runs(project_name: str) -> pd.DataFrame:
+    """List the runs of a project, the latest run first."""
+    manifests = [json.loads(path.read_text()) for path in get_runs_path(project_name).glob(f"*/{MANIFEST_FILE}")]
+    runs = pd.DataFrame([{
+        "Run": manifest["run_id"],
+        "Created": manifest["created_at"],
+        "Label": manifest.get("label"),
+        "Inputs Hash": manifest["inputs_hash"][:8],
+        "Result Files": len(manifest["results"]),
+    } for manifest in manifests], columns=["Run", "Created", "Label", "Inputs Hash", "Result Files"])
+    return runs.sort_values("Run", ascending=False, ignore_index=True)
+
+def get_run_file(project_name: str, manifest: dict, kind: str, relative_path: str) -> Path:
+    """Get the stored path of a parameters, inputs or results file of a run."""
+    return get_object_path(project_name, manifest[kind][relative_path])
+
+def compare_files(manifest_a: dict, manifest_b: dict, kind: str) -> pd.DataFrame:
+    """Compare the hashes of the files of two runs, only added, removed and changed files are listed."""
+    files_a, files_b = manifest_a[kind], manifest_b[kind]
+    rows = []
+    for relative_path in sorted(set(files_a) | set(files_b)):
+        if relative_path not in files_a:
+            rows.append({"File": relative_path, "Change": "Added"})
+        elif relative_path not in files_b:
+            rows.append({"File": relative_path, "Change": "Removed"})
+        elif files_a[relative_path] != files_b[relative_path]:
+            rows.append({"File": relative_path, "Change": "Changed"})
+    return pd.DataFrame(rows, columns=["File", "Change"])
+
+def compare_parameters(project_name: str, manifest_a: dict, manifest_b: dict) -> pd.DataFrame:
+    """Compare the parameter values of two runs, only changed parameters are listed."""
+    from validationtesting.validation.parameters import ProjectParameters
+    from validationtesting.validation.project_model import flatten_parameters
+
+    if manifest_a["parameters"] == manifest_b["parameters"] or not manifest_a["parameters"] or not manifest_b["parameters"]:
+        return pd.DataFrame(columns=["Parameter", "Run A", "Run B"])
+    values = []
+    for manifest in (manifest_a, manifest_b):
+        (file_name,) = manifest["parameters"]
+        values.append(flatten_parameters(ProjectParameters.instantiate_from_yaml(get_run_file(project_name, manifest, "parameters", file_name))))
+    rows = [
+        {"Parameter": name, "Run A": str(values[0].get(name)), "Run B": str(values[1].get(name))}
+        for name in sorted(set(values[0]) | set(values[1])) if values[0].get(name) != values[1].get(name)
+    ]
+    return pd.DataFrame(rows, columns=["Parameter", "Run A", "Run B"])
+
+def compare_tables(project_name: str, manifest_a: dict, manifest_b: dict, read_table, keys: list, values: list) -> pd.DataFrame:
+    """
+    Calculate the deltas between the long tables of the result files that changed between two runs.
+    read_table reads a result file as long table, or returns None if the file is not of this kind.
+    """
+    deltas = []
+    for relative_path in sorted(set(manifest_a["results"]) & set(manifest_b["results"])):
+        if manifest_a["results"][relative_path] == manifest_b["results"][relative_path]:
+            continue
+        table_a = read_table(get_run_file(project_name, manifest_a, "results", relative_path), relative_path)
+        if table_a is None:
+            continue
+        table_b = read_table(get_run_file(project_name, manifest_b, "results", relative_path), relative_path)
+        merged = pd.merge(table_a, table_b, on=keys, how="outer", suffixes=(" A", " B"))
+        for value in values:
+            merged[f"{value} Delta"] = merged[f"{value} B"] - merged[f"{value} A"]
+        deltas.append(merged)
+    if not deltas:
+        return pd.DataFrame(columns=[*keys, *[f"{value} {suffix}" for value in values for suffix in ("A", "B", "Delta")]])
+    return pd.concat(deltas, ignore_index=True)
+
+def diff_runs(project_name: str, run_a: str, run_b: str) -> dict:
+    """
+    Compare two runs of a project.
+    Returns the changed parameters, the changed input and result files, the metric deltas and the rollup deltas
+    from run A to run B. Unchanged files are recognised by their hash and are not read.
+    """
+    manifest_a, manifest_b = load_manifest(project_name, run_a), load_manifest(project_name, run_b)
+    return {
+        "parameters": compare_parameters(project_name, manifest_a, manifest_b),
+        "inputs": compare_files(manifest_a, manifest_b, "inputs"),
+        "results": compare_files(manifest_a, manifest_b, "results"),
+        "metrics": compare_tables(project_name, manifest_a, manifest_b, read_metric_file,
+                                  ["component", "metric", "granularity", "period"], ["value"]),
+        "rollups": compare_tables(project_name, manifest_a, manifest_b, read_rollup_file,
+                                  ["result", "level", "period", "series"], ["mean", "min", "max", "sum"]),
+    }
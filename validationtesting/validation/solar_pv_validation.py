@@ -7,27 +7,23 @@ The energy output is then saved to a CSV file.
 
 import streamlit as st
 import pandas as pd
-import datetime
 from config.path_manager import PathManager
 import validationtesting.validation.get_solar_irradiance as get_solar_irradiance
+from validationtesting.validation.unit_groups import project_time_axis, daily_profiles_to_array
+from validationtesting.validation.timeline import Timeline
+from validationtesting.validation.out_of_core import use_out_of_core
+from validationtesting.validation.project_model import UnitTable, compile_unit_table
 
 def calculate_g_total(irradiation_data, solar_pv_types, pv_theta_tilt, pv_azimuth, lat, lon, rho, timezone):
     """
     Calculate G Total for each type and add it to the irradiation data.
     """
+    date_time = pd.to_datetime(irradiation_data['Time'], format='%m-%d %H:%M')
+    day_of_year = date_time.dt.dayofyear.to_numpy()
     for type_index, pv_type in enumerate(solar_pv_types):
-        g_total_column = f"Benchmark G Total {pv_type} [W/m^2]"
-        irradiation_data[g_total_column] = None
-
-        for i, row in irradiation_data.iterrows():
-            day_of_year = datetime.datetime.strptime(row['Time'], '%m-%d %H:%M').timetuple().tm_yday
-            date_time = datetime.datetime.strptime(row['Time'], '%m-%d %H:%M')
-
-            G_total = get_solar_irradiance.with_GHI_DHI(
-                pv_theta_tilt[type_index], row['GHI [W/m^2]'], row['DHI [W/m^2]'], rho, lat, lon, day_of_year, date_time, timezone, pv_azimuth[type_index]
-            )
-
-            irradiation_data.at[i, g_total_column] = G_total
+        irradiation_data[f"Benchmark G Total {pv_type} [W/m^2]"] = get_solar_irradiance.with_GHI_DHI(
+            pv_theta_tilt[type_index], irradiation_data['GHI [W/m^2]'], irradiation_data['DHI [W/m^2]'], rho, lat, lon, day_of_year, date_time, timezone, pv_azimuth[type_index]
+        )
 
     return irradiation_data
 
@@ -65,37 +61,23 @@ def calculate_yearly_pv_energy(solar_pv_types, pv_calculation_type, nominal_powe
     return yearly_pv_energy
 
 
-def fill_pv_table(start_date, end_date, installation_dates, pv_lifetime, yearly_pv_energy, solar_pv_types, pv_degradation, pv_degradation_rate, pv_units):
+def fill_pv_table(start_date, end_date, units: UnitTable, yearly_pv_energy, solar_pv_types, pv_degradation):
     """
-    Fill out the table based on the installation date, lifetime, and degradation hour by hour.
+    Build the timeline of the PV units based on the installation date, lifetime, and degradation.
+    Each unit is stored with the reference-year profile of its type and its active window, the hourly table is only built on export.
     """
-    date_range = pd.date_range(start=start_date, end=end_date, freq='H')
-    date_range = date_range[~((date_range.month == 2) & (date_range.day == 29))]
-    column_names = [f"Benchmark solar_pv Energy Unit {unit + 1} [Wh]" for unit in range(pv_units)]
-    column_names.append("Benchmark solar_pv Energy Total [Wh]")
-    results = pd.DataFrame(index=date_range, columns=column_names)
-    results["Benchmark solar_pv Energy Total [Wh]"] = 0
-    for unit, (install_date, lifetime, pv_type) in enumerate(zip(installation_dates, pv_lifetime, solar_pv_types)):
-        end_of_life = install_date + datetime.timedelta(days=lifetime * 365)
-        yearly_energy = yearly_pv_energy[pv_type]
-        for date in date_range:
-            if date < install_date or date > end_of_life:
-                energy = 0
-            else:
-                if date.is_leap_year and date.month > 2:
-                    day_index = date.dayofyear - 2 
-                else:
-                    day_index = date.dayofyear - 1
-                hour_index = date.hour
-                energy = yearly_energy[day_index].iloc[hour_index]
-                if pv_degradation:
-                    years_since_install = (date - install_date).days // 365
-                    energy *= (1 - (pv_degradation_rate / 100) * years_since_install)
-            results.at[date, f"Benchmark solar_pv Energy Unit {unit + 1} [Wh]"] = energy
-            results.at[date, "Benchmark solar_pv Energy Total [Wh]"] += energy
-    results.reset_index(inplace=True)
-    results.rename(columns={'index': 'Time'}, inplace=True)
-    return results
+    date_range = project_time_axis(start_date, end_date)
+    unit_types = [solar_pv_types[type_index] for type_index in units.type_index]
+    yearly_profiles = {pv_type: daily_profiles_to_array(yearly_pv_energy[pv_type]) for pv_type in set(unit_types)}
+
+    degradation_rates = units["pv_degradation_rate"] / 100
+    unit_keys = [
+        (pv_type, installation_date, lifetime, degradation_rate if pv_degradation else None)
+        for pv_type, installation_date, lifetime, degradation_rate
+        in zip(unit_types, units.installation_dates, units.lifetime.tolist(), degradation_rates.tolist())
+    ]
+
+    return Timeline.from_units(date_range, yearly_profiles, unit_keys, "solar_pv")
 
 
 def solar_pv_benchmark():
@@ -107,9 +89,8 @@ def solar_pv_benchmark():
     solar_pv_types = st.session_state.get("solar_pv_types")
     start_date = st.session_state.get("start_date")
     end_date = st.session_state.get("end_date")
-    installation_dates = st.session_state.get("installation_dates")
-    pv_lifetime = st.session_state.get("pv_lifetime")
-    pv_units = st.session_state.get("solar_pv_num_units")
+    # Compile the PV units once, so that the type strings are only parsed here
+    units = compile_unit_table("solar_pv", ["pv_degradation_rate"])
     nominal_power = st.session_state.get("pv_nominal_power")
     pv_area = st.session_state.get("pv_area")
     pv_efficiency = [x / 100 for x in st.session_state.pv_efficiency]
@@ -120,7 +101,6 @@ def solar_pv_benchmark():
     pv_T_ref_NOCT = st.session_state.get("pv_T_ref_NOCT")
     pv_I_ref_NOCT = st.session_state.get("pv_I_ref_NOCT")
     pv_degradation = st.session_state.get("pv_degradation")
-    pv_degradation_rate = [x / 100 for x in st.session_state.pv_degradation_rate]
 
     lat = st.session_state.get("lat")
     lon = st.session_state.get("lon")
@@ -140,7 +120,7 @@ def solar_pv_benchmark():
 
     # Extract Day of Year from Time
     solar_pv_text.write("Calculating Irradiation on Tilted Surface for Reference Year")
-    irradiation_data['Day of Year'] = irradiation_data['Time'].apply(lambda x: datetime.datetime.strptime(x, '%m-%d %H:%M').timetuple().tm_yday)
+    irradiation_data['Day of Year'] = pd.to_datetime(irradiation_data['Time'], format='%m-%d %H:%M').dt.dayofyear
     irradiation_data = calculate_g_total(irradiation_data, solar_pv_types, st.session_state.get("pv_theta_tilt"), st.session_state.get("pv_azimuth"), lat, lon, rho, timezone)
     yearly_irradiation = {day: group for day, group in irradiation_data.groupby('Day of Year')}
     solar_pv_progress += progress_step
@@ -157,12 +137,9 @@ def solar_pv_benchmark():
     solar_pv_progress += progress_step
     solar_pv_progress_bar.progress(solar_pv_progress)
 
-    # Fill the PV energy table for the entire project timeline
+    # Build the PV energy timeline for the entire project
     solar_pv_text.write("Calculating Solar PV Energy for the Project Timeline")
-    results = fill_pv_table(
-        start_date, end_date, installation_dates, pv_lifetime, yearly_pv_energy, solar_pv_types,
-        pv_degradation, pv_degradation_rate, pv_units
-    )
+    timeline = fill_pv_table(start_date, end_date, units, yearly_pv_energy, solar_pv_types, pv_degradation)
     solar_pv_progress += progress_step
     solar_pv_progress_bar.progress(solar_pv_progress)
 
@@ -170,7 +147,9 @@ def solar_pv_benchmark():
     # Save the results
     solar_pv_text.write("Saving Solar PV Benchmark Results")
     results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(st.session_state.get("project_name")) / "results" / "solar_pv_validation.csv"
-    results.to_csv(results_data_path)
+    timeline.to_csv(results_data_path)
+    if use_out_of_core():
+        timeline.to_partitions("solar_pv_validation")
     solar_pv_text.write("Solar PV Benchmark Calculation Completed.")
     solar_pv_progress += progress_step
     solar_pv_progress_bar.progress(solar_pv_progress)
\ No newline at end of file
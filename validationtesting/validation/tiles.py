@@ -0,0 +1,175 @@
+"""
+This module is used to precompute downsampled tiles of the hourly results for the interactive explorer.
+For each zoom level the hourly series are split into buckets of a fixed number of hours. Every bucket keeps its
+minimum and maximum as an envelope, and the line is reduced with Largest-Triangle-Three-Buckets (LTTB), so the
+peaks stay visible. The explorer only reads the points of the visible window from the finest level that fits.
+"""
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+from config.path_manager import PathManager
+
+# Number of hours per bucket of each zoom level, the first level are the hourly values
+TILE_LEVELS = (1, 24, 168, 720)
+
+# Maximum number of points of a series sent to the chart
+MAX_POINTS = 2000
+
+def get_tiles_path(name: str):
+    """Get the path of the tiles of a result."""
+    project_name = st.session_state.get("project_name")
+    return PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "tiles" / f"{name}.npz"
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select the indices of the points of a series with Largest-Triangle-Three-Buckets.
+    The first and last point are always kept, from every bucket in between the point spanning the largest
+    triangle with the previously selected point and the average of the next bucket is kept.
+    """
+    num_points = len(values)
+    if threshold >= num_points or threshold < 3:
+        return np.arange(num_points)
+
+    x = times.astype(float)
+    edges = np.linspace(1, num_points - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, num_points - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else num_points
+        next_x = x[next_start:next_end].mean()
+        next_y = values[next_start:next_end].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (values[start:end] - values[previous])
+            - (x[previous] - x[start:end]) * (next_y - values[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def bucket_envelope(values: np.ndarray, bucket: int) -> tuple:
+    """Get the minimum and maximum of each bucket of a series, the last bucket may be shorter."""
+    num_buckets = -(-len(values) // bucket)
+    padded = np.full(num_buckets * bucket, np.nan)
+    padded[:len(values)] = values
+    padded = padded.reshape(num_buckets, bucket)
+    return np.nanmin(padded, axis=1), np.nanmax(padded, axis=1)
+
+def compute_series_tiles(series: int, times: np.ndarray, values: np.ndarray) -> dict:
+    """Calculate the tiles of all levels of one series, keyed by "<series>/<level>/<array>"."""
+    valid = ~np.isnan(values)
+    series_times, series_values = times[valid], values[valid]
+    tiles = {}
+    for bucket in TILE_LEVELS:
+        key = f"{series}/{bucket}"
+        if bucket == 1:
+            tiles[f"{key}/line_time"], tiles[f"{key}/line_value"] = series_times, series_values
+            continue
+        selected = lttb(series_times, series_values, -(-len(series_values) // bucket))
+        tiles[f"{key}/line_time"], tiles[f"{key}/line_value"] = series_times[selected], series_values[selected]
+        tiles[f"{key}/envelope_time"] = series_times[::bucket]
+        tiles[f"{key}/envelope_min"], tiles[f"{key}/envelope_max"] = bucket_envelope(series_values, bucket)
+    return tiles
+
+def compute_tiles(data: pd.DataFrame, columns: list = None) -> dict:
+    """
+    Calculate the tiles of the given columns of an hourly table indexed by time.
+    Returns the arrays of all levels keyed by "<series>/<level>/<array>", together with the series names.
+    """
+    columns = list(data.columns) if columns is None else columns
+    times = pd.DatetimeIndex(data.index).as_unit("ns").asi8
+    tiles = {"series": np.array(columns, dtype=str), "levels": np.array(TILE_LEVELS)}
+    for series, column in enumerate(columns):
+        values = pd.to_numeric(data[column], errors='coerce').to_numpy(dtype=float)
+        tiles.update(compute_series_tiles(series, times, values))
+    return tiles
+
+def write_tiles(name: str, data: pd.DataFrame, columns: list = None) -> None:
+    """Calculate the tiles of an hourly result and save them in the tiles folder of the results."""
+    tiles_path = get_tiles_path(name)
+    os.makedirs(tiles_path.parent, exist_ok=True)
+    np.savez(tiles_path, **compute_tiles(data, columns))
+
+def write_tiles_by_column(name: str, read_column, columns: list) -> None:
+    """
+    Calculate the tiles of an hourly result one column at a time, used by the out-of-core engine.
+    read_column is called with the name of a column and returns its hourly values indexed by time.
+    """
+    tiles = {"series": np.array(columns, dtype=str), "levels": np.array(TILE_LEVELS)}
+    for series, column in enumerate(columns):
+        values = read_column(column)
+        times = pd.DatetimeIndex(values.index).as_unit("ns").asi8
+        tiles.update(compute_series_tiles(series, times, pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)))
+    tiles_path = get_tiles_path(name)
+    os.makedirs(tiles_path.parent, exist_ok=True)
+    np.savez(tiles_path, **tiles)
+
+@st.cache_resource(max_entries=8)
+def _load_tiles(path: str, modified_time: float) -> dict:
+    with np.load(path) as tiles:
+        return {key: tiles[key] for key in tiles.files}
+
+def load_tiles(name: str) -> dict:
+    """Load the tiles of a result, they are kept in memory until the file changes."""
+    tiles_path = get_tiles_path(name)
+    return _load_tiles(str(tiles_path), os.path.getmtime(tiles_path))
+
+def get_tile_series(name: str) -> list:
+    """Get the names of the series with tiles of a result."""
+    return load_tiles(name)["series"].tolist()
+
+def get_tile_range(name: str) -> tuple:
+    """Get the first and last timestamp of the series of a result."""
+    tiles = load_tiles(name)
+    first_times = [tiles[f"{series}/1/line_time"] for series in range(len(tiles["series"]))]
+    start = min(times[0] for times in first_times if len(times))
+    end = max(times[-1] for times in first_times if len(times))
+    return pd.Timestamp(start), pd.Timestamp(end)
+
+def _window(times: np.ndarray, start: int, end: int) -> slice:
+    return slice(np.searchsorted(times, start, side="left"), np.searchsorted(times, end, side="right"))
+
+def read_window(name: str, series: list, start, end, max_points: int = MAX_POINTS) -> tuple:
+    """
+    Read the visible window of some series at the finest level with at most max_points points per series.
+    Returns the line (Time, Series, Value) and the envelope (Time, Series, Min, Max) of the window,
+    the envelope is empty at the hourly level.
+    """
+    tiles = load_tiles(name)
+    series_names = tiles["series"].tolist()
+    start, end = pd.Timestamp(start).as_unit("ns").value, pd.Timestamp(end).as_unit("ns").value
+
+    lines, envelopes = [], []
+    for column in series:
+        index = series_names.index(column)
+        for bucket in tiles["levels"]:
+            key = f"{index}/{bucket}"
+            window = _window(tiles[f"{key}/line_time"], start, end)
+            if window.stop - window.start <= max_points or bucket == tiles["levels"][-1]:
+                break
+        line_times, line_values = tiles[f"{key}/line_time"][window], tiles[f"{key}/line_value"][window]
+        # Even the coarsest level has too many points, reduce the window itself
+        if len(line_values) > max_points:
+            selected = lttb(line_times, line_values, max_points)
+            line_times, line_values = line_times[selected], line_values[selected]
+        lines.append(pd.DataFrame({
+            "Time": pd.to_datetime(line_times),
+            "Series": column,
+            "Value": line_values,
+        }))
+        if bucket > 1:
+            envelope = _window(tiles[f"{key}/envelope_time"], start, end)
+            envelopes.append(pd.DataFrame({
+                "Time": pd.to_datetime(tiles[f"{key}/envelope_time"][envelope]),
+                "Series": column,
+                "Min": tiles[f"{key}/envelope_min"][envelope],
+                "Max": tiles[f"{key}/envelope_max"][envelope],
+            }))
+
+    line = pd.concat(lines, ignore_index=True) if lines else pd.DataFrame(columns=["Time", "Series", "Value"])
+    envelope = pd.concat(envelopes, ignore_index=True) if envelopes else pd.DataFrame(columns=["Time", "Series", "Min", "Max"])
+    return line, envelope
@@ -0,0 +1,128 @@
+"""
+This module is used to store the hourly benchmark energy of the units of a component in a compact form.
+Each unit is described by the id of its reference-year profile, its active window on the time axis and its
+degradation rate instead of a dense column over the whole project, which is mostly zeros before installation and
+after the end of life. Totals and aggregates are calculated from this form, dense float32 unit columns are only
+built chunk by chunk when the timeline is exported.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Hashable, Mapping
+import numpy as np
+import pandas as pd
+from validationtesting.validation.unit_groups import HOURS_PER_YEAR, group_units, reference_year_hour
+from validationtesting.validation.out_of_core import clear_partitions, write_partition
+
+@dataclass(frozen=True, slots=True)
+class UnitSpec:
+    """
+    Compact description of the hourly energy of one unit.
+
+    Attributes:
+        profile (Hashable): Id of the reference-year profile of the unit.
+        installation_date (datetime.datetime): Installation date of the unit, the degradation starts at this date.
+        start (int): First index of the active window on the time axis.
+        stop (int): Index after the last hour of the active window on the time axis.
+        degradation_rate (float): Degradation per full year since installation, None if the unit does not degrade.
+    """
+    profile: Hashable
+    installation_date: datetime.datetime
+    start: int
+    stop: int
+    degradation_rate: float | None = None
+
+class Timeline:
+    """Hourly benchmark energy of the units of a component, stored as unit specs and reference-year profiles."""
+
+    def __init__(self, date_range: pd.DatetimeIndex, profiles: Mapping, units: list, component: str) -> None:
+        self.date_range = date_range
+        self.profiles = profiles
+        self.units = units
+        self.component = component
+        self._hour_index = reference_year_hour(date_range)
+        # Identical units share their energy, it is calculated once per group and weighted by the number of units
+        self._groups = group_units(units)
+
+    @classmethod
+    def from_units(cls, date_range: pd.DatetimeIndex, profiles: Mapping, unit_keys: list, component: str) -> "Timeline":
+        """
+        Create the timeline from one (profile id, installation date, lifetime in years, degradation rate) key per unit.
+        A unit is active from its installation date until the end of its lifetime.
+        """
+        units = []
+        for profile, installation_date, lifetime, degradation_rate in unit_keys:
+            end_of_life = installation_date + datetime.timedelta(days=lifetime * 365)
+            start = int(date_range.searchsorted(installation_date, side="left"))
+            stop = int(date_range.searchsorted(end_of_life, side="right"))
+            units.append(UnitSpec(profile, installation_date, start, max(start, stop), degradation_rate or None))
+        return cls(date_range, profiles, units, component)
+
+    @property
+    def num_units(self) -> int:
+        return len(self.units)
+
+    def unit_energy(self, unit: UnitSpec, start: int = 0, stop: int = None) -> np.ndarray:
+        """Calculate the dense hourly energy of a unit between two indices of the time axis."""
+        stop = len(self.date_range) if stop is None else stop
+        energy = np.zeros(stop - start)
+        window_start, window_stop = max(start, unit.start), min(stop, unit.stop)
+        if window_start >= window_stop:
+            return energy
+        values = self.profiles[unit.profile][self._hour_index[window_start:window_stop]]
+        if unit.degradation_rate:
+            years_since_install = np.asarray((self.date_range[window_start:window_stop] - unit.installation_date).days // 365)
+            values = values * (1 - unit.degradation_rate * years_since_install)
+        energy[window_start - start:window_stop - start] = values
+        return energy
+
+    def total(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Calculate the total hourly energy of all units between two indices of the time axis."""
+        stop = len(self.date_range) if stop is None else stop
+        total = np.zeros(stop - start)
+        for unit, members in self._groups.items():
+            total += len(members) * self.unit_energy(unit, start, stop)
+        return total
+
+    def unit_totals(self) -> np.ndarray:
+        """Calculate the energy of each unit over the whole project, only the active windows are evaluated."""
+        totals = np.zeros(self.num_units)
+        for unit, members in self._groups.items():
+            totals[members] = self.unit_energy(unit, unit.start, unit.stop).sum()
+        return totals
+
+    def aggregate(self, keys, how: str = "sum") -> pd.Series:
+        """Aggregate the total hourly energy by the given keys, e.g. the year of the time axis."""
+        return pd.Series(self.total(), index=self.date_range).groupby(keys).agg(how)
+
+    def unit_columns(self) -> list:
+        return [f"Benchmark {self.component} Energy Unit {unit + 1} [Wh]" for unit in range(self.num_units)]
+
+    def to_frame(self, start: int = 0, stop: int = None, dtype=np.float32) -> pd.DataFrame:
+        """Build the dense table of the hours between two indices of the time axis, the unit columns are stored as float32."""
+        stop = len(self.date_range) if stop is None else stop
+        columns = {"Time": self.date_range[start:stop]}
+        group_energy = {unit: self.unit_energy(unit, start, stop).astype(dtype) for unit in self._groups}
+        columns.update({column: group_energy[unit] for column, unit in zip(self.unit_columns(), self.units)})
+        columns[f"Benchmark {self.component} Energy Total [Wh]"] = self.total(start, stop)
+        return pd.DataFrame(columns)
+
+    def year_bounds(self) -> list:
+        """Get the year and the first and last index (exclusive) of each year of the time axis."""
+        years = np.asarray(self.date_range.year)
+        starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        stops = np.r_[starts[1:], len(years)]
+        return [(int(years[start]), int(start), int(stop)) for start, stop in zip(starts, stops)]
+
+    def to_partitions(self, name: str) -> None:
+        """Export the dense table as yearly partitions for the out-of-core engine, only one year is built at a time."""
+        clear_partitions(name)
+        for _, start, stop in self.year_bounds():
+            write_partition(name, self.to_frame(start, stop))
+
+    def to_csv(self, path, chunk_size: int = HOURS_PER_YEAR) -> None:
+        """Export the dense table to a CSV file, only one chunk of hours is built at a time."""
+        for start in range(0, max(len(self.date_range), 1), chunk_size):
+            self.to_frame(start, min(start + chunk_size, len(self.date_range))).to_csv(
+                path, index=False, mode="w" if start == 0 else "a", header=start == 0
+            )
@@ -0,0 +1,58 @@
+"""
+This module is used to group identical units of a component so that their hourly timelines are only computed once.
+Units with the same type, installation date, lifetime and degradation rate have the same hourly energy,
+so one timeline is computed per group and broadcast to all units of the group.
+The total of the component is the sum of the group timelines weighted by the number of units in each group.
+"""
+
+import datetime
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 365 * 24
+
+def project_time_axis(start_date: datetime.datetime, end_date: datetime.datetime) -> pd.DatetimeIndex:
+    """Get the hourly time axis of the project without the 29th of February."""
+    date_range = pd.date_range(start=start_date, end=end_date, freq='h')
+    return date_range[~((date_range.month == 2) & (date_range.day == 29))]
+
+def group_units(unit_keys: list) -> dict:
+    """Map each unique key to the units sharing it, in order of first appearance."""
+    groups = {}
+    for unit, key in enumerate(unit_keys):
+        groups.setdefault(key, []).append(unit)
+    return groups
+
+def daily_profiles_to_array(daily_profiles: list) -> np.ndarray:
+    """
+    Flatten the daily profiles of the reference year into one array of 365 x 24 hours.
+    Missing days and hours are filled with zeros.
+    """
+    profile = np.zeros((365, 24))
+    for day, daily_profile in enumerate(daily_profiles[:365]):
+        values = np.asarray(daily_profile, dtype=float)[:24]
+        profile[day, :len(values)] = values
+    return profile.ravel()
+
+def reference_year_hour(date_range: pd.DatetimeIndex) -> np.ndarray:
+    """Get the hour of the reference year (non-leap year) for each timestamp of the time axis."""
+    day_index = date_range.dayofyear - 1 - (date_range.is_leap_year & (date_range.month > 2))
+    return np.asarray(day_index * 24 + date_range.hour)
+
+def operating_mask(date_range: pd.DatetimeIndex, installation_date: datetime.datetime, end_of_life: datetime.datetime) -> np.ndarray:
+    """Get whether a unit is in operation for each timestamp of the time axis."""
+    return np.asarray((date_range >= installation_date) & (date_range <= end_of_life))
+
+def group_timelines(unit_keys: list, compute_timeline) -> tuple:
+    """
+    Compute the timeline of each group of identical units once.
+    compute_timeline is called with the key of a group and returns the timeline of a single unit of this group.
+    Returns the group timelines (hours x groups), the group of each unit and the number of units in each group.
+    """
+    groups = group_units(unit_keys)
+    timelines = np.column_stack([compute_timeline(key) for key in groups])
+    unit_group = np.empty(len(unit_keys), dtype=int)
+    for group, units in enumerate(groups.values()):
+        unit_group[units] = group
+    multiplicity = np.array([len(units) for units in groups.values()], dtype=float)
+    return timelines, unit_group, multiplicity
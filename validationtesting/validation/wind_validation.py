@@ -11,6 +11,10 @@ from config.path_manager import PathManager
 import datetime
 import math
 import numpy as np
+from validationtesting.validation.unit_groups import project_time_axis, daily_profiles_to_array
+from validationtesting.validation.timeline import Timeline
+from validationtesting.validation.out_of_core import use_out_of_core
+from validationtesting.validation.project_model import UnitTable, compile_unit_table
 
 def temporal_degradation_efficiency(efficiency: float, degradation_rate: float, date: datetime.date, installation_date: datetime.date) -> float:
     """
@@ -69,15 +73,14 @@ def calculate_yearly_wind_energy(wind_data: pd.DataFrame, unique_wind_types: lis
                                  surface_roughness: float, project_name: str) -> dict:
     """
     Precompute hourly wind energy for a representative year for each unique wind turbine type.
-    Returns a dictionary where each key is a turbine type (e.g., "Type 1")
+    Returns a dictionary where each key is the zero based index of a turbine type
     and its value is a list (length 365) of daily energy profiles (each a pandas Series).
     """
     wind_data = wind_data[~((wind_data['Time'].dt.month == 2) & (wind_data['Time'].dt.day == 29))]
     wind_data['Day of Year'] = wind_data['Time'].dt.dayofyear
     wind_data['Hour'] = wind_data['Time'].dt.hour
     yearly_wind_energy = {}
-    for wind_type in unique_wind_types:
-        type_int = int(wind_type.replace("Type ", "")) - 1
+    for type_int in unique_wind_types:
         hub = hub_heights[type_int]
         drivetrain_eff = initial_drivetrain_efficiencies[type_int]
         # Load the corresponding power curve file.
@@ -107,87 +110,30 @@ def calculate_yearly_wind_energy(wind_data: pd.DataFrame, unique_wind_types: lis
                 # If there is no data for this day, fill with zeros (assume 24 hours).
                 daily_series = pd.Series([0] * 24)
             daily_profiles.append(daily_series)
-        yearly_wind_energy[wind_type] = daily_profiles
+        yearly_wind_energy[type_int] = daily_profiles
     return yearly_wind_energy
 
-def fill_wind_table(start_date: datetime.datetime, end_date: datetime.datetime, 
-                    installation_dates: list, wind_lifetime: list, yearly_wind_energy: dict, 
-                    wind_unit_types: list, wind_degradation: bool, wind_degradation_rate: list, 
-                    discount_rate: float) -> pd.DataFrame:
+def fill_wind_table(start_date: datetime.datetime, end_date: datetime.datetime, units: UnitTable,
+                    yearly_wind_energy: dict, wind_degradation: bool, discount_rate: float) -> Timeline:
     """
-    Fill out an hourly table for the project timeline using the precomputed yearly wind energy profiles.
+    Build the timeline of the wind turbines for the project using the precomputed yearly wind energy profiles.
     For each turbine unit, if the current timestamp is outside its operational period 
     (before installation or after end-of-life), energy is set to zero. Otherwise the base energy
     is modified by degradation.
+    Each unit is stored with the profile of its turbine type and its active window, the hourly table is only built on export.
     """
-    date_range = pd.date_range(start=start_date, end=end_date, freq='H')
-    date_range = date_range[~((date_range.month == 2) & (date_range.day == 29))]
-    results = pd.DataFrame(index=date_range)
+    date_range = project_time_axis(start_date, end_date)
+    unit_types = units.type_index.tolist()
+    yearly_profiles = {turbine_type: daily_profiles_to_array(yearly_wind_energy[turbine_type]) for turbine_type in set(unit_types)}
 
-    num_units = len(wind_unit_types)
-    for unit in range(num_units):
-        results[f'Benchmark wind Energy Unit {unit+1} [Wh]'] = 0
-    results['Benchmark wind Energy Total [Wh]'] = 0
+    degradation_rates = units["wind_temporal_degradation_rate"] / 100
+    unit_keys = [
+        (turbine_type, installation_date, lifetime, degradation_rate if wind_degradation else None)
+        for turbine_type, installation_date, lifetime, degradation_rate
+        in zip(unit_types, units.installation_dates, units.lifetime.tolist(), degradation_rates.tolist())
+    ]
 
-    # Create a dictionary to store previously calculated results
-    calculated_units = {}
-
-    # Loop over each turbine unit.
-    for unit in range(num_units):
-        turbine_type = wind_unit_types[unit]
-        install_date = installation_dates[unit]
-        key = (turbine_type, install_date)  # Key for duplicate detection
-
-        # Determine type index to obtain lifetime and degradation rate.
-        type_int = int(turbine_type.replace("Type ", "")) - 1
-        lifetime_years = wind_lifetime[type_int]
-        end_of_life = install_date + datetime.timedelta(days=lifetime_years * 365)
-        # Get the precomputed yearly energy profile for this turbine type.
-        base_yearly_energy = yearly_wind_energy[turbine_type]
-        col_name = f'Benchmark wind Energy Unit {unit+1} [Wh]'
-
-        # Check if a unit with the same turbine type and installation date was already calculated.
-        if key in calculated_units:
-            # Copy the precomputed series into this unit’s column.
-            results[col_name] = calculated_units[key]
-            results['Benchmark wind Energy Total [Wh]'] += calculated_units[key]
-        else:
-            # Compute new energy series for this unit.
-            new_unit_series = pd.Series(0, index=date_range)
-            for current_time in date_range:
-                if current_time < install_date or current_time > end_of_life:
-                    energy = 0
-                else:
-                    # Adjust day index, account for leap years.
-                    if current_time.is_leap_year and current_time.month > 2:
-                        day_index = current_time.dayofyear - 2
-                    else:
-                        day_index = current_time.dayofyear - 1
-                    hour_index = current_time.hour
-                    # Retrieve the base energy from the daily profile.
-                    if 0 <= day_index < len(base_yearly_energy):
-                        daily_series = base_yearly_energy[day_index]
-                        if hour_index < len(daily_series):
-                            base_energy = daily_series.iloc[hour_index]
-                        else:
-                            base_energy = 0
-                    else:
-                        base_energy = 0
-                    energy = base_energy
-                    # Apply temporal degradation if enabled.
-                    if wind_degradation:
-                        years_since_install = (current_time - install_date).days // 365
-                        energy *= (1 - wind_degradation_rate[type_int] * years_since_install)
-                new_unit_series.at[current_time] = energy
-                # Add energy to the total column.
-                results.at[current_time, 'Benchmark wind Energy Total [Wh]'] += energy
-
-            results[col_name] = new_unit_series
-            calculated_units[key] = new_unit_series
-
-    results.reset_index(inplace=True)
-    results.rename(columns={'index': 'Time'}, inplace=True)
-    return results
+    return Timeline.from_units(date_range, yearly_profiles, unit_keys, "wind")
 
 def wind_benchmark() -> None:
     """
@@ -206,14 +152,11 @@ def wind_benchmark() -> None:
     wind_data['Time'] = pd.to_datetime(wind_data['Time'], format='%Y-%m-%d %H:%M', errors='coerce')
 
     # Retrieve parameters from session_state
-    wind_num_units = st.session_state.wind_num_units
-    installation_dates = st.session_state.wind_installation_dates
-    wind_unit_types = st.session_state.wind_type  
+    # Compile the wind units once, so that the type strings are only parsed here
+    units = compile_unit_table("wind", ["wind_temporal_degradation_rate"])
     initial_drivetrain_efficiencies = [x / 100 for x in st.session_state.wind_drivetrain_efficiency]
-    wind_lifetime = st.session_state.wind_lifetime
     hub_heights = st.session_state.wind_hub_height
     wind_degradation = st.session_state.battery_temporal_degradation
-    wind_degradation_rate = [x / 100 for x in st.session_state.wind_temporal_degradation_rate]
     complexity = st.session_state.wind_selected_input_type
     Z1 = st.session_state.wind_Z1
     Z0 = st.session_state.wind_Z0
@@ -230,7 +173,7 @@ def wind_benchmark() -> None:
 
     # Precompute the yearly wind energy profiles for each turbine type
     wind_text.write("Computing Yearly Wind Energy Profiles for Reference Year")
-    unique_wind_types = list(set(wind_unit_types))
+    unique_wind_types = sorted(set(units.type_index.tolist()))
     yearly_wind_energy = calculate_yearly_wind_energy(
         wind_data, unique_wind_types, complexity, Z1, Z0, hub_heights,
         initial_drivetrain_efficiencies, surface_roughness, project_name
@@ -238,19 +181,18 @@ def wind_benchmark() -> None:
     wind_progress += progress_step
     wind_progress_bar.progress(wind_progress)
 
-    # Fill the hourly wind energy table for the full project timeline
+    # Build the wind energy timeline for the full project
     wind_text.write("Calculating Wind Energy for the Project Timeline")
-    results = fill_wind_table(
-        start_date, end_date, installation_dates, wind_lifetime, yearly_wind_energy, wind_unit_types,
-        wind_degradation, wind_degradation_rate, discount_rate
-    )
+    timeline = fill_wind_table(start_date, end_date, units, yearly_wind_energy, wind_degradation, discount_rate)
     wind_progress += progress_step
     wind_progress_bar.progress(wind_progress)
 
     # Save the results
     wind_text.write("Saving Wind Benchmark Results")
     results_data_path = PathManager.PROJECTS_FOLDER_PATH / str(project_name) / "results" / "wind_validation.csv"
-    results.to_csv(results_data_path, index=False)
+    timeline.to_csv(results_data_path)
+    if use_out_of_core():
+        timeline.to_partitions("wind_validation")
     wind_text.write("Wind Benchmark Optimization Completed.")
     wind_progress += progress_step
     wind_progress_bar.progress(wind_progress)
\ No newline at end of file